@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Crawl throughput vs. max_concurrent against a local stub site.
+
+    python benchmarks/bench_crawl.py --pages 200 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from stub_site import StubSite
+
+from scraper_engine.config import CrawlConfig
+from scraper_engine.crawler import crawl
+
+
+async def run_once(
+    site: StubSite, max_pages: int, concurrency: int, delay: float
+) -> tuple[int, float]:
+    cfg = CrawlConfig(
+        max_pages_per_domain=max_pages,
+        max_concurrent=concurrency,
+        request_delay_seconds=delay,
+        respect_robots=False,
+    )
+    t0 = time.perf_counter()
+    pages = await crawl([site.base_url + "/"], site.domain, cfg)
+    return len(pages), time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=0.05, help="server latency per request (s)")
+    ap.add_argument("--delay", type=float, default=0.0, help="CrawlConfig.request_delay_seconds")
+    ap.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with StubSite(pages=args.pages, links_per_page=10, latency=args.latency) as site:
+        print(f"{'max_concurrent':>14} {'pages':>6} {'seconds':>8} {'pages/sec':>10}")
+        for c in args.concurrency:
+            n, secs = asyncio.run(run_once(site, args.pages, c, args.delay))
+            print(f"{c:>14} {n:>6} {secs:>8.2f} {n / secs:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
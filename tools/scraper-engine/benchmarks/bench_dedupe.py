@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Crawler traps and duplicate URLs: crawl budget spent with and without URL
+canonicalization and near-duplicate detection.
+
+The stub site has --articles articles in paginated sections, and the usual
+ways to waste a crawl on it:
+- every internal link carries a fresh PHPSESSID (a new URL on each page);
+- links carry a site-specific tracking parameter (?from=list|related|home)
+  that no built-in rule knows and that has to be learned;
+- listings come in ?sort= orders re-listing the same articles;
+- every article has a /print copy with the same text;
+- an endless event calendar (/events/YYYY/MM, next / previous month);
+- a broken relative link ("x/comments") that soft-404s into
+  /a1/x/comments, /a1/x/x/comments, ...
+
+Both crawls get the same page budget; the table shows how much of it went to
+distinct articles.
+
+    python benchmarks/bench_dedupe.py --articles 2000 --budget 500
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import re
+import secrets
+import time
+
+from stub_site import StubSite
+
+from scraper_engine.config import CrawlConfig
+from scraper_engine.crawler import crawl
+
+PER_PAGE = 10
+SORTS = ("new", "old", "popular", "title")
+MONTHS = ("January", "February", "March", "April", "May", "June", "July", "August",
+          "September", "October", "November", "December")
+
+
+class TrapSite:
+    def __init__(self, articles: int, sections: int, seed: int = 1):
+        rng = random.Random(seed)
+        vocab = [f"word{i}" for i in range(20_000)]
+        self.n = articles
+        self.sections = sections
+        self.template = " ".join(rng.choice(vocab) for _ in range(150))  # navigation, footer
+        self.text = [" ".join(rng.choice(vocab) for _ in range(rng.randint(150, 600)))
+                     for _ in range(articles)]
+        self.by_section = [list(range(s, articles, sections)) for s in range(sections)]
+        self.related = [[rng.randrange(articles) for _ in range(3)] for _ in range(articles)]
+
+    def link(self, path: str, source: str) -> str:
+        sep = "&" if "?" in path else "?"
+        return f'<a href="{path}{sep}from={source}&PHPSESSID={secrets.token_hex(8)}">x</a>'
+
+    def html(self, title: str, body: str, links: list[str]) -> str:
+        return (f"<html><head><title>{title}</title></head><body><nav>{self.template}</nav>"
+                f"<main>{body}</main>{''.join(links)}</body></html>")
+
+    def render(self, path: str) -> str | None:
+        path, _, query = path.partition("?")
+        params = dict(p.partition("=")[::2] for p in query.split("&") if p)
+        if path == "/":
+            links = [self.link(f"/s{s}", "home") for s in range(self.sections)]
+            now = time.gmtime()
+            links.append(self.link(f"/events/{now.tm_year}/{now.tm_mon:02d}", "home"))
+            return self.html("Home", "Welcome", links)
+        if m := re.fullmatch(r"/s(\d+)", path):
+            s, page = int(m[1]), int(params.get("page", 1))
+            items = self.by_section[s] if s < self.sections else []
+            sort = params.get("sort", "new")
+            if sort != "new":
+                items = random.Random(sort).sample(items, len(items))
+            rows = items[(page - 1) * PER_PAGE: page * PER_PAGE]
+            if not rows:
+                return None
+            links = [self.link(f"/s{s}/a{i}", "list") for i in rows]
+            if page * PER_PAGE < len(items):
+                links.append(self.link(f"/s{s}?page={page + 1}&sort={sort}", "list"))
+            links += [self.link(f"/s{s}?sort={o}", "list") for o in SORTS]
+            titles = " ".join(f"Article {i}" for i in rows)
+            return self.html(f"Section {s}", titles, links)
+        if m := re.fullmatch(r"/s(\d+)/a(\d+)(/print)?", path):
+            i = int(m[2])
+            if i >= self.n:
+                return None
+            links = [self.link(f"/s{i % self.sections}/a{j}", "related") for j in self.related[i]]
+            links.append(self.link(f"/s{i % self.sections}/a{i}/print", "article"))
+            links.append('<a href="x/comments">comments</a>')
+            return self.html(f"Article {i}", self.text[i], links)
+        if re.fullmatch(r"/s\d+(/x)+/comments", path):
+            return self.html("Comments", "No comments yet", ['<a href="x/comments">comments</a>'])
+        if m := re.fullmatch(r"/events/(\d+)/(\d\d)", path):
+            y, mo = int(m[1]), int(m[2])
+            prev_ = (y, mo - 1) if mo > 1 else (y - 1, 12)
+            next_ = (y, mo + 1) if mo < 12 else (y + 1, 1)
+            links = [self.link("/events/{}/{:02d}".format(*ym), "calendar")
+                     for ym in (prev_, next_)]
+            return self.html("Events", f"Events in {MONTHS[mo - 1]} {y}: none scheduled", links)
+        return None
+
+
+def classify(url: str) -> str:
+    if re.search(r"/a\d+/print", url):
+        return "print"
+    if re.search(r"/a\d+(\?|$)", url):
+        return "article"
+    if "/comments" in url:
+        return "comments"
+    if "/events/" in url:
+        return "calendar"
+    return "listing"
+
+
+async def run(site: StubSite, budget: int, dedupe: bool) -> list[dict]:
+    cfg = CrawlConfig(
+        max_pages_per_domain=budget,
+        max_concurrent=4,
+        request_delay_seconds=0.0,
+        respect_robots=False,
+        use_sitemaps=False,
+        extract_mode="inline",
+        canonicalize_urls=dedupe,
+        near_duplicate_bits=3 if dedupe else -1,
+    )
+    pages: list[dict] = []
+
+    async def sink(page: dict) -> None:
+        pages.append(page)
+
+    await crawl([site.base_url + "/"], site.domain, cfg, on_page=sink)
+    return pages
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--articles", type=int, default=2000)
+    ap.add_argument("--sections", type=int, default=8)
+    ap.add_argument("--budget", type=int, default=500)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    logging.getLogger("scraper_engine.canonical").setLevel(logging.INFO)
+
+    synth = TrapSite(args.articles, args.sections)
+    kinds = ("article", "print", "listing", "calendar", "comments")
+    print(f"{args.articles} articles; budget {args.budget} pages")
+    print(f"{'crawl':>8} {'requests':>9} {'distinct articles':>18} "
+          + " ".join(f"{k:>9}" for k in kinds))
+    for dedupe in (False, True):
+        with StubSite(render=synth.render, latency=0.0) as site:
+            pages = asyncio.run(run(site, args.budget, dedupe))
+            counts = {k: 0 for k in kinds}
+            articles = set()
+            for p in pages:
+                kind = classify(p["url"])
+                counts[kind] += 1
+                if kind == "article":
+                    articles.add(re.search(r"/a(\d+)", p["url"])[1])
+            label = "dedupe" if dedupe else "off"
+            print(f"{label:>8} {site.requests:>9} {len(articles):>18} "
+                  + " ".join(f"{counts[k]:>9}" for k in kinds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Event-loop responsiveness while extracting large pages, per extraction mode.
+
+A ticker coroutine measures how late the loop wakes it (what a concurrent
+/health request would feel) while `--pages` large pages are extracted.
+
+    python benchmarks/bench_extract_executor.py --pages 40 --links 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+from stub_site import page_html
+
+from scraper_engine.executor import ExtractionExecutor
+
+
+async def measure(mode: str, docs: list[bytes], workers: int) -> tuple[float, float, float, float]:
+    ex = ExtractionExecutor(mode, workers)
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        while not done.is_set():
+            t = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - t - 0.005)
+
+    tick = asyncio.create_task(ticker())
+    t0 = time.perf_counter()
+    results = await asyncio.gather(
+        *(
+            ex.extract(d, "utf-8", f"https://example.com/p/{i}", "example.com")
+            for i, d in enumerate(docs)
+        )
+    )
+    wall = time.perf_counter() - t0
+    done.set()
+    await tick
+    ex.shutdown()
+    parse_ms = sum(t.parse_ms for _, t in results) / len(results)
+    wait_ms = sum(t.queue_wait_ms for _, t in results) / len(results)
+    return wall, max(lags) * 1000, parse_ms, wait_ms
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", type=int, default=40)
+    ap.add_argument("--links", type=int, default=5000)
+    ap.add_argument("--workers", type=int, default=0)
+    args = ap.parse_args()
+    docs = [page_html(i, 100_000, args.links).encode() for i in range(args.pages)]
+    print(f"{args.pages} pages x {args.links} links ({sum(map(len, docs)) / 1e6:.1f} MB)")
+    print(f"{'mode':>8} {'wall s':>7} {'max loop lag ms':>16} "
+          f"{'avg parse ms':>13} {'avg wait ms':>12}")
+    for mode in ("inline", "thread", "process"):
+        wall, lag, parse_ms, wait_ms = asyncio.run(measure(mode, docs, args.workers))
+        print(f"{mode:>8} {wall:>7.2f} {lag:>16.1f} {parse_ms:>13.1f} {wait_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
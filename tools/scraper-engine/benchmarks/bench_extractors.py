@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Differential check and speed comparison: BeautifulSoup extractor vs streaming extractor.
+
+Runs both engines over stub-site pages of growing size and fails (exit 1) on
+any ExtractedPage that differs; pass --html-dir to add saved real-world pages
+(*.html, recursive). The markup quirks the streaming engine has to mirror are
+checked by tests/test_extractors.py.
+
+    python benchmarks/bench_extractors.py
+    python benchmarks/bench_extractors.py --html-dir ~/saved-pages --repeat 3
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from stub_site import page_html
+
+from scraper_engine.extractor import extract
+from scraper_engine.fast_extractor import extract_fast
+
+PAGE_URL = "https://example.com/dir/page.html"
+TARGET = "example.com"
+
+
+def corpus(html_dir: str | None) -> list[tuple[str, str]]:
+    docs = [(f"stub-{n}-{links}", page_html(n, 10_000, links)) for n, links in
+             ((1, 10), (2, 100), (3, 1000), (4, 5000))]
+    if html_dir:
+        for p in sorted(Path(html_dir).expanduser().rglob("*.htm*")):
+            docs.append((str(p), p.read_text(encoding="utf-8", errors="replace")))
+    return docs
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--html-dir", help="directory of saved HTML pages to add to the corpus")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    docs = corpus(args.html_dir)
+
+    mismatches = 0
+    for name, html in docs:
+        a = extract(html, PAGE_URL, TARGET)
+        b = extract_fast(html, PAGE_URL, TARGET)
+        if a != b:
+            mismatches += 1
+            fields = [k for k in a.__dataclass_fields__ if getattr(a, k) != getattr(b, k)]
+            print(f"MISMATCH {name}: {', '.join(fields)}")
+
+    size = sum(len(h) for _, h in docs)
+    timings = {}
+    for engine, fn in (("bs4", extract), ("fast", extract_fast)):
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            for _, html in docs:
+                fn(html, PAGE_URL, TARGET)
+        timings[engine] = (time.perf_counter() - t0) / args.repeat
+
+    print(f"corpus: {len(docs)} documents, {size / 1e6:.2f} MB, {mismatches} mismatches")
+    for engine, secs in timings.items():
+        print(f"{engine:>5}: {secs * 1000:8.1f} ms/pass  {size / 1e6 / secs:6.1f} MB/s")
+    print(f"speedup: {timings['bs4'] / timings['fast']:.1f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Crawl budget convergence: priority vs FIFO frontier on a synthetic site.
+
+The stub site has paginated section listings, each offered in sort/view/
+filter facet variants, paginated tag pages and date archives (which mostly
+re-list the same articles), and articles that link to related articles, tags
+and external sites. Both frontiers crawl it under the same page budget; the
+table shows how much of the site's link graph was found after N pages:
+articles fetched, distinct external sites linked, and external links found.
+
+    python benchmarks/bench_frontier.py --articles 2000 --budget 500
+"""
+
+import argparse
+import asyncio
+import logging
+import random
+import re
+
+from stub_site import StubSite
+
+from scraper_engine.config import CrawlConfig
+from scraper_engine.crawler import crawl
+
+SORTS = ("new", "old", "popular")
+VIEWS = ("grid", "list")
+FILTERS = ("red", "green", "blue", "free", "paid")
+PER_PAGE = 10
+
+
+class SyntheticSite:
+    def __init__(self, articles: int, sections: int, tags: int, seed: int = 1):
+        rng = random.Random(seed)
+        self.sections = sections
+        self.n = articles
+        self.section_of = [i % sections for i in range(articles)]
+        self.by_section = [list(range(s, articles, sections)) for s in range(sections)]
+        # a few popular articles get most related-article links
+        self.related = [[min(int(rng.paretovariate(1.1)) * sections + i % sections, articles - 1)
+                         for _ in range(3)] for i in range(articles)]
+        self.tags = [rng.sample(range(tags), 3) for _ in range(articles)]
+        self.by_tag: dict[int, list[int]] = {}
+        for i, ts in enumerate(self.tags):
+            for t in ts:
+                self.by_tag.setdefault(t, []).append(i)
+        self.months = [(2015 + i % 10, 1 + i % 12) for i in range(articles)]
+        self.by_month: dict[tuple[int, int], list[int]] = {}
+        for i, m in enumerate(self.months):
+            self.by_month.setdefault(m, []).append(i)
+        self.externals = [[f"https://ext{rng.randrange(articles)}.example.org/ref{i}"
+                           for _ in range(rng.randint(1, 3))] for i in range(articles)]
+
+    def all_external_sites(self) -> set[str]:
+        return {re.sub(r"/ref\d+$", "", u) for ext in self.externals for u in ext}
+
+    def article_url(self, i: int) -> str:
+        return f"/s{self.section_of[i]}/a{i}"
+
+    def listing(self, base: str, items: list[int], page: int, facets: bool) -> list[str] | None:
+        rows = items[(page - 1) * PER_PAGE: page * PER_PAGE]
+        if not rows:
+            return None
+        links = [self.article_url(i) for i in rows]
+        if page * PER_PAGE < len(items):
+            links.append(f"{base}page/{page + 1}")
+        if facets:
+            links += [f"{base}?sort={s}&view={v}" for s in SORTS for v in VIEWS]
+            links += [f"{base}?filter={f}" for f in FILTERS]
+        return links
+
+    def render(self, path: str) -> str | None:
+        path, _, query = path.partition("?")
+        links: list[str] | None
+        ext: list[str] = []
+        if path == "/":
+            links = [f"/s{s}/" for s in range(self.sections)]
+            links += [self.article_url(i) for i in range(0, min(self.n, 20))]
+            links += [f"/tag/t{t}/" for t in range(10)]
+        elif m := re.fullmatch(r"/s(\d+)(?:/page/(\d+))?/?", path):
+            s, page = int(m[1]), int(m[2] or 1)
+            items = self.by_section[s] if s < self.sections else []
+            if query:  # facet variants re-order/filter the same articles
+                items = random.Random(query).sample(items, len(items))
+            links = self.listing(f"/s{s}/", items, page, facets=True)
+        elif m := re.fullmatch(r"/s(\d+)/a(\d+)", path):
+            i = int(m[2])
+            if i >= self.n:
+                return None
+            links = ["/", f"/s{self.section_of[i]}/"]
+            links += [self.article_url(j) for j in self.related[i]]
+            links += [f"/tag/t{t}/" for t in self.tags[i]]
+            links.append("/{}/{:02d}/".format(*self.months[i]))
+            ext = self.externals[i]
+        elif m := re.fullmatch(r"/tag/t(\d+)(?:/page/(\d+))?/?", path):
+            tagged = self.by_tag.get(int(m[1]), [])
+            links = self.listing(f"/tag/t{m[1]}/", tagged, int(m[2] or 1), False)
+        elif m := re.fullmatch(r"/(\d{4})/(\d\d)(?:/page/(\d+))?/?", path):
+            key = (int(m[1]), int(m[2]))
+            dated = self.by_month.get(key, [])
+            links = self.listing(f"/{m[1]}/{m[2]}/", dated, int(m[3] or 1), False)
+        else:
+            links = None
+        if links is None:
+            return None
+        anchors = "".join(f'<a href="{h}">x</a>' for h in links + ext)
+        return f"<html><head><title>{path}</title></head><body>{anchors}</body></html>"
+
+
+async def run(site: StubSite, order: str, budget: int) -> list[dict]:
+    cfg = CrawlConfig(
+        max_pages_per_domain=budget,
+        max_concurrent=4,
+        request_delay_seconds=0.0,
+        respect_robots=False,
+        extract_mode="inline",
+        frontier_order=order,
+    )
+    pages: list[dict] = []
+
+    async def sink(page: dict) -> None:
+        pages.append(page)
+
+    await crawl([site.base_url + "/"], site.domain, cfg, on_page=sink)
+    return pages
+
+
+def progress(pages: list[dict], marks: list[int]) -> list[tuple[int, int, int]]:
+    out, articles, sites, links = [], 0, set(), 0
+    for n, page in enumerate(pages, 1):
+        if re.search(r"/s\d+/a\d+$", page["url"]):
+            articles += 1
+        for L in page["links"]:
+            if not L["is_internal"]:
+                sites.add(L["domain"])
+                links += 1
+        if n in marks:
+            out.append((articles, len(sites), links))
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--articles", type=int, default=2000)
+    ap.add_argument("--sections", type=int, default=8)
+    ap.add_argument("--tags", type=int, default=60)
+    ap.add_argument("--budget", type=int, default=500)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    synth = SyntheticSite(args.articles, args.sections, args.tags)
+    total_sites = len(synth.all_external_sites())
+    marks = list(range(args.budget // 5, args.budget + 1, args.budget // 5))
+    results = {}
+    with StubSite(render=synth.render, latency=0.0) as site:
+        for order in ("fifo", "priority"):
+            results[order] = progress(asyncio.run(run(site, order, args.budget)), marks)
+
+    print(f"{args.articles} articles, {total_sites} external sites; budget {args.budget} pages")
+    print(f"{'pages':>6} | {'articles':^17} | {'external sites':^17} | {'external links':^17}")
+    print(f"{'':>6}" + f" | {'fifo':>8} {'priority':>8}" * 3)
+    for i, n in enumerate(marks):
+        f, p = results["fifo"][i], results["priority"][i]
+        print(f"{n:>6} | {f[0]:>8} {p[0]:>8} | {f[1]:>8} {p[1]:>8} | {f[2]:>8} {p[2]:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Cross-job domain metrics from the crawl DB: incremental LinkGraph sync vs.
+rebuilding the graph from every completed job.
+
+Simulates a series of crawl jobs (each re-crawls half of the previous job's
+pages and adds new ones), stores them, and after each job refreshes the
+target's metrics both ways; the incremental graph only reads and merges the
+new job. Also compares the graph's memory with the same edges held as a list
+of (source, target, anchor, nofollow) tuples.
+
+    python benchmarks/bench_linkgraph.py --jobs 10 --pages 2000 --links 40
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from scraper_engine import storage
+from scraper_engine.linkgraph import LinkGraph
+
+TARGET = "example.com"
+
+
+def make_page(rng: random.Random, n: int, links: int, rev: int) -> dict:
+    site = f"ref{n % 500}.example.org"
+    url = f"https://{site}/post/{n}"
+    out = []
+    for j in range(links):
+        if j % 4 == 0:
+            host, path = "www.example.com", f"/p/{rng.randrange(1000)}"
+        else:
+            host, path = site, f"/post/{rng.randrange(n + 1)}"
+        href = f"https://{host}{path}"
+        out.append({
+            "href": href, "anchor": f"link {j % 20}", "rel": "", "is_internal": False,
+            "is_nofollow": rev % 3 == 0 and j % 8 == 0,
+            "domain": host.removeprefix("www."), "site": host.removeprefix("www."),
+            "normalized": href,
+        })
+    return {"url": url, "domain": site, "site": site, "links": out}
+
+
+def make_jobs(jobs: int, pages: int, links: int) -> list[list[dict]]:
+    rng = random.Random(7)
+    out, prev = [], []
+    for k in range(jobs):
+        recrawl = rng.sample(prev, len(prev) // 2) if prev else []
+        fresh = list(range(k * pages, k * pages + pages - len(recrawl)))
+        ids = recrawl + fresh
+        out.append([make_page(rng, n, links, k) for n in ids])
+        prev = ids
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--jobs", type=int, default=10)
+    ap.add_argument("--pages", type=int, default=2000)
+    ap.add_argument("--links", type=int, default=40)
+    args = ap.parse_args()
+    jobs = make_jobs(args.jobs, args.pages, args.links)
+
+    print(f"{args.jobs} jobs x {args.pages} pages x {args.links} links")
+    print(f"{'job':>4} {'pages':>7} {'edges':>9} {'rebuild ms':>11} {'incremental ms':>15}")
+    graph = LinkGraph()
+    total_re = total_inc = 0.0
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "graph.db")
+        storage.init_schema(db)
+        for k, job in enumerate(jobs, 1):
+            job_id = storage.create_job(db, TARGET, [job[0]["url"]])
+            storage.store_crawl(db, job_id, TARGET, job, {})
+
+            t0 = time.perf_counter()
+            fresh = LinkGraph()
+            storage.sync_link_graph(db, fresh)
+            full = fresh.metrics(TARGET)
+            re_s = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            storage.sync_link_graph(db, graph)
+            inc = graph.metrics(TARGET)
+            inc_s = time.perf_counter() - t0
+
+            assert full == inc, (full, inc)
+            total_re += re_s
+            total_inc += inc_s
+            print(f"{k:>4} {graph.pages:>7} {graph.edges:>9} "
+                  f"{re_s * 1000:>11.0f} {inc_s * 1000:>15.0f}")
+        storage.close_all()
+    print(f"{'all':>4} {'':>7} {'':>9} {total_re * 1000:>11.0f} {total_inc * 1000:>15.0f}")
+
+    pages = [p for job in jobs for p in job]
+    edges = sum(len(p["links"]) for p in pages)
+    tracemalloc.start()
+    g = LinkGraph()
+    g.merge(pages)
+    graph_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    del g
+    tracemalloc.stop()
+    tracemalloc.start()
+    tuples = [
+        (p["url"], L["href"], L["anchor"], L["is_nofollow"]) for p in pages for L in p["links"]
+    ]
+    tuples_mb = tracemalloc.get_traced_memory()[0] / 1e6
+    del tuples
+    tracemalloc.stop()
+    print(f"\n{edges} edges: LinkGraph {graph_mb:.1f} MB "
+          f"({graph_mb * 1e6 / edges:.0f} B/edge incl. interned strings), "
+          f"tuple list {tuples_mb:.1f} MB ({tuples_mb * 1e6 / edges:.0f} B/edge, strings shared)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+PageRank power iteration (authority.pagerank) on large synthetic link graphs.
+
+Builds a graph with power-law in-degrees, runs PageRank cold, then adds ~1%
+new edges (a new crawl merged) and compares a warm start from the previous
+scores with another cold run.
+
+    python benchmarks/bench_pagerank.py --nodes 1000000 --edges 5000000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from scraper_engine.authority import PageRankResult, pagerank
+
+
+def make_edges(rng: np.random.Generator, nodes: int, edges: int) -> tuple[np.ndarray, np.ndarray]:
+    src = rng.integers(0, nodes, edges, dtype=np.int32)
+    # Zipf-like targets: a few pages collect most links
+    dst = np.minimum(rng.pareto(1.2, edges) * nodes / 50, nodes - 1).astype(np.int32)
+    return src, rng.permutation(nodes).astype(np.int32)[dst]
+
+
+def timed(**kw):
+    t0 = time.perf_counter()
+    res = pagerank(**kw)
+    return res, time.perf_counter() - t0
+
+
+def row(label: str, r: PageRankResult, secs: float) -> None:
+    per_iter = secs / r.iterations
+    print(f"{label:>22} {r.iterations:>6} {secs:>8.2f} {per_iter:>7.3f} {r.delta:>10.2e}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--nodes", type=int, default=1_000_000)
+    ap.add_argument("--edges", type=int, default=5_000_000)
+    ap.add_argument("--tol", type=float, default=1e-6)
+    args = ap.parse_args()
+    rng = np.random.default_rng(1)
+    src, dst = make_edges(rng, args.nodes, args.edges)
+
+    print(f"{args.nodes:,} nodes, {args.edges:,} edges, tol {args.tol:g} (L1)")
+    print(f"{'run':>22} {'iters':>6} {'seconds':>8} {'s/iter':>7} {'L1 delta':>10}")
+    cold, secs = timed(src=src, dst=dst, n=args.nodes, tol=args.tol)
+    row("cold", cold, secs)
+
+    extra = args.edges // 100
+    s2, d2 = make_edges(rng, args.nodes, extra)
+    src2, dst2 = np.concatenate([src, s2]), np.concatenate([dst, d2])
+    warm, wsecs = timed(src=src2, dst=dst2, n=args.nodes, tol=args.tol, x0=cold.scores)
+    cold2, csecs = timed(src=src2, dst=dst2, n=args.nodes, tol=args.tol)
+    row(f"+{extra:,} edges, warm", warm, wsecs)
+    row(f"+{extra:,} edges, cold", cold2, csecs)
+    print(f"warm vs cold max |diff|: {np.abs(warm.scores - cold2.scores).max():.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Cost of registrable-domain (eTLD+1) lookups from the bundled Public Suffix List.
+
+Reports the one-off trie compile, cold lookups (every host new, cache
+cleared) and warm lookups (memoized), then the per-link extraction cost on a
+5,000-link page with and without the lookup.
+
+    python benchmarks/bench_psl.py --hosts 100000
+"""
+
+import argparse
+import time
+
+from bench_urls import PAGE_URL, TARGET, make_anchors
+
+from scraper_engine import extractor, psl
+from scraper_engine.extractor import _make_link, _target_matcher
+
+SUFFIXES = ["com", "co.uk", "blogspot.com", "city.kawasaki.jp", "github.io", "com.au", "de", "ck"]
+
+
+def make_hosts(n: int) -> list[str]:
+    return [f"www.shop{i}.{SUFFIXES[i % len(SUFFIXES)]}" for i in range(n)]
+
+
+def per_call_ns(fn, items) -> float:
+    t0 = time.perf_counter()
+    for x in items:
+        fn(x)
+    return (time.perf_counter() - t0) / len(items) * 1e9
+
+
+def extract_ns(anchors) -> float:
+    is_target = _target_matcher(TARGET, "example.com")
+    t0 = time.perf_counter()
+    for h, t, r in anchors:
+        _make_link(PAGE_URL, h, t, r, is_target)
+    return (time.perf_counter() - t0) / len(anchors) * 1e9
+
+
+def extract_with_without(anchors, repeat: int) -> tuple[float, float]:
+    """Best-of timings, alternating runs so machine noise hits both sides alike."""
+    lookup = extractor.registrable_domain
+    with_psl = without = float("inf")
+    try:
+        for _ in range(repeat):
+            extractor.registrable_domain = lookup
+            with_psl = min(with_psl, extract_ns(anchors))
+            extractor.registrable_domain = str  # no-op stand-in
+            without = min(without, extract_ns(anchors))
+    finally:
+        extractor.registrable_domain = lookup
+    return with_psl, without
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--hosts", type=int, default=100_000)
+    ap.add_argument("--links", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=30)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    psl._get_trie()
+    print(f"trie compile: {(time.perf_counter() - t0) * 1000:.1f} ms (once per process)")
+
+    hosts = make_hosts(args.hosts)
+    psl.registrable_domain.cache_clear()
+    cold = per_call_ns(psl.registrable_domain, hosts)
+    warm = per_call_ns(psl.registrable_domain, hosts[-psl.SITE_CACHE_SIZE:])
+    print(f"registrable_domain: cold {cold:.0f} ns/host, warm {warm:.0f} ns/host "
+          f"({args.hosts:,} hosts)")
+
+    anchors = make_anchors(args.links)
+    with_psl, without = extract_with_without(anchors, args.repeat)
+    extra = with_psl - without
+    print(f"extraction per link ({args.links} links): {without:.0f} ns without, "
+          f"{with_psl:.0f} ns with eTLD+1 ({extra:+.0f} ns, {100 * extra / without:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Per-host rate control against a robust and a fragile stub site.
+
+The robust site answers every request in --latency seconds. The fragile one
+slows down beyond --capacity concurrent requests and refuses (429 +
+Retry-After) beyond twice that. Each site is crawled with fixed politeness
+settings (a conservative delay, and no delay with max_concurrent workers;
+neither retries, like the crawler before adaptive rates) and with the
+adaptive AIMD rate control plus retries.
+
+    python benchmarks/bench_rate.py --pages 150 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+
+from stub_site import StubSite
+
+from scraper_engine.config import CrawlConfig
+from scraper_engine.crawler import crawl
+
+
+def configs(args) -> list[tuple[str, CrawlConfig]]:
+    common = dict(
+        max_pages_per_domain=args.pages, max_concurrent=args.concurrency, respect_robots=False
+    )
+    fixed = dict(common, adaptive_rate=False, max_retries=0)
+    return [
+        (f"fixed {args.delay}s", CrawlConfig(**fixed, request_delay_seconds=args.delay)),
+        ("fixed 0s", CrawlConfig(**fixed, request_delay_seconds=0.0)),
+        ("adaptive", CrawlConfig(**common, request_delay_seconds=args.delay,
+                                 min_request_delay_seconds=args.min_delay)),
+    ]
+
+
+async def run_once(site: StubSite, cfg: CrawlConfig) -> tuple[int, float]:
+    t0 = time.perf_counter()
+    pages = await crawl([site.base_url + "/"], site.domain, cfg)
+    return len(pages), time.perf_counter() - t0
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", type=int, default=150)
+    ap.add_argument("--latency", type=float, default=0.05, help="server latency per request (s)")
+    ap.add_argument("--capacity", type=int, default=2,
+                    help="fragile site: concurrent requests at full speed")
+    ap.add_argument("--concurrency", type=int, default=16, help="CrawlConfig.max_concurrent")
+    ap.add_argument("--delay", type=float, default=0.5,
+                    help="fixed delay / adaptive starting delay (s)")
+    ap.add_argument("--min-delay", type=float, default=0.01,
+                    help="CrawlConfig.min_request_delay_seconds")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    print(f"{args.pages} pages per site, {args.latency}s latency, "
+          f"max_concurrent {args.concurrency}")
+    print(f"{'site':>8} {'config':>10} {'pages':>6} {'seconds':>8} {'pages/sec':>10} "
+          f"{'requests':>9} {'429s':>6}")
+    for name, capacity in (("robust", 0), ("fragile", args.capacity)):
+        for label, cfg in configs(args):
+            with StubSite(pages=args.pages * 2, links_per_page=10, latency=args.latency,
+                          capacity=capacity) as site:
+                n, secs = asyncio.run(run_once(site, cfg))
+                print(f"{name:>8} {label:>10} {n:>6} {secs:>8.2f} {n / secs:>10.1f} "
+                      f"{site.requests:>9} {site.rejected:>6}")
+
+
+if __name__ == "__main__":
+    main()
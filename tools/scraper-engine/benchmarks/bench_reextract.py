@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Re-extraction from the response archive vs. re-crawling.
+
+Crawls --pages pages of the stub site (--latency per response, --delay
+between requests to the host, as politeness would have it) as a crawl job
+with the archive on, then re-extracts that job from its .warc.gz: in this
+process (map) and with a --workers process pool. The re-extracted pages and
+links are checked against the crawled ones; the archive's size and the cost
+of one random record read (mmap + inflate + parse) are reported too.
+
+    python benchmarks/bench_reextract.py --pages 2000 --latency 0.05 --workers 4
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from stub_site import StubSite
+
+from scraper_engine import async_storage, reextract, storage
+from scraper_engine.archive import ArchiveReader
+from scraper_engine.config import CrawlConfig
+from scraper_engine.worker import run_job
+
+_SELECT_PAGES = """SELECT url, title, meta_description, internal_count, external_count,
+    follow_count, nofollow_count FROM crawl_pages WHERE job_id = ? ORDER BY id"""
+_SELECT_LINKS = """SELECT p.url, u.url, l.anchor, l.rel_flags FROM links l
+    JOIN crawl_pages p ON p.id = l.source_page_id JOIN urls u ON u.id = l.target_url_id
+    WHERE l.job_id = ? ORDER BY l.id"""
+
+
+def snapshot(db: str, job_id: int) -> tuple[list, list]:
+    conn = sqlite3.connect(db)
+    try:
+        pages = conn.execute(_SELECT_PAGES, (job_id,)).fetchall()
+        return pages, conn.execute(_SELECT_LINKS, (job_id,)).fetchall()
+    finally:
+        conn.close()
+
+
+async def crawl_job(db: str, site: StubSite, cfg: CrawlConfig) -> int:
+    seeds = [site.base_url + "/p/0"]
+    job_id = await async_storage.create_job(db, site.domain, seeds, cfg.max_pages_per_domain)
+    await run_job(db, job_id, seeds, site.domain, cfg)
+    await async_storage.close_all()
+    return job_id
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", type=int, default=2000)
+    ap.add_argument("--links", type=int, default=40, help="links per page")
+    ap.add_argument("--latency", type=float, default=0.05)
+    ap.add_argument("--delay", type=float, default=0.0,
+                    help="politeness delay between requests to the host")
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "bench.db")
+        archive_dir = os.path.join(tmp, "archive")
+        storage.init_schema(db)
+        cfg = CrawlConfig(
+            max_pages_per_domain=args.pages,
+            max_concurrent=args.concurrency,
+            request_delay_seconds=args.delay,
+            adaptive_rate=False,
+            respect_robots=False,
+            use_sitemaps=False,
+            extract_mode="inline",
+            archive_dir=archive_dir,
+        )
+        stub = StubSite(pages=args.pages * 2, links_per_page=args.links, latency=args.latency)
+        with stub as site:
+            t0 = time.perf_counter()
+            job_id = asyncio.run(crawl_job(db, site, cfg))
+            crawl_s = time.perf_counter() - t0
+            body_mb = site.bytes_sent / 1e6
+        crawled = snapshot(db, job_id)
+        archive_mb = sum(
+            os.path.getsize(os.path.join(archive_dir, f)) for f in os.listdir(archive_dir)
+        ) / 1e6
+
+        locations = storage.job_archive(db, job_id)
+        reader = ArchiveReader(archive_dir)
+        sample = random.Random(1).sample(locations, min(500, len(locations)))
+        t0 = time.perf_counter()
+        for loc in sample:
+            reader.read(loc)
+        read_ms = (time.perf_counter() - t0) * 1000 / len(sample)
+        reader.close()
+
+        print(f"{len(crawled[0])} pages, {len(crawled[1])} links; bodies {body_mb:.1f} MB, "
+              f"archive {archive_mb:.1f} MB; random record read {read_ms:.2f} ms")
+        print(f"{'run':>26} {'seconds':>8} {'pages/s':>8} {'same pages+links':>17}")
+        print(f"{'crawl (network)':>26} {crawl_s:>8.2f} {len(crawled[0]) / crawl_s:>8.0f} {'':>17}")
+        reextract.open_archive(archive_dir)
+        runs = [
+            ("re-extract, 1 process", None),
+            (f"re-extract, {args.workers} workers", args.workers),
+        ]
+        for label, workers in runs:
+            t0 = time.perf_counter()
+            if workers is None:
+                reextract.reextract_job(db, job_id, map)
+            else:
+                pool = ProcessPoolExecutor(
+                    workers, initializer=reextract.open_archive, initargs=(archive_dir,)
+                )
+                with pool:
+                    reextract.reextract_job(db, job_id, pool.map)
+            secs = time.perf_counter() - t0
+            same = "yes" if snapshot(db, job_id) == crawled else "NO"
+            print(f"{label:>26} {secs:>8.2f} {len(crawled[0]) / secs:>8.0f} {same:>17}")
+        storage.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Steady-state re-crawls with the conditional-revalidation cache (http_cache).
+
+Crawls a stub site cold, then again with a fraction of pages changed: once
+with a server that sends ETags (304s), once with one that does not (body
+hash comparison only), and once without the cache for reference.
+
+    python benchmarks/bench_revalidate.py --pages 500 --changed 0.05
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import random
+import tempfile
+import time
+
+from stub_site import StubSite
+
+from scraper_engine import async_storage
+from scraper_engine.config import CrawlConfig
+from scraper_engine.crawler import crawl
+
+
+async def run_once(site: StubSite, db: str | None, max_pages: int) -> tuple[int, float, float, int]:
+    cfg = CrawlConfig(
+        max_pages_per_domain=max_pages,
+        max_concurrent=10,
+        request_delay_seconds=0,
+        respect_robots=False,
+        extract_mode="inline",
+    )
+    cache = async_storage.HttpCache(db, site.domain) if db else None
+    sent = site.bytes_sent
+    t0, c0 = time.perf_counter(), time.process_time()
+    pages = await crawl([site.base_url + "/"], site.domain, cfg, http_cache=cache)
+    return len(pages), time.perf_counter() - t0, time.process_time() - c0, site.bytes_sent - sent
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    rng = random.Random(1)
+    print(f"{args.pages} pages, {args.changed:.0%} changed between crawls "
+          "(client CPU includes the stub server)")
+    print(f"{'run':>22} {'pages':>6} {'wall s':>7} {'cpu s':>6} {'KB sent':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for validators in (True, False):
+            db = os.path.join(tmp, f"cache-{validators}.db")
+            with StubSite(pages=args.pages, links_per_page=args.links, latency=args.latency,
+                          validators=validators) as site:
+                label = "etag" if validators else "no validators"
+                runs = [(f"cold ({label})", db), (f"recrawl ({label})", db)]
+                if not validators:
+                    runs.append(("recrawl (no cache)", None))
+                for name, run_db in runs:
+                    n, wall, cpu, sent = await run_once(site, run_db, args.pages)
+                    print(f"{name:>22} {n:>6} {wall:>7.2f} {cpu:>6.2f} {sent / 1e3:>8.0f}")
+                    for p in rng.sample(range(args.pages), int(args.pages * args.changed)):
+                        site.revisions[p] = site.revisions.get(p, 0) + 1
+        await async_storage.close_all()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", type=int, default=500)
+    ap.add_argument("--links", type=int, default=50)
+    ap.add_argument("--latency", type=float, default=0.005)
+    ap.add_argument("--changed", type=float, default=0.05,
+                    help="fraction of pages changed per crawl")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
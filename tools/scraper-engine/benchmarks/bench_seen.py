@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Seen-set backends and the spilling frontier at million-URL scale.
+
+Memory is measured with tracemalloc (URL strings a backend keeps alive count
+against it); throughput is measured in a separate untraced pass.
+
+    python benchmarks/bench_seen.py --urls 1000000
+"""
+
+import argparse
+import asyncio
+import time
+import tracemalloc
+
+from scraper_engine.scheduler import HostScheduler
+from scraper_engine.seen import make_seen
+
+
+def urls(n: int, offset: int = 0):
+    for i in range(offset, offset + n):
+        yield f"https://shop{i % 100}.example.com/category/{i % 997}/item-{i}?ref={i * 7 % 9973}"
+
+
+def traced(build) -> tuple[object, int]:
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    used = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return obj, used
+
+
+def bench_seen(n: int) -> None:
+    print(f"seen sets, {n:,} URLs (~{len(next(urls(1)))} chars each)")
+    print(f"{'backend':>12} {'MB':>8} {'B/URL':>6} {'add/s':>10} {'hit/s':>10} {'miss/s':>10}")
+    for backend in ("exact", "fingerprint"):
+        def build():
+            s = make_seen(backend)
+            for u in urls(n):
+                s.add(u)
+            return s
+
+        _, used = traced(build)
+        t0 = time.perf_counter()
+        s = build()
+        add_s = time.perf_counter() - t0
+        probe = min(n, 200_000)
+        hits = list(urls(probe))
+        misses = list(urls(probe, offset=n))
+        t0 = time.perf_counter()
+        assert all(u in s for u in hits)
+        hit_s = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        false_pos = sum(u in s for u in misses)
+        miss_s = time.perf_counter() - t0
+        print(f"{backend:>12} {used / 1e6:>8.1f} {used / n:>6.1f} {n / add_s:>10,.0f} "
+              f"{probe / hit_s:>10,.0f} {probe / miss_s:>10,.0f}"
+              + (f"  ({false_pos} false positives)" if false_pos else ""))
+
+
+def bench_frontier(n: int, limit: int) -> None:
+    print(f"\nfrontier, {n:,} queued URLs over 100 hosts")
+    print(f"{'memory_limit':>12} {'MB':>8} {'B/URL':>6} {'put/s':>10} {'get/s':>10}")
+    for mem in (0, limit):
+        def build():
+            q = HostScheduler(default_delay=0.0, memory_limit=mem)
+            for u in urls(n):
+                q.put(u)
+            return q
+
+        q, used = traced(build)
+        q.close()
+        t0 = time.perf_counter()
+        q = build()
+        put_s = time.perf_counter() - t0
+
+        async def drain() -> int:
+            got = 0
+            while not q.empty():
+                await q.get()
+                q.task_done()
+                got += 1
+            return got
+
+        t0 = time.perf_counter()
+        got = asyncio.run(drain())
+        get_s = time.perf_counter() - t0
+        q.close()
+        assert got == n
+        print(f"{mem or 'none':>12} {used / 1e6:>8.1f} {used / n:>6.1f} "
+              f"{n / put_s:>10,.0f} {n / get_s:>10,.0f}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--urls", type=int, default=1_000_000)
+    ap.add_argument("--frontier-limit", type=int, default=10_000, help="HostScheduler memory_limit")
+    args = ap.parse_args()
+    bench_seen(args.urls)
+    bench_frontier(args.urls, args.frontier_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Sitemap seeding: full-site coverage, incremental re-crawls, parser memory.
+
+The stub site has --docs documents and a gzipped sitemap index listing all
+of them with their lastmod. Links reach them only through a paginated
+listing (10 per page, each listing page linking to the next), which leaves
+out --orphans% of them (retired from navigation but still published).
+
+1. First crawl with a budget of --docs pages: links only (which also has
+   to spend requests on the listing) vs. sitemap seeding.
+2. Re-crawl with the revalidation cache after --changed% of the documents
+   changed: links only (conditional GETs, 304s) vs. sitemap lastmod (no
+   request for unchanged documents).
+3. Peak memory parsing a --sitemap-urls sitemap: streaming SitemapParser
+   vs. ElementTree.fromstring on the whole file.
+
+    python benchmarks/bench_sitemap.py --docs 1000 --latency 0.02
+"""
+
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+from datetime import UTC, datetime
+
+from stub_site import StubSite
+
+from scraper_engine import storage
+from scraper_engine.async_storage import HttpCache, close_all
+from scraper_engine.config import CrawlConfig
+from scraper_engine.crawler import crawl
+from scraper_engine.sitemaps import SitemapParser
+
+PER_PAGE = 10
+NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+
+def urlset(urls: list[tuple[str, float]]) -> bytes:
+    rows = "".join(
+        f"<url><loc>{u}</loc><lastmod>{datetime.fromtimestamp(t, UTC).isoformat()}</lastmod></url>"
+        for u, t in urls
+    )
+    head = '<?xml version="1.0" encoding="UTF-8"?>'
+    return f'{head}<urlset xmlns="{NS}">{rows}</urlset>'.encode()
+
+
+class Site:
+    def __init__(self, docs: int, orphans: float):
+        self.docs = docs
+        step = round(100 / orphans) if orphans else 0
+        self.listed = [i for i in range(docs) if not step or i % step != step - 1]
+        self.base = ""
+        self.lastmod = {i: time.time() - 86400 for i in range(docs)}
+        self.rev = {i: 0 for i in range(docs)}
+
+    def change(self, ids) -> None:
+        for i in ids:
+            self.rev[i] += 1
+            self.lastmod[i] = time.time() + 1
+
+    def render(self, path: str):
+        if path == "/":
+            return '<html><body><a href="/list/1">docs</a></body></html>'
+        if path.startswith("/list/"):
+            k = int(path.rsplit("/", 1)[1])
+            links = [f"/doc/{i}" for i in self.listed[(k - 1) * PER_PAGE: k * PER_PAGE]]
+            if k * PER_PAGE < len(self.listed):
+                links.append(f"/list/{k + 1}")
+            anchors = "".join(f'<a href="{h}">x</a>' for h in links)
+            return f"<html><body>{anchors}</body></html>"
+        if path.startswith("/doc/"):
+            i = int(path.rsplit("/", 1)[1])
+            if i >= self.docs:
+                return None
+            heading = f"<h1>Doc {i} rev {self.rev[i]}</h1>"
+            return f'<html><body>{heading}<a href="/">home</a></body></html>'
+        if path == "/sitemap.xml":
+            parts = "".join(
+                f"<sitemap><loc>{self.base}/sitemap-{n}.xml.gz</loc></sitemap>" for n in (0, 1)
+            )
+            return "application/xml", f'<sitemapindex xmlns="{NS}">{parts}</sitemapindex>'.encode()
+        if path.startswith("/sitemap-"):
+            n = int(path.split("-")[1].split(".")[0])
+            ids = range(n, self.docs, 2)
+            entries = [(f"{self.base}/doc/{i}", self.lastmod[i]) for i in ids]
+            return "application/gzip", gzip.compress(urlset(entries))
+        return None
+
+
+async def run(
+    site: StubSite, budget: int, use_sitemaps: bool, cache: HttpCache
+) -> tuple[int, float]:
+    cfg = CrawlConfig(
+        max_pages_per_domain=budget,
+        max_concurrent=8,
+        request_delay_seconds=0.0,
+        extract_mode="inline",
+        use_sitemaps=use_sitemaps,
+    )
+    t0 = time.perf_counter()
+    pages = await crawl([site.base_url + "/"], site.domain, cfg, http_cache=cache)
+    return sum("/doc/" in p["url"] for p in pages), time.perf_counter() - t0
+
+
+def crawls(args) -> None:
+    print(f"{'crawl':>22} {'docs':>6} {'requests':>9} {'seconds':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for use_sitemaps in (False, True):
+            label = "sitemap" if use_sitemaps else "links only"
+            db = os.path.join(tmp, f"{label}.db")
+            storage.init_schema(db)
+            synth = Site(args.docs, args.orphans)
+            with StubSite(render=synth.render, latency=args.latency, validators=True) as site:
+                synth.base = site.base_url
+
+                async def both() -> None:
+                    cache = HttpCache(db, site.domain)
+                    before = site.requests
+                    docs, secs = await run(site, args.docs, use_sitemaps, cache)
+                    requests = site.requests - before
+                    print(f"{'first, ' + label:>22} {docs:>6} {requests:>9} {secs:>8.2f}")
+                    synth.change(range(0, args.docs, max(1, round(100 / args.changed))))
+                    before = site.requests
+                    docs, secs = await run(site, args.docs, use_sitemaps, cache)
+                    requests = site.requests - before
+                    print(f"{'re-crawl, ' + label:>22} {docs:>6} {requests:>9} {secs:>8.2f}")
+                    await close_all()
+
+                asyncio.run(both())
+
+
+def parse_memory(n: int) -> None:
+    data = urlset([(f"https://www.example.com/products/item-{i}", 1.7e9 + i) for i in range(n)])
+    tracemalloc.start()
+    parser = SitemapParser()
+    count = 0
+    for i in range(0, len(data), 64 * 1024):
+        count += len(parser.feed(data[i:i + 64 * 1024]))
+    count += len(parser.close())
+    streaming = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    tracemalloc.start()
+    root = ET.fromstring(data)
+    whole = tracemalloc.get_traced_memory()[1]
+    assert len(root) == count == n
+    del root
+    tracemalloc.stop()
+    print(f"\n{n:,}-URL sitemap ({len(data) / 1e6:.1f} MB XML): "
+          f"peak {streaming / 1e6:.1f} MB streaming, "
+          f"{whole / 1e6:.1f} MB ElementTree.fromstring (plus the file itself)")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--docs", type=int, default=1000)
+    ap.add_argument("--latency", type=float, default=0.02)
+    ap.add_argument("--orphans", type=float, default=10.0,
+                    help="percent of documents not linked from the listing")
+    ap.add_argument("--changed", type=float, default=5.0,
+                    help="percent of documents changed before the re-crawl")
+    ap.add_argument("--sitemap-urls", type=int, default=50_000)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+    crawls(args)
+    parse_memory(args.sitemap_urls)
+
+
+if __name__ == "__main__":
+    main()
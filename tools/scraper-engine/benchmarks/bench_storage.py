@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+SQLite storage: storing large crawls, and /report read latency during a write.
+
+Compares the pooled WAL storage layer (normalized links table, batched
+executemany) against the original pattern: new connection + schema script
+per call, one INSERT per page with a links_json blob, rollback journal.
+
+    python benchmarks/bench_storage.py --pages 5000 --links 40
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import statistics
+import tempfile
+import threading
+import time
+
+from scraper_engine import storage
+
+
+def make_pages(n: int, links: int) -> list[dict]:
+    return [
+        {
+            "url": f"https://example.com/p/{i}",
+            "domain": "example.com",
+            "title": f"Page {i}",
+            "meta_description": "synthetic",
+            "internal_count": links - 2,
+            "external_count": 2,
+            "follow_count": links - 1,
+            "nofollow_count": 1,
+            "links": [
+                {
+                    "href": f"https://example.com/p/{(i * 7 + j) % n}",
+                    "anchor": f"link {j}",
+                    "rel": "",
+                    "is_internal": True,
+                    "is_nofollow": False,
+                }
+                for j in range(links)
+            ],
+        }
+        for i in range(n)
+    ]
+
+
+def naive_store(db_path: str, job_id: int, pages: list[dict], metrics: dict) -> None:
+    """The original implementation: connect per call, execute per page."""
+    conn = sqlite3.connect(db_path)
+    conn.executescript(storage._SCHEMA_V1)
+    conn.commit()
+    for p in pages:
+        conn.execute(
+            """INSERT INTO crawl_pages
+               (job_id, url, domain, title, meta_description,
+                internal_count, external_count, follow_count, nofollow_count, links_json)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            storage._page_row(job_id, p) + (json.dumps(p.get("links", [])),),
+        )
+    conn.execute(
+        """INSERT OR REPLACE INTO crawl_metrics
+           (job_id, target_domain, referring_domains, total_backlinks,
+            follow_pct, estimated_da, metrics_json, updated_at)
+           VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))""",
+        (job_id, "example.com", 0, 0, 0, 0, json.dumps(metrics)),
+    )
+    conn.execute("UPDATE crawl_jobs SET status = 'completed' WHERE id = ?", (job_id,))
+    conn.commit()
+    conn.close()
+
+
+def naive_report(db_path: str) -> None:
+    conn = sqlite3.connect(db_path)
+    conn.executescript(storage._SCHEMA_V1)
+    conn.execute(
+        """SELECT metrics_json, updated_at FROM crawl_metrics m
+           JOIN crawl_jobs j ON j.id = m.job_id
+           WHERE m.target_domain = ? AND j.status = 'completed'
+           ORDER BY m.updated_at DESC LIMIT 1""",
+        ("example.com",),
+    ).fetchone()
+    conn.close()
+
+
+def reads_during_write(write, read) -> tuple[float, list[float]]:
+    """Run write() in a thread while read() loops; return write seconds and read latencies."""
+    latencies: list[float] = []
+    done = threading.Event()
+
+    def reader() -> None:
+        while not done.is_set():
+            t = time.perf_counter()
+            read()
+            latencies.append(time.perf_counter() - t)
+
+    th = threading.Thread(target=reader)
+    th.start()
+    t0 = time.perf_counter()
+    write()
+    secs = time.perf_counter() - t0
+    done.set()
+    th.join()
+    return secs, latencies
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--pages", type=int, default=5000)
+    ap.add_argument("--links", type=int, default=40)
+    args = ap.parse_args()
+    pages = make_pages(args.pages, args.links)
+    metrics = {"referring_domains": 3, "total_backlinks": 10, "backlinks": []}
+
+    print(f"{args.pages} pages x {args.links} links")
+    print(f"{'layer':>8} {'store s':>8} {'w/ reads s':>10} {'reads':>6} {'read p50 ms':>12} "
+          f"{'read p99 ms':>12} {'read max ms':>12} {'db MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for layer in ("naive", "pooled"):
+            db = os.path.join(tmp, f"{layer}.db")
+            if layer == "naive":
+                conn = sqlite3.connect(db)
+                conn.executescript(storage._SCHEMA_V1)
+                seed_job, solo_job, job_id = (
+                    conn.execute(
+                        "INSERT INTO crawl_jobs (target_domain, seed_urls) "
+                        "VALUES ('example.com', '[]')"
+                    ).lastrowid
+                    for _ in range(3)
+                )
+                conn.commit()
+                conn.close()
+                # a completed job so /report has something to return
+                naive_store(db, seed_job, pages[:10], metrics)
+
+                def write(job=job_id):
+                    naive_store(db, job, pages, metrics)
+
+                def read():
+                    naive_report(db)
+            else:
+                storage.init_schema(db)
+                seed_job = storage.create_job(db, "example.com", ["https://example.com/"])
+                storage.store_crawl(db, seed_job, "example.com", pages[:10], metrics)
+                solo_job = storage.create_job(db, "example.com", ["https://example.com/"])
+                job_id = storage.create_job(db, "example.com", ["https://example.com/"])
+
+                def write(job=job_id):
+                    storage.store_crawl(db, job, "example.com", pages, metrics)
+
+                def read():
+                    storage.get_report(db, "example.com")
+
+            t0 = time.perf_counter()
+            write(solo_job)
+            solo = time.perf_counter() - t0
+            secs, lat = reads_during_write(write, read)
+            lat_ms = sorted(x * 1000 for x in lat) or [0.0]
+            p99 = lat_ms[min(len(lat_ms) - 1, int(len(lat_ms) * 0.99))]
+            print(f"{layer:>8} {solo:>8.2f} {secs:>10.2f} {len(lat_ms):>6} "
+                  f"{statistics.median(lat_ms):>12.2f} {p99:>12.2f} {lat_ms[-1]:>12.2f} "
+                  f"{os.path.getsize(db) / 1e6:>8.1f}")
+            storage.close_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Connection reuse across crawl jobs: one HTTP client per crawl vs. the shared
+transport client, against a local HTTPS stub site.
+
+Counts TCP connects and TLS handshakes from httpx trace events. The stub
+server speaks HTTP/1.1 only, so this measures keep-alive and cross-job
+reuse, not HTTP/2 multiplexing.
+
+    python benchmarks/bench_transport.py --jobs 5 --pages 100
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from stub_site import StubSite, make_cert
+
+from scraper_engine.config import CrawlConfig
+from scraper_engine.crawler import crawl
+from scraper_engine.transport import close_clients, transport_stats
+
+
+async def run(site: StubSite, jobs: int, pages: int, shared: bool) -> tuple[float, dict]:
+    cfg = CrawlConfig(
+        max_pages_per_domain=pages,
+        max_concurrent=5,
+        request_delay_seconds=0,
+        extract_mode="inline",
+    )
+    before = transport_stats()
+    t0 = time.perf_counter()
+    for _ in range(jobs):
+        await crawl([site.base_url + "/"], site.domain, cfg)
+        if not shared:
+            await close_clients()  # what a client created (and closed) per crawl costs
+    secs = time.perf_counter() - t0
+    await close_clients()
+    return secs, transport_stats().since(before).as_dict()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--jobs", type=int, default=5)
+    ap.add_argument("--pages", type=int, default=100)
+    ap.add_argument("--latency", type=float, default=0.01)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cert, key = make_cert(tmp)
+        os.environ["SSL_CERT_FILE"] = cert
+        site = StubSite(pages=args.pages, links_per_page=10, latency=args.latency, tls=(cert, key))
+        with site:
+            print(f"{args.jobs} crawl jobs x {args.pages} pages over HTTPS")
+            print(f"{'client':>10} {'seconds':>8} {'requests':>9} {'connects':>9} "
+                  f"{'TLS':>5} {'reused':>7}")
+            for shared in (False, True):
+                secs, st = asyncio.run(run(site, args.jobs, args.pages, shared))
+                name = "shared" if shared else "per crawl"
+                print(f"{name:>10} {secs:>8.2f} {st['requests']:>9} {st['connections']:>9} "
+                      f"{st['tls_handshakes']:>5} {st['reused']:>7}")
+
+
+if __name__ == "__main__":
+    main()
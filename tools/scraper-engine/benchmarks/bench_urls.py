@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+URL handling per link: extraction, crawl-frontier filtering and graph building
+for one page with many links.
+
+"legacy" re-implements the previous pipeline, where each stage parsed the href
+again (urljoin + urlparse in extraction, two more urlparse calls in the crawl
+loop, two per link in the graph). "shared" is the current one: the link is
+parsed once in extraction and later stages read its domain / normalized form.
+
+    python benchmarks/bench_urls.py --links 5000
+"""
+
+import argparse
+import time
+from urllib.parse import urljoin, urlparse
+
+from scraper_engine.extractor import _build_page, _make_link, _target_matcher, page_to_dict
+from scraper_engine.graph import MetricsAccumulator
+from scraper_engine.urls import DomainMatcher
+
+PAGE_URL = "https://www.example.com/dir/page.html"
+TARGET = "example.com"
+
+
+def make_anchors(n: int) -> list[tuple[str, str, list[str]]]:
+    out = []
+    for i in range(n):
+        kind = i % 10
+        if kind < 6:
+            href = f"/p/{i}/?ref=nav"
+        elif kind < 8:
+            href = f"https://www.example.com/p/{i}/"
+        elif kind == 8:
+            href = f"https://blog.example.com/post-{i}"
+        else:
+            href = f"https://site{i % 50}.example.org/out/{i}"
+        out.append((href, f"link {i}", ["nofollow"] if i % 7 == 0 else []))
+    return out
+
+
+# --- previous implementation ---------------------------------------------------
+
+def _legacy_domain(url: str) -> str:
+    d = (urlparse(url).netloc or "").lower().strip()
+    return d[4:] if d.startswith("www.") else d
+
+
+def legacy_extract(anchors, target_d: str) -> list[dict]:
+    links = []
+    for href, text, rel in anchors:
+        href = href.strip()
+        abs_href = urljoin(PAGE_URL, href)
+        if urlparse(abs_href).scheme not in ("http", "https"):
+            continue
+        host = _legacy_domain(abs_href)
+        links.append({
+            "href": abs_href,
+            "anchor": text.strip()[:500],
+            "rel": " ".join(rel),
+            "is_internal": host == target_d or host.endswith("." + target_d),
+            "is_nofollow": "nofollow" in rel,
+        })
+    return links
+
+
+def legacy_enqueue(links: list[dict], seen: set[str]) -> int:
+    added = 0
+    base = TARGET
+    for L in links:
+        host = _legacy_domain(L["href"])
+        if not (host == base or host.endswith("." + base) or base.endswith("." + host)):
+            continue
+        p = urlparse(urljoin(PAGE_URL, L["href"]))
+        path = p.path.rstrip("/") if p.path and p.path != "/" else p.path
+        u = f"{p.scheme}://{p.netloc}{path}{'?' + p.query if p.query else ''}"
+        if u not in seen:
+            seen.add(u)
+            added += 1
+    return added
+
+
+def legacy_graph(page: dict) -> int:
+    target = _legacy_domain("https://" + TARGET)
+    src_domain = _legacy_domain(page["url"])
+    backlinks = 0
+    for L in page["links"]:
+        if _legacy_domain(L["href"]) == target and src_domain != target:
+            backlinks += 1
+    return backlinks
+
+
+# --- current implementation ----------------------------------------------------
+
+def shared_extract(anchors) -> list[dict]:
+    is_target = _target_matcher(TARGET, "example.com")
+    links = [L for L in (_make_link(PAGE_URL, h, t, r, is_target) for h, t, r in anchors) if L]
+    return page_to_dict(_build_page(PAGE_URL, "example.com", "", "", None, links, []))["links"]
+
+
+def shared_enqueue(links: list[dict], seen: set[str]) -> int:
+    in_scope = DomainMatcher(TARGET)
+    added = 0
+    for L in links:
+        if not in_scope.related(L["domain"]):
+            continue
+        u = L["normalized"]
+        if u not in seen:
+            seen.add(u)
+            added += 1
+    return added
+
+
+def shared_graph(page: dict) -> int:
+    acc = MetricsAccumulator(TARGET, keep_backlinks=False)
+    acc.add(page)
+    return acc.total_backlinks
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--links", type=int, default=5000)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+    anchors = make_anchors(args.links)
+
+    old_links = legacy_extract(anchors, TARGET)
+    new_links = shared_extract(anchors)
+    assert [L["href"] for L in old_links] == [L["href"] for L in new_links]
+    assert legacy_enqueue(old_links, set()) == shared_enqueue(new_links, set())
+    referrer = "https://www.referrer.example.net/post"
+    old_page = {"url": referrer, "links": old_links}
+    new_page = {"url": referrer, "domain": "referrer.example.net", "links": new_links}
+    assert legacy_graph(old_page) == shared_graph(new_page)
+
+    stages = {
+        "extract": (lambda: legacy_extract(anchors, TARGET), lambda: shared_extract(anchors)),
+        "enqueue": (
+            lambda: legacy_enqueue(old_links, set()),
+            lambda: shared_enqueue(new_links, set()),
+        ),
+        "graph": (lambda: legacy_graph(old_page), lambda: shared_graph(new_page)),
+    }
+    print(f"one page, {args.links} links (best of {args.repeat})")
+    print(f"{'stage':>8} {'legacy ms':>10} {'shared ms':>10} {'speedup':>8}")
+    total_old = total_new = 0.0
+    for name, (old, new) in stages.items():
+        a, b = best_of(old, args.repeat), best_of(new, args.repeat)
+        total_old += a
+        total_new += b
+        print(f"{name:>8} {a * 1000:>10.2f} {b * 1000:>10.2f} {a / b:>7.1f}x")
+    print(f"{'total':>8} {total_old * 1000:>10.2f} {total_new * 1000:>10.2f} "
+          f"{total_old / total_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""Local stub HTTP server serving a synthetic site for crawler benchmarks."""
+
+import os
+import random
+import ssl
+import subprocess
+import threading
+import time
+import zlib
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def page_html(n: int, pages: int, links_per_page: int, seed: int = 0) -> str:
+    """Deterministic page /p/<n> linking to other pages and a few external hosts."""
+    rng = random.Random(seed * 1_000_003 + n)
+    targets = [rng.randrange(pages) for _ in range(links_per_page)]
+    anchors = "\n".join(f'<li><a href="/p/{t}">Page {t}</a></li>' for t in targets)
+    return f"""<!doctype html>
+<html><head>
+<title>Stub page {n}</title>
+<meta name="description" content="Synthetic page {n} for crawler benchmarks">
+<link rel="canonical" href="/p/{n}">
+</head><body>
+<h1>Page {n}</h1>
+<ul>{anchors}</ul>
+<p>Outbound: <a href="https://example.org/ref/{n}" rel="nofollow">ref</a>
+<a href="https://blog.example.net/{n}">blog</a></p>
+</body></html>"""
+
+
+def make_cert(directory: str) -> tuple[str, str]:
+    """Self-signed cert for 127.0.0.1 (needs the openssl CLI). Trust it via SSL_CERT_FILE."""
+    cert, key = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+    subprocess.run(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-addext", "subjectAltName=IP:127.0.0.1",
+         "-keyout", key, "-out", cert],
+        check=True, capture_output=True,
+    )
+    return cert, key
+
+
+class StubSite:
+    """
+    Threaded HTTP server; each response is delayed by `latency` seconds.
+
+    With capacity > 0 the site is fragile: beyond `capacity` concurrent
+    requests the latency grows in proportion (they share the server), and
+    beyond twice that requests are refused with 429 and Retry-After.
+
+    With render, every path but /robots.txt is served as render(path)
+    instead of the /p/<n> pages: HTML text, (content_type, body bytes) or
+    None for a 404; with validators, ETags are body hashes.
+    """
+
+    def __init__(
+        self,
+        pages: int = 500,
+        links_per_page: int = 10,
+        latency: float = 0.02,
+        validators: bool = False,
+        tls: tuple[str, str] | None = None,
+        capacity: int = 0,
+        retry_after: int = 1,
+        render: Callable[[str], str | tuple[str, bytes] | None] | None = None,
+    ):
+        self.pages = pages
+        self.links_per_page = links_per_page
+        self.latency = latency
+        self.validators = validators  # send ETags and answer If-None-Match with 304
+        self.revisions: dict[int, int] = {}  # page -> revision; bump to change its content
+        self.render = render
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.requests = 0
+        self.rejected = 0
+        self.bytes_sent = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):  # noqa: N802
+                with site._lock:
+                    site.requests += 1
+                    site._active += 1
+                    active = site._active
+                try:
+                    if site.capacity and active > 2 * site.capacity:
+                        site.rejected += 1
+                        self.send_response(429)
+                        self.send_header("Retry-After", str(site.retry_after))
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+                    load = max(1.0, active / site.capacity) if site.capacity else 1.0
+                    time.sleep(site.latency * load)
+                    self._respond()
+                finally:
+                    with site._lock:
+                        site._active -= 1
+
+            def _respond(self):
+                etag = None
+                if self.path == "/robots.txt":
+                    body, status = b"User-agent: *\nAllow: /\n", 200
+                    ctype = "text/plain"
+                elif site.render is not None:
+                    out = site.render(self.path)
+                    if out is None:
+                        body, status, ctype = b"not found", 404, "text/plain"
+                    elif isinstance(out, tuple):
+                        (ctype, body), status = out, 200
+                    else:
+                        body, status, ctype = out.encode(), 200, "text/html; charset=utf-8"
+                    if status == 200 and site.validators:
+                        etag = f'"{zlib.crc32(body):08x}"'
+                        if self.headers.get("If-None-Match") == etag:
+                            self.send_response(304)
+                            self.send_header("ETag", etag)
+                            self.end_headers()
+                            return
+                elif self.path == "/" or self.path.startswith("/p/"):
+                    try:
+                        n = int(self.path.rsplit("/", 1)[-1] or 0)
+                    except ValueError:
+                        n = 0
+                    n %= site.pages
+                    rev = site.revisions.get(n, 0)
+                    if site.validators:
+                        etag = f'"p{n}-r{rev}"'
+                        if self.headers.get("If-None-Match") == etag:
+                            self.send_response(304)
+                            self.send_header("ETag", etag)
+                            self.end_headers()
+                            return
+                    body = page_html(n, site.pages, site.links_per_page, seed=rev).encode()
+                    status, ctype = 200, "text/html; charset=utf-8"
+                else:
+                    body, status, ctype = b"not found", 404, "text/plain"
+                self.send_response(status)
+                self.send_header("Content-Type", ctype)
+                self.send_header("Content-Length", str(len(body)))
+                if status == 200 and etag is not None:
+                    self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+                site.bytes_sent += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.scheme = "http"
+        if tls:
+            # (certfile, keyfile); see make_cert()
+            ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            ctx.load_cert_chain(*tls)
+            self.server.socket = ctx.wrap_socket(self.server.socket, server_side=True)
+            self.scheme = "https"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"{self.scheme}://{host}:{port}"
+
+    @property
+    def domain(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"{host}:{port}"
+
+    def __enter__(self) -> "StubSite":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+"""Re-extract archived crawl jobs offline (see scraper_engine.reextract)."""
+
+from scraper_engine.reextract import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+#!/usr/bin/env python3
+"""Run a crawl job worker (claims queued jobs from the DB; see scraper_engine.worker)."""
+
+from scraper_engine.worker import main
+
+if __name__ == "__main__":
+    main()
@@ -1,21 +1,28 @@
 """FastAPI app for crawl jobs and report retrieval."""
 
+import asyncio
+import copy
 import logging
+import math
+import time
 from contextlib import asynccontextmanager
+from datetime import UTC, datetime
 
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException
 from pydantic import BaseModel
 
-from .config import CrawlConfig, get_db_path
+from . import async_storage
+from .authority import Authority
+from .cache import SingleFlight, TTLCache
+from .config import AnalyzeCacheConfig, CrawlConfig, WorkerConfig
 from .crawler import crawl
-from .graph import build_graph_and_metrics
-from .storage import (
-    create_job,
-    store_crawl,
-    get_report,
-    init_schema,
-    get_db,
-)
+from .executor import shutdown_executors
+from .graph import MetricsAccumulator
+from .linkgraph import LinkGraph
+from .robots import set_robots_store
+from .storage import close_all, get_db, init_schema, sync_link_graph, unmerged_jobs
+from .transport import close_clients, transport_stats
+from .worker import Worker
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -35,13 +42,50 @@ class IngestReferrersRequest(BaseModel):
 class OffPageAnalyzeRequest(BaseModel):
     url: str  # Starting URL (typically homepage)
     domain: str | None = None  # Target domain for whole-site crawl
+    max_staleness: float | None = None  # seconds; 0 forces a fresh crawl
+
+
+_analyze_cfg = AnalyzeCacheConfig()
+_analyze_cache = TTLCache(_analyze_cfg.ttl_seconds, _analyze_cfg.max_entries)
+_analyze_flight = SingleFlight()
+
+
+_worker: Worker | None = None
+
+# All completed crawls merged into one graph; each refresh merges only new jobs
+# into a copy and swaps it in, so reports never see a half-merged graph.
+_link_graph = LinkGraph()
+_link_graph_lock = asyncio.Lock()
+_link_graph_synced = -math.inf  # time.monotonic() of the last refresh
+_authority = Authority()
+_refresh_task: asyncio.Task | None = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_schema(get_db())
+    global _worker
+    db = get_db()
+    init_schema(db)
+    set_robots_store(async_storage.RobotsStore(db))
+    worker_task = None
+    wcfg = WorkerConfig()
+    if wcfg.embedded:
+        # Single-process deployments: crawl jobs run in the API process. Set
+        # SCRAPER_ENGINE_EMBEDDED_WORKER=0 and start run_worker.py processes instead.
+        _worker = Worker(db, wcfg)
+        worker_task = asyncio.create_task(_worker.run())
     yield
     # shutdown
+    if worker_task is not None:
+        _worker.stop()
+        await asyncio.gather(worker_task, return_exceptions=True)
+        _worker = None
+    if _refresh_task is not None:
+        await asyncio.gather(_refresh_task, return_exceptions=True)
+    shutdown_executors()
+    await close_clients()
+    await async_storage.close_all()
+    close_all()
 
 
 app = FastAPI(
@@ -53,34 +97,125 @@ app = FastAPI(
 
 
 @app.post("/crawl")
-async def post_crawl(req: CrawlRequest, background_tasks: BackgroundTasks):
-    """Enqueue a crawl job. Returns job_id. Runs crawl in background."""
+async def post_crawl(req: CrawlRequest):
+    """Enqueue a crawl job. Returns job_id. A worker claims and runs it."""
     if not req.seed_urls or not req.target_domain.strip():
         raise HTTPException(400, "seed_urls and target_domain required")
     db = get_db()
-    job_id = create_job(db, req.target_domain.strip(), req.seed_urls)
-    cfg = CrawlConfig(max_pages_per_domain=min(5000, max(1, req.max_pages)))
-
-    async def run():
-        try:
-            pages = await crawl(req.seed_urls, req.target_domain.strip(), cfg)
-            metrics = build_graph_and_metrics(pages, req.target_domain.strip())
-            store_crawl(db, job_id, req.target_domain.strip(), pages, metrics)
-            logger.info("crawl job %s done: %s pages, %s referring domains",
-                        job_id, len(pages), metrics.get("referring_domains"))
-        except Exception as e:
-            logger.exception("crawl job %s failed: %s", job_id, e)
-
-    background_tasks.add_task(run)
+    target = req.target_domain.strip()
+    job_id = await async_storage.create_job(db, target, req.seed_urls, max_pages=req.max_pages)
+    if _worker is not None:
+        _worker.wake()
     return {"job_id": job_id, "status": "queued", "target_domain": req.target_domain}
 
 
+@app.get("/crawl/{job_id}")
+async def get_crawl_job(job_id: int):
+    """Job status and progress (pages_done as of the last checkpoint)."""
+    job = await async_storage.get_job(get_db(), job_id)
+    if job is None:
+        raise HTTPException(404, f"No crawl job: {job_id}")
+    return job
+
+
+@app.post("/crawl/{job_id}/resume")
+async def resume_crawl_job(job_id: int):
+    """Queue a failed crawl job again; it continues from its last checkpoint."""
+    db = get_db()
+    job = await async_storage.get_job(db, job_id)
+    if job is None:
+        raise HTTPException(404, f"No crawl job: {job_id}")
+    if not await async_storage.requeue_job(db, job_id):
+        raise HTTPException(409, f"Crawl job {job_id} is {job['status']}, not failed")
+    if _worker is not None:
+        _worker.wake()
+    return {"job_id": job_id, "status": "queued", "pages_done": job["pages_done"] or 0}
+
+
+def _refresh_link_graph(graph: LinkGraph, authority: Authority) -> tuple[LinkGraph, Authority]:
+    """
+    Merge newly completed jobs into a copy of graph and re-run PageRank on it
+    (blocking); graph and authority come back as they are if nothing changed.
+    """
+    db = get_db()
+    if not unmerged_jobs(db, graph) and authority.version == graph.version:
+        return graph, authority
+    graph, authority = copy.deepcopy((graph, authority))
+    merged = sync_link_graph(db, graph)
+    if merged:
+        logger.info("Link graph: merged %d jobs (%d pages, %d edges)",
+                    merged, graph.pages, graph.edges)
+    authority.update(graph)
+    return graph, authority
+
+
+async def _refresh() -> None:
+    """Refresh off the event loop and swap the result in; on error keep the old scores."""
+    global _link_graph, _authority, _link_graph_synced
+    try:
+        # Merging and PageRank are CPU-bound; keep them off the event loop.
+        graph, authority = await asyncio.to_thread(_refresh_link_graph, _link_graph, _authority)
+    except Exception:
+        logger.exception("Link graph refresh failed; serving the previous scores")
+    else:
+        async with _link_graph_lock:
+            _link_graph, _authority = graph, authority
+    finally:
+        _link_graph_synced = time.monotonic()
+
+
+async def _sync_authority() -> None:
+    """
+    Start a background refresh of the link graph and PageRank if the last one
+    is older than AuthorityConfig.refresh_seconds; at most one runs at a time.
+    Requests keep serving the previous scores meanwhile. Before the first
+    refresh there are none, so only then do they wait for it. Callers must
+    not hold _link_graph_lock (the refresh takes it to swap).
+    """
+    global _refresh_task
+    if _refresh_task is None or _refresh_task.done():
+        if time.monotonic() - _link_graph_synced < _authority.config.refresh_seconds:
+            return
+        _refresh_task = asyncio.create_task(_refresh())
+    if _link_graph_synced == -math.inf:
+        await asyncio.shield(_refresh_task)
+
+
+def _with_authority(report: dict, domain: str) -> dict:
+    """Add the PageRank authority block; estimated_da becomes its 0-100 score."""
+    authority = _authority.report(_link_graph, domain)
+    if authority is not None:
+        report["authority"] = authority
+        report["estimated_da"] = authority["score"]
+    return report
+
+
 @app.get("/report/{domain}")
 async def get_report_by_domain(domain: str):
     """Return latest metrics for domain (from your own crawls)."""
-    report = get_report(get_db(), domain.strip())
+    domain = domain.strip()
+    report = await async_storage.get_report(get_db(), domain)
     if not report:
         raise HTTPException(404, f"No completed crawl for domain: {domain}")
+    await _sync_authority()
+    async with _link_graph_lock:
+        return _with_authority(report, domain)
+
+
+@app.get("/report/{domain}/aggregate")
+async def get_aggregate_report(domain: str, backlinks: int = 100):
+    """Metrics for domain across every completed crawl (latest crawl of each page wins)."""
+    domain = domain.strip()
+    await _sync_authority()
+    async with _link_graph_lock:
+        report = _with_authority(_link_graph.metrics(domain, backlinks=max(0, backlinks)), domain)
+        report["referring_sites"] = [
+            {"site": site, "links": links, "follow": follow}
+            for site, links, follow in _link_graph.referring_sites(domain)
+        ]
+        jobs = report["jobs"] = len(_link_graph.jobs)
+    if not report["total_backlinks"] and not jobs:
+        raise HTTPException(404, f"No completed crawl for domain: {domain}")
     return report
 
 
@@ -94,12 +229,46 @@ async def ingest_referrers(req: IngestReferrersRequest):
     return {"ok": True, "domain": req.domain, "urls_count": len(req.urls)}
 
 
+async def _stored_metrics(domain: str, max_age: float) -> tuple[dict, float] | None:
+    """Latest completed /crawl metrics for domain if at most max_age seconds old."""
+    report = await async_storage.get_report(get_db(), domain)
+    if not report:
+        return None
+    updated = datetime.fromisoformat(report.pop("updated_at")).replace(tzinfo=UTC)
+    age = max(0.0, (datetime.now(UTC) - updated).total_seconds())
+    return (report, age) if age <= max_age else None
+
+
+async def _crawl_metrics(seed_urls: list[str], domain: str) -> dict:
+    # Increase max pages for whole-site crawl (was 200, now 500 for comprehensive analysis)
+    cfg = CrawlConfig(max_pages_per_domain=500)
+    # Crawl entire site - crawler follows all internal links; metrics are
+    # accumulated per page instead of holding every page until the end.
+    acc = MetricsAccumulator(domain)
+
+    async def on_page(page: dict) -> None:
+        acc.add(page)
+
+    # Re-analysing a domain revalidates pages from the previous crawl (ETag / Last-Modified).
+    await crawl(seed_urls, domain, cfg, on_page=on_page,
+                http_cache=async_storage.HttpCache(get_db(), domain))
+    metrics = acc.result()
+    logger.info("Whole-site crawl completed: %s pages, %s referring domains, %s backlinks",
+                acc.pages, metrics.get("referring_domains", 0), metrics.get("total_backlinks", 0))
+    _analyze_cache.put(domain, metrics)
+    return metrics
+
+
 @app.post("/off-page-analyze")
 async def off_page_analyze(req: OffPageAnalyzeRequest):
     """
     Sync Off-Page analysis: crawl entire site starting from URL, build link graph,
     return metrics. No third-party APIs. Used when user clicks Link Signals tab.
     Crawls the whole site (not just single URL) to discover all backlinks.
+
+    Results up to max_staleness seconds old (default: the cache TTL) are served
+    from the in-memory cache or from the latest completed /crawl of the domain;
+    concurrent requests for the same domain share one crawl.
     """
     if not req.url.strip():
         raise HTTPException(400, "url required")
@@ -111,24 +280,37 @@ async def off_page_analyze(req: OffPageAnalyzeRequest):
         except Exception:
             raise HTTPException(400, "domain required or provide valid url")
     domain = domain.lower().replace("www.", "")
-    
+    if not domain:
+        raise HTTPException(400, "domain required or provide valid url")
+    max_age = _analyze_cache.ttl_seconds
+    if req.max_staleness is not None:
+        max_age = max(0.0, req.max_staleness)
+
+    hit = _analyze_cache.get(domain, max_age)
+    if hit:
+        return await _analyze_response(domain, *hit, source="cache")
+    if max_age > 0 and not _analyze_flight.in_flight(domain):
+        stored = await _stored_metrics(domain, max_age)
+        if stored:
+            _analyze_cache.put(domain, *stored)
+            return await _analyze_response(domain, *stored, source="stored")
+
     # Use homepage as seed URL for whole-site crawl
     # The crawler will follow all internal links to crawl the entire site
     seed_urls = [req.url.strip()]
-    
-    # Increase max pages for whole-site crawl (was 200, now 500 for comprehensive analysis)
-    cfg = CrawlConfig(max_pages_per_domain=500)
-    
     try:
-        # Crawl entire site - crawler follows all internal links
-        pages = await crawl(seed_urls, domain, cfg)
-        metrics = build_graph_and_metrics(pages, domain)
-        logger.info("Whole-site crawl completed: %s pages, %s referring domains, %s backlinks",
-                   len(pages), metrics.get("referring_domains", 0), metrics.get("total_backlinks", 0))
+        metrics, shared = await _analyze_flight.do(
+            domain, lambda: _crawl_metrics(seed_urls, domain)
+        )
     except Exception as e:
         logger.exception("off-page-analyze failed: %s", e)
         raise HTTPException(500, f"Link signals analysis failed: {e}") from e
-    return {
+    return await _analyze_response(domain, metrics, 0.0, source="coalesced" if shared else "crawl")
+
+
+async def _analyze_response(domain: str, metrics: dict, age: float, source: str) -> dict:
+    """Response body; estimated_da is the link-graph authority score, as in /report."""
+    out = {
         "demoData": False,
         "target_domain": domain,
         "referring_domains": metrics.get("referring_domains", 0),
@@ -137,11 +319,17 @@ async def off_page_analyze(req: OffPageAnalyzeRequest):
         "nofollow_count": metrics.get("nofollow_count", 0),
         "follow_pct": metrics.get("follow_pct", 0),
         "estimated_da": metrics.get("estimated_da", 0),
-        "pages_crawled": len(pages),  # Use actual pages crawled count
+        "pages_crawled": metrics.get("pages_crawled", 0),  # Use actual pages crawled count
+        "source": source,  # crawl | coalesced | cache | stored
+        "age_seconds": round(age, 1),
         "raw": metrics,
     }
+    await _sync_authority()
+    async with _link_graph_lock:
+        return _with_authority(out, domain)
 
 
 @app.get("/health")
 async def health():
-    return {"status": "ok"}
+    # transport: crawler connection reuse since startup (requests vs. new connections)
+    return {"status": "ok", "transport": transport_stats().as_dict()}
@@ -0,0 +1,169 @@
+"""
+Raw response archive (WARC) for offline re-extraction.
+
+With cfg.archive_dir set, a crawl job appends every HTML response it extracts
+to <archive_dir>/job-<id>.warc.gz as a WARC/1.1 response record: status line,
+headers and the body as downloaded (Content-Encoding already undone, cut at
+max_body_bytes, which WARC-Truncated then records). Each record is a gzip
+member of its own, so the file is an ordinary .warc.gz for any WARC reader,
+and a single record inflates without touching the rest of the file.
+
+The index is the page itself: its "archive" entry ({file, offset, length})
+is stored in crawl_pages, and pages reused from the revalidation cache keep
+pointing at the record they were extracted from. Files are only appended to,
+so those locations stay valid. reextract.py reads them back through mmap.
+"""
+
+import asyncio
+import base64
+import email.message
+import hashlib
+import mmap
+import os
+import uuid
+import zlib
+from dataclasses import dataclass
+from datetime import UTC, datetime
+
+import httpx
+
+COMPRESS_LEVEL = 6
+# Describe the body as stored: decoded and re-framed with our own Content-Length.
+_DROP_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+def archive_file(job_id: int) -> str:
+    return f"job-{job_id}.warc.gz"
+
+
+def _record(response: httpx.Response, body: bytes, truncated: bool) -> bytes:
+    """Uncompressed WARC response record for response with body."""
+    lines = [f"{response.http_version} {response.status_code} {response.reason_phrase}"]
+    lines += [
+        f"{k}: {v}" for k, v in response.headers.multi_items() if k.lower() not in _DROP_HEADERS
+    ]
+    lines.append(f"Content-Length: {len(body)}")
+    block = ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8", "replace") + body
+    digest = base64.b32encode(hashlib.sha1(body).digest()).decode()
+    head = [
+        "WARC/1.1",
+        "WARC-Type: response",
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>",
+        f"WARC-Date: {datetime.now(UTC).strftime('%Y-%m-%dT%H:%M:%SZ')}",
+        f"WARC-Target-URI: {response.url}",
+        f"WARC-Payload-Digest: sha1:{digest}",
+        "Content-Type: application/http;msgtype=response",
+        f"Content-Length: {len(block)}",
+    ]
+    if truncated:
+        head.append("WARC-Truncated: length")
+    return ("\r\n".join(head) + "\r\n\r\n").encode() + block + b"\r\n\r\n"
+
+
+def _gzip(data: bytes) -> bytes:
+    z = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return z.compress(data) + z.flush()
+
+
+class ResponseArchive:
+    """
+    crawl(archive=...) writer of one job's .warc.gz. Records are compressed
+    off the event loop; flush() before the pages pointing at them are stored.
+    """
+
+    def __init__(self, directory: str, name: str):
+        os.makedirs(directory, exist_ok=True)
+        self.file = name
+        self._f = open(os.path.join(directory, name), "ab")
+        self.records = 0
+        self.bytes = 0
+
+    async def write(self, response: httpx.Response, body: bytes, truncated: bool = False) -> dict:
+        """Append a response record; returns its location for the page's "archive" entry."""
+        data = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: _gzip(_record(response, body, truncated))
+        )
+        # No await between tell() and write(): records never interleave.
+        offset = self._f.tell()
+        self._f.write(data)
+        self.records += 1
+        self.bytes += len(data)
+        return {"file": self.file, "offset": offset, "length": len(data)}
+
+    def flush(self) -> None:
+        self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+@dataclass
+class ArchivedResponse:
+    url: str
+    status: int
+    headers: list[tuple[str, str]]
+    body: bytes
+    truncated: bool
+
+    @property
+    def encoding(self) -> str | None:
+        """Charset of the Content-Type header, as httpx reports it during the crawl."""
+        ctype = next((v for k, v in self.headers if k.lower() == "content-type"), None)
+        if ctype is None:
+            return None
+        msg = email.message.Message()
+        msg["content-type"] = ctype
+        return msg.get_content_charset(failobj=None)
+
+
+def _fields(head: bytes) -> list[tuple[str, str]]:
+    out = []
+    for line in head.decode("utf-8", "replace").split("\r\n")[1:]:
+        name, _, value = line.partition(":")
+        out.append((name.strip(), value.strip()))
+    return out
+
+
+def parse_record(data: bytes) -> ArchivedResponse:
+    """An inflated response record back into its parts."""
+    end = data.index(b"\r\n\r\n")
+    warc = {k.lower(): v for k, v in _fields(data[:end])}
+    block = data[end + 4: end + 4 + int(warc["content-length"])]
+    end = block.index(b"\r\n\r\n")
+    status_line = block[:block.index(b"\r\n")]
+    return ArchivedResponse(
+        url=warc["warc-target-uri"],
+        status=int(status_line.split()[1]),
+        headers=_fields(block[:end]),
+        body=block[end + 4:],
+        truncated="warc-truncated" in warc,
+    )
+
+
+class ArchiveReader:
+    """Random access to the records of the .warc.gz files in directory, memory-mapped."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._maps: dict[str, mmap.mmap] = {}
+
+    def _map(self, name: str) -> mmap.mmap:
+        m = self._maps.get(name)
+        if m is None:
+            with open(os.path.join(self.directory, os.path.basename(name)), "rb") as f:
+                m = self._maps[name] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return m
+
+    def read(self, location: dict) -> ArchivedResponse:
+        m = self._map(location["file"])
+        offset, length = location["offset"], location["length"]
+        if offset + length > len(m):
+            m.close()  # the file grew since it was mapped (a crawl is appending to it)
+            del self._maps[location["file"]]
+            m = self._map(location["file"])
+        return parse_record(zlib.decompress(m[offset:offset + length], 16 + zlib.MAX_WBITS))
+
+    def close(self) -> None:
+        for m in self._maps.values():
+            m.close()
+        self._maps.clear()
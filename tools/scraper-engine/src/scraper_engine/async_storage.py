@@ -0,0 +1,479 @@
+"""Non-blocking SQLite storage (aiosqlite) mirroring storage.py for async callers."""
+
+import asyncio
+import json
+import time
+import weakref
+from dataclasses import dataclass
+
+import aiosqlite
+
+from .graph import MetricsAccumulator
+from .robots import RobotsRules
+from .storage import (
+    _CLAIM_JOB,
+    _FAIL_EXPIRED_JOBS,
+    _FINISH_JOB,
+    _HEARTBEAT_JOB,
+    _INSERT_JOB,
+    _INSERT_METRICS,
+    _INSERT_PAGE,
+    _PRAGMAS,
+    _RELEASE_JOB,
+    _REQUEUE_JOB,
+    _REWIND_JOB,
+    _SELECT_BACKLINKS,
+    _SELECT_HTTP_CACHE,
+    _SELECT_HTTP_CACHE_MANY,
+    _SELECT_JOB,
+    _SELECT_REPORT,
+    _SELECT_REWIND_CUTOFF,
+    _SELECT_ROBOTS,
+    _TOUCH_HTTP_CACHE,
+    _UPSERT_CHECKPOINT,
+    _UPSERT_HTTP_CACHE,
+    _UPSERT_ROBOTS,
+    JOB_MAX_ATTEMPTS,
+    PAGE_BATCH_SIZE,
+    _backlinks,
+    _backlinks_args,
+    _chunks,
+    _job,
+    _link_statements,
+    _metrics_row,
+    _page_row,
+    decode_state,
+    encode_state,
+    init_schema,
+)
+
+# One writer and one reader connection per DB path. Each aiosqlite connection
+# runs sqlite on its own thread; with WAL the reader never waits for a write.
+_writers: dict[str, aiosqlite.Connection] = {}
+_readers: dict[str, aiosqlite.Connection] = {}
+# asyncio locks belong to the loop they are first used on, so each event loop
+# (e.g. successive asyncio.run() calls) gets its own: "connect" and one per DB path.
+_locks: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, asyncio.Lock]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+class LeaseLost(RuntimeError):
+    """The job's lease expired and it was claimed by another worker."""
+
+
+async def _open(db_path: str) -> aiosqlite.Connection:
+    conn = await aiosqlite.connect(db_path, timeout=30)
+    for pragma in _PRAGMAS:
+        await conn.execute(pragma)
+    return conn
+
+
+async def connect(db_path: str, write: bool = False) -> aiosqlite.Connection:
+    pool = _writers if write else _readers
+    conn = pool.get(db_path)
+    if conn is None:
+        async with _lock("connect"):
+            conn = pool.get(db_path)
+            if conn is None:
+                init_schema(db_path)
+                conn = pool[db_path] = await _open(db_path)
+    return conn
+
+
+def _lock(name: str) -> asyncio.Lock:
+    loop = asyncio.get_running_loop()
+    locks = _locks.get(loop)
+    if locks is None:
+        locks = _locks[loop] = {}
+    lock = locks.get(name)
+    if lock is None:
+        lock = locks[name] = asyncio.Lock()
+    return lock
+
+
+def _write_lock(db_path: str) -> asyncio.Lock:
+    return _lock("write:" + db_path)
+
+
+async def create_job(
+    db_path: str,
+    target_domain: str,
+    seed_urls: list[str],
+    max_pages: int | None = None,
+) -> int:
+    conn = await connect(db_path, write=True)
+    async with _write_lock(db_path):
+        cur = await conn.execute(_INSERT_JOB, (target_domain, json.dumps(seed_urls), max_pages))
+        await conn.commit()
+    return cur.lastrowid or 0
+
+
+async def _insert_pages(conn: aiosqlite.Connection, job_id: int, chunk: list[dict]) -> None:
+    """Insert one chunk of pages and their links; caller holds the write lock and commits."""
+    await conn.executemany(_INSERT_PAGE, [_page_row(job_id, p) for p in chunk])
+    # AUTOINCREMENT ids of one executemany inside our transaction are consecutive.
+    async with conn.execute("SELECT last_insert_rowid()") as cur:
+        last_id = (await cur.fetchone())[0]
+    first_id = last_id - len(chunk) + 1
+    triples = [(first_id + i, p["domain"], p.get("links", [])) for i, p in enumerate(chunk)]
+    for sql, params in _link_statements(job_id, triples):
+        await conn.executemany(sql, params)
+
+
+async def _write_job(
+    db_path: str,
+    job_id: int,
+    pages: list[dict],
+    checkpoint: dict | None = None,
+    metrics: tuple | None = None,
+    status: str | None = None,
+    error: str | None = None,
+    owner: str | None = None,
+) -> None:
+    """
+    Pages plus optional checkpoint / metrics / status in a single transaction.
+    With owner, raises LeaseLost (writing nothing) unless that worker still
+    holds the job's lease.
+    """
+    conn = await connect(db_path, write=True)
+    async with _write_lock(db_path):
+        try:
+            if owner is not None:
+                # A write first, so the check holds the DB write lock until commit.
+                cur = await conn.execute(
+                    "UPDATE crawl_jobs SET heartbeat_at = heartbeat_at "
+                    "WHERE id = ? AND lease_owner = ?",
+                    (job_id, owner),
+                )
+                if cur.rowcount == 0:
+                    raise LeaseLost(f"crawl job {job_id} is no longer leased to {owner}")
+            for chunk in _chunks(pages, PAGE_BATCH_SIZE):
+                await _insert_pages(conn, job_id, chunk)
+            if checkpoint is not None:
+                await conn.execute(
+                    _UPSERT_CHECKPOINT,
+                    (job_id, checkpoint["pages_done"], encode_state(checkpoint)),
+                )
+            if metrics is not None:
+                await conn.execute(_INSERT_METRICS, metrics)
+            if status is not None:
+                await conn.execute(_FINISH_JOB, (status, error, job_id))
+                if status == "completed":
+                    await conn.execute("DELETE FROM crawl_checkpoints WHERE job_id = ?", (job_id,))
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+
+
+async def store_pages(db_path: str, job_id: int, pages: list[dict]) -> None:
+    # Chunked transactions keep each write lock short so /report readers interleave.
+    for chunk in _chunks(pages, PAGE_BATCH_SIZE):
+        await _write_job(db_path, job_id, chunk)
+
+
+async def store_metrics(
+    db_path: str,
+    job_id: int,
+    target_domain: str,
+    metrics: dict,
+    status: str = "completed",
+) -> None:
+    row = _metrics_row(job_id, target_domain, metrics)
+    await _write_job(db_path, job_id, [], metrics=row, status=status)
+
+
+async def store_crawl(
+    db_path: str,
+    job_id: int,
+    target_domain: str,
+    pages: list[dict],
+    metrics: dict,
+) -> None:
+    await store_pages(db_path, job_id, pages)
+    await store_metrics(db_path, job_id, target_domain, metrics)
+
+
+async def get_job(db_path: str, job_id: int) -> dict | None:
+    conn = await connect(db_path)
+    async with conn.execute(_SELECT_JOB, (job_id,)) as cur:
+        return _job(await cur.fetchone())
+
+
+async def list_jobs(db_path: str, status: str) -> list[int]:
+    conn = await connect(db_path)
+    sql = "SELECT id FROM crawl_jobs WHERE status = ? ORDER BY id"
+    async with conn.execute(sql, (status,)) as cur:
+        return [r[0] for r in await cur.fetchall()]
+
+
+async def set_job_status(db_path: str, job_id: int, status: str, error: str | None = None) -> None:
+    await _write_job(db_path, job_id, [], status=status, error=error)
+
+
+async def claim_job(
+    db_path: str, owner: str, lease_seconds: float, max_running: int = 0
+) -> dict | None:
+    """
+    Lease the oldest queued job (or one whose worker stopped heartbeating) to
+    owner; None if there is none or max_running jobs are already running.
+    """
+    conn = await connect(db_path, write=True)
+    now = time.time()
+    async with _write_lock(db_path):
+        try:
+            await conn.execute(
+                _FAIL_EXPIRED_JOBS,
+                (f"lease expired after {JOB_MAX_ATTEMPTS} attempts", now, JOB_MAX_ATTEMPTS),
+            )
+            expires = now + lease_seconds
+            args = (owner, expires, now, now, JOB_MAX_ATTEMPTS, max_running, now, max_running)
+            async with conn.execute(_CLAIM_JOB, args) as cur:
+                row = await cur.fetchone()
+            await conn.commit()
+        except BaseException:
+            await conn.rollback()
+            raise
+    if row is None:
+        return None
+    job_id, target_domain, seed_urls, max_pages, attempts = row
+    return {
+        "job_id": job_id,
+        "target_domain": target_domain,
+        "seed_urls": json.loads(seed_urls),
+        "max_pages": max_pages,
+        "attempts": attempts,
+    }
+
+
+async def heartbeat_job(db_path: str, job_id: int, owner: str, lease_seconds: float) -> bool:
+    """Extend owner's lease on job_id; False if the lease was lost."""
+    conn = await connect(db_path, write=True)
+    now = time.time()
+    async with _write_lock(db_path):
+        cur = await conn.execute(_HEARTBEAT_JOB, (now + lease_seconds, now, job_id, owner))
+        await conn.commit()
+    return cur.rowcount > 0
+
+
+async def requeue_job(db_path: str, job_id: int) -> bool:
+    """Queue a failed job again; a worker resumes it from its last checkpoint."""
+    conn = await connect(db_path, write=True)
+    async with _write_lock(db_path):
+        cur = await conn.execute(_REQUEUE_JOB, (job_id,))
+        await conn.commit()
+    return cur.rowcount > 0
+
+
+async def release_job(db_path: str, job_id: int, owner: str) -> None:
+    """Hand a running job back to the queue (worker shutdown); it resumes from its checkpoint."""
+    conn = await connect(db_path, write=True)
+    async with _write_lock(db_path):
+        await conn.execute(_RELEASE_JOB, (job_id, owner))
+        await conn.commit()
+
+
+async def load_checkpoint(db_path: str, job_id: int) -> dict | None:
+    conn = await connect(db_path)
+    sql = "SELECT state FROM crawl_checkpoints WHERE job_id = ?"
+    async with conn.execute(sql, (job_id,)) as cur:
+        row = await cur.fetchone()
+    return decode_state(row[0]) if row else None
+
+
+async def rewind_job(db_path: str, job_id: int, pages_done: int) -> None:
+    """Drop pages stored after the job's last checkpoint, so a resume does not store them twice."""
+    conn = await connect(db_path, write=True)
+    async with _write_lock(db_path):
+        async with conn.execute(_SELECT_REWIND_CUTOFF, (job_id, pages_done)) as cur:
+            row = await cur.fetchone()
+        if row:
+            for sql in _REWIND_JOB:
+                await conn.execute(sql, (job_id, row[0]))
+        await conn.commit()
+
+
+class PageSink:
+    """
+    crawl(on_page=..., checkpoint=sink.checkpoint) sink.
+
+    Pages are buffered and metrics accumulated incrementally. Each crawl
+    checkpoint writes the buffered pages, the crawl state and the metric
+    counters in one transaction, so a stored checkpoint always matches the
+    stored pages exactly; memory stays bounded by cfg.checkpoint_every_pages.
+    finish() writes the tail, the metrics and the final status together.
+    Pages written before a failure stay in the DB. With owner (a worker id),
+    writes raise LeaseLost once the job has been claimed by another worker.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        job_id: int,
+        target_domain: str,
+        resume: dict | None = None,
+        owner: str | None = None,
+    ):
+        self.db_path = db_path
+        self.job_id = job_id
+        self.target_domain = target_domain
+        self.owner = owner
+        self.metrics = MetricsAccumulator(target_domain, keep_backlinks=False)
+        if resume and "metrics" in resume:
+            self.metrics.restore(resume["metrics"])
+        self._buffer: list[dict] = []
+
+    async def __call__(self, page: dict) -> None:
+        self.metrics.add(page)
+        self._buffer.append(page)
+
+    async def checkpoint(self, state: dict) -> None:
+        # Take the buffer and counters before the first await: they then match
+        # the synchronous snapshot crawl() just took.
+        batch, self._buffer = self._buffer, []
+        state = {**state, "metrics": self.metrics.state()}
+        try:
+            await _write_job(self.db_path, self.job_id, batch, checkpoint=state, owner=self.owner)
+        except BaseException:
+            # Rolled back (or cancelled when the crawl stopped): finish() writes them instead.
+            self._buffer[:0] = batch
+            raise
+
+    async def finish(self, status: str = "completed", error: str | None = None) -> dict:
+        batch, self._buffer = self._buffer, []
+        metrics = self.metrics.result()
+        await _write_job(
+            self.db_path,
+            self.job_id,
+            batch,
+            metrics=_metrics_row(self.job_id, self.target_domain, metrics),
+            status=status,
+            error=error,
+            owner=self.owner,
+        )
+        return metrics
+
+
+@dataclass
+class CachedResponse:
+    final_url: str
+    etag: str | None
+    last_modified: str | None
+    content_hash: bytes
+    page: dict
+    validated_at: float | None = None  # unix time the page was last fetched or revalidated
+
+
+class HttpCache:
+    """
+    crawl(http_cache=...) store of response validators and extracted pages,
+    per URL for one target domain (link classification depends on it).
+    Writes are buffered and go out in batches; crawl() flushes at the end.
+    """
+
+    def __init__(self, db_path: str, target_domain: str, batch_size: int = 200):
+        self.db_path = db_path
+        self.target_domain = target_domain
+        self.batch_size = batch_size
+        self._upserts: list[tuple] = []
+        self._touches: list[tuple] = []
+
+    async def get(self, url: str) -> CachedResponse | None:
+        conn = await connect(self.db_path)
+        async with conn.execute(_SELECT_HTTP_CACHE, (url, self.target_domain)) as cur:
+            row = await cur.fetchone()
+        if row is None:
+            return None
+        final_url, etag, last_modified, content_hash, page, validated_at = row
+        return CachedResponse(
+            final_url, etag, last_modified, content_hash, decode_state(page), validated_at
+        )
+
+    async def get_many(self, urls: list[str]) -> dict[str, CachedResponse]:
+        """Cached entries of those urls that have one, in batches of 500 per query."""
+        conn = await connect(self.db_path)
+        out: dict[str, CachedResponse] = {}
+        for chunk in _chunks(urls, 500):
+            sql = _SELECT_HTTP_CACHE_MANY.format(marks=",".join("?" * len(chunk)))
+            async with conn.execute(sql, (self.target_domain, *chunk)) as cur:
+                async for url, final_url, etag, last_modified, content_hash, page, checked in cur:
+                    out[url] = CachedResponse(final_url, etag, last_modified, content_hash,
+                                              decode_state(page), checked)
+        return out
+
+    async def put(self, url: str, entry: CachedResponse) -> None:
+        self._upserts.append((
+            url, self.target_domain, entry.final_url, entry.etag, entry.last_modified,
+            entry.content_hash, encode_state(entry.page),
+        ))
+        await self._maybe_flush()
+
+    async def touch(self, url: str, etag: str | None, last_modified: str | None) -> None:
+        """The stored page is still current (304 / same body); refresh validators."""
+        self._touches.append((etag, last_modified, url, self.target_domain))
+        await self._maybe_flush()
+
+    async def _maybe_flush(self) -> None:
+        if len(self._upserts) + len(self._touches) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        upserts, self._upserts = self._upserts, []
+        touches, self._touches = self._touches, []
+        if not upserts and not touches:
+            return
+        conn = await connect(self.db_path, write=True)
+        async with _write_lock(self.db_path):
+            try:
+                if upserts:
+                    await conn.executemany(_UPSERT_HTTP_CACHE, upserts)
+                if touches:
+                    await conn.executemany(_TOUCH_HTTP_CACHE, touches)
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
+
+
+class RobotsStore:
+    """robots_cache table backend for robots.RobotsCache (set_robots_store)."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+
+    async def load(self, origin: str) -> RobotsRules | None:
+        conn = await connect(self.db_path)
+        async with conn.execute(_SELECT_ROBOTS, (origin,)) as cur:
+            row = await cur.fetchone()
+        return RobotsRules(*row) if row else None
+
+    async def save(self, origin: str, rules: RobotsRules) -> None:
+        conn = await connect(self.db_path, write=True)
+        async with _write_lock(self.db_path):
+            await conn.execute(
+                _UPSERT_ROBOTS,
+                (origin, rules.status, rules.body, rules.fetched_at, rules.expires_at),
+            )
+            await conn.commit()
+
+
+async def get_report(db_path: str, target_domain: str) -> dict | None:
+    conn = await connect(db_path)
+    async with conn.execute(_SELECT_REPORT, (target_domain,)) as cur:
+        row = await cur.fetchone()
+    if not row:
+        return None
+    out = json.loads(row[0])
+    out["updated_at"] = row[1]
+    async with conn.execute(_SELECT_BACKLINKS, _backlinks_args(target_domain, row[2])) as cur:
+        out["backlinks"] = _backlinks(await cur.fetchall())
+    return out
+
+
+async def close_all() -> None:
+    for pool in (_writers, _readers):
+        for conn in pool.values():
+            await conn.close()
+        pool.clear()
+    _locks.pop(asyncio.get_running_loop(), None)
@@ -0,0 +1,170 @@
+"""
+Link authority: PageRank over the cross-job link graph, per page and per site.
+
+pagerank() is a power iteration on edge arrays: each step is one gather
+(x[src] * weight) and one scatter-add (np.bincount over dst), i.e. a sparse
+matrix-vector product in COO form without a SciPy dependency. Dangling
+nodes spread their score uniformly. Iteration stops when the L1 change
+drops below tol.
+
+Authority keeps the scores of the previous run and warm-starts from them,
+so after merging a new crawl only a few iterations are needed.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+from .config import AuthorityConfig
+from .linkgraph import _DEAD, LinkGraph
+from .psl import registrable_domain
+from .urls import normalize_target
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PageRankResult:
+    scores: np.ndarray  # sums to 1
+    iterations: int
+    delta: float  # L1 change of the last iteration
+    converged: bool
+
+
+def pagerank(
+    src: np.ndarray,
+    dst: np.ndarray,
+    n: int,
+    weights: np.ndarray | None = None,
+    damping: float = 0.85,
+    tol: float = 1e-6,
+    max_iter: int = 100,
+    x0: np.ndarray | None = None,
+) -> PageRankResult:
+    """PageRank of n nodes over edges src -> dst (optionally weighted), starting from x0."""
+    if n == 0:
+        return PageRankResult(np.zeros(0), 0, 0.0, True)
+    w = np.ones(len(src)) if weights is None else weights.astype(np.float64, copy=False)
+    out_w = np.bincount(src, weights=w, minlength=n)
+    coef = w / out_w[src]  # share of the source's score each edge carries
+    dangling = out_w == 0
+    if x0 is None or len(x0) != n or x0.sum() <= 0:
+        x = np.full(n, 1.0 / n)
+    else:
+        x = x0 / x0.sum()
+    teleport = (1.0 - damping) / n
+    delta = math.inf
+    it = 0
+    while it < max_iter:
+        it += 1
+        y = np.bincount(dst, weights=x[src] * coef, minlength=n)
+        y *= damping
+        y += teleport + damping * x[dangling].sum() / n
+        delta = float(np.abs(y - x).sum())
+        x = y
+        if delta < tol:
+            break
+    return PageRankResult(x, it, delta, delta < tol)
+
+
+def _scale(scores: np.ndarray, n: int) -> np.ndarray:
+    """0-100, log-scaled between the teleport-only floor and the best node."""
+    if n == 0:
+        return scores
+    rel = np.log(np.maximum(scores * n, 1e-12))  # 0 = an average node
+    lo, hi = rel.min(), rel.max()
+    if hi - lo < 1e-12:
+        return np.zeros(n)
+    return np.round(100 * (rel - lo) / (hi - lo), 1)
+
+
+class Authority:
+    """Page- and site-level PageRank for a LinkGraph, recomputed when it changes."""
+
+    def __init__(self, config: AuthorityConfig | None = None):
+        self.config = config or AuthorityConfig()
+        self.version = -1  # LinkGraph.version the scores belong to
+        self.page_scores = np.zeros(0)
+        self.site_scores = np.zeros(0)
+        self.site_authority = np.zeros(0)
+        self.stats: dict = {}
+
+    def update(self, graph: LinkGraph) -> bool:
+        """Recompute if graph changed since the last update; True if it did."""
+        if graph.version == self.version:
+            return False
+        cfg = self.config
+        t0 = time.perf_counter()
+        live = (np.frombuffer(graph.flags, dtype=np.uint8) & _DEAD) == 0
+        src = np.frombuffer(graph.src, dtype=np.int32)[live]
+        dst = np.frombuffer(graph.dst, dtype=np.int32)[live]
+        n_pages = len(graph.urls)
+
+        pages = pagerank(src, dst, n_pages, damping=cfg.damping, tol=cfg.tolerance,
+                         max_iter=cfg.max_iterations, x0=_extend(self.page_scores, n_pages))
+
+        # Site graph: one edge per linking (site, site) pair, self-links dropped.
+        host_site = np.frombuffer(graph.host_site, dtype=np.int32)
+        url_site = host_site[np.frombuffer(graph.url_host, dtype=np.int32)]
+        s_src, s_dst = url_site[src], url_site[dst]
+        cross = s_src != s_dst
+        n_sites = len(graph.sites)
+        pairs = np.unique(s_src[cross].astype(np.int64) * n_sites + s_dst[cross])
+        sites = pagerank(pairs // n_sites, pairs % n_sites, n_sites, damping=cfg.damping,
+                         tol=cfg.tolerance, max_iter=cfg.max_iterations,
+                         x0=_extend(self.site_scores, n_sites))
+
+        self.page_scores, self.site_scores = pages.scores, sites.scores
+        self.site_authority = _scale(sites.scores, n_sites)
+        self.version = graph.version
+        self.stats = {
+            "pages": n_pages,
+            "edges": int(len(src)),
+            "sites": n_sites,
+            "site_edges": int(len(pairs)),
+            "page_iterations": pages.iterations,
+            "site_iterations": sites.iterations,
+            "converged": pages.converged and sites.converged,
+            "seconds": round(time.perf_counter() - t0, 3),
+        }
+        logger.info("Authority: %s", self.stats)
+        return True
+
+    def report(self, graph: LinkGraph, domain: str, top_pages: int = 5) -> dict | None:
+        """Authority of domain's site (0-100, its PageRank and rank) and its best pages."""
+        target = normalize_target(domain)
+        sid = graph.sites.get(registrable_domain(target))
+        if sid is None or sid >= len(self.site_scores):
+            return None
+        score = self.site_scores[sid]
+        out = {
+            "score": float(self.site_authority[sid]),
+            "site": graph.sites.key(sid),
+            "pagerank": float(score),
+            "rank": int((self.site_scores > score).sum()) + 1,
+            "sites": len(self.site_scores),
+        }
+        hid = graph.hosts.get(target)
+        if hid is not None and len(self.page_scores):
+            url_host = np.frombuffer(graph.url_host, dtype=np.int32)[: len(self.page_scores)]
+            ids = np.flatnonzero(url_host == hid)
+            best = ids[np.argsort(-self.page_scores[ids], kind="stable")[:top_pages]]
+            n = len(self.page_scores)
+            out["top_pages"] = [
+                {"url": graph.urls.key(int(i)), "pagerank": float(self.page_scores[i]),
+                 "relative": round(float(self.page_scores[i] * n), 3)}
+                for i in best
+            ]
+        return out
+
+
+def _extend(prev: np.ndarray, n: int) -> np.ndarray | None:
+    """Previous scores padded with the average score for nodes added since."""
+    if len(prev) == 0:
+        return None
+    if len(prev) >= n:
+        return prev[:n]
+    return np.concatenate([prev, np.full(n - len(prev), 1.0 / n)])
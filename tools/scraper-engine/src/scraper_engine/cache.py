@@ -0,0 +1,75 @@
+"""In-process result cache (TTL + LRU) and request coalescing for API handlers."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+
+class TTLCache:
+    """
+    Entries expire ttl_seconds after they were stored; beyond max_entries the
+    least recently used entry is evicted. get() also returns the entry's age
+    so callers can apply a stricter per-request staleness bound.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str, max_age: float | None = None) -> tuple[Any, float] | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        stored_at, value = item
+        age = time.monotonic() - stored_at
+        if age > self.ttl_seconds:
+            del self._data[key]
+            return None
+        if max_age is not None and age > max_age:
+            return None
+        self._data.move_to_end(key)
+        return value, age
+
+    def put(self, key: str, value: Any, age: float = 0.0) -> None:
+        """Store value; age backdates it (e.g. a result read from the DB)."""
+        if self.max_entries <= 0 or age >= self.ttl_seconds:
+            return
+        self._data[key] = (time.monotonic() - age, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls per key: the first caller starts fn() as a task,
+    later callers await the same task. A caller that goes away (client
+    disconnect) does not cancel the shared work. Results are not kept once the
+    task is done; pair with TTLCache for that.
+    """
+
+    def __init__(self) -> None:
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._tasks
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """Return (result, shared); shared is True if another caller started the work."""
+        task = self._tasks.get(key)
+        shared = task is not None
+        if task is None:
+            task = self._tasks[key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda t: self._done(key, t))
+        return await asyncio.shield(task), shared
+
+    def _done(self, key: str, task: asyncio.Task) -> None:
+        self._tasks.pop(key, None)
+        if not task.cancelled():
+            task.exception()  # retrieved: every waiter may have gone away
@@ -0,0 +1,159 @@
+"""
+Crawl-key canonicalization and crawler-trap detection.
+
+UrlCanonicalizer.canonical() rewrites a crawl key (urls.crawl_key) before it
+reaches the seen set:
+- query parameters named in ignore_params (tracking tags, session ids) are
+  dropped, and so are ;name=value path parameters (;jsessionid=...);
+- so are parameters learned to change nothing on a host: when two crawled
+  pages of one host and path differ only in that parameter and their SimHashes
+  are near-duplicates, it gets a vote; after learn_after votes it is ignored on
+  that host, unless a pair differing only in it ever had different text;
+- the remaining parameters are sorted, so ?a=1&b=2 and ?b=2&a=1 are one URL.
+
+trap() flags URLs from unbounded URL spaces: overlong URLs, overly deep
+paths, path segments repeated by relative-link loops (/a/b/a/b/a/...) and
+calendar dates far from the present.
+"""
+
+import logging
+import re
+import time
+from collections import Counter, deque
+from urllib.parse import unquote_plus
+
+from .config import IGNORE_PARAMS
+
+logger = logging.getLogger(__name__)
+
+# YYYY-MM / YYYY/MM in a path or query, and year=YYYY
+_DATE_RE = re.compile(r"(?<![\w.])([12]\d{3})[-/](0?[1-9]|1[0-2])(?![\d])")
+_YEAR_PARAM_RE = re.compile(r"[?&;](?:year|yr)=([12]\d{3})(?!\d)", re.IGNORECASE)
+_PATH_PARAM_RE = re.compile(r";([^/;=?]*)(=[^/;?]*)?")
+RECENT_PATHS = 10_000  # host + path keys whose last crawled pages are kept for learning
+
+
+def _param_name(piece: str) -> str:
+    name = piece.partition("=")[0]
+    if "%" in name or "+" in name:
+        name = unquote_plus(name)
+    return name.lower()
+
+
+class UrlCanonicalizer:
+    """Per-crawl URL rewriting rules, learning ignorable parameters per host."""
+
+    def __init__(
+        self,
+        ignore_params: tuple[str, ...] = IGNORE_PARAMS,
+        learn_after: int = 3,
+        max_distance: int = 3,
+        max_url_length: int = 1024,
+        max_path_segments: int = 16,
+        max_segment_repeats: int = 2,
+        sort_params: bool = True,
+        min_year: int = 1900,
+        max_years_ahead: int = 5,
+    ):
+        self._ignore = re.compile(
+            "|".join(f"(?:{p})" for p in ignore_params) or r"(?!)", re.IGNORECASE
+        )
+        self.learn_after = learn_after
+        self.max_distance = max_distance
+        self.max_url_length = max_url_length
+        self.max_path_segments = max_path_segments
+        self.max_segment_repeats = max_segment_repeats
+        self.sort_params = sort_params
+        self.min_year = min_year
+        self.max_year = time.gmtime().tm_year + max_years_ahead
+        self.learned: dict[str, set[str]] = {}  # host -> parameter names ignored there
+        self._votes: dict[tuple[str, str], int] = {}  # (host, name) -> near-duplicate pairs
+        self._kept: set[tuple[str, str]] = set()  # (host, name) that alone changed a page
+        # scheme://host/path -> (query, fingerprint) of its recent pages
+        self._recent: dict[str, deque[tuple[dict[str, str], int]]] = {}
+
+    def _ignored(self, name: str, learned: set[str] | None) -> bool:
+        return (learned is not None and name in learned) or self._ignore.fullmatch(name) is not None
+
+    def _strip_path_params(self, base: str) -> str:
+        def drop(m: re.Match) -> str:
+            return "" if self._ignore.fullmatch(m[1]) else m[0]
+
+        stripped = _PATH_PARAM_RE.sub(drop, base)
+        if stripped != base and stripped.endswith("/") and stripped.count("/") > 3:
+            stripped = stripped.rstrip("/")  # crawl keys have no trailing slash
+        return stripped
+
+    def canonical(self, url: str) -> str:
+        """url without ignored parameters, the others sorted."""
+        q = url.find("?")
+        semi = url.find(";")
+        if q < 0 and semi < 0:
+            return url
+        base, query = (url[:q], url[q + 1:]) if q >= 0 else (url, "")
+        if semi >= 0 and (q < 0 or semi < q):
+            base = self._strip_path_params(base)
+        if not query:
+            return base
+        host = base[base.find("//") + 2:].partition("/")[0].lower()
+        learned = self.learned.get(host)
+        kept = [p for p in query.split("&") if p and not self._ignored(_param_name(p), learned)]
+        if self.sort_params:
+            kept.sort()
+        return f"{base}?{'&'.join(kept)}" if kept else base
+
+    def trap(self, url: str) -> str | None:
+        """Why url looks like part of a crawler trap, or None."""
+        if len(url) > self.max_url_length:
+            return "long URL"
+        start = url.find("/", url.find("//") + 2)
+        if start < 0:
+            return None
+        end = url.find("?", start)
+        segments = [s for s in url[start:end if end >= 0 else len(url)].split("/") if s]
+        if len(segments) > self.max_path_segments:
+            return "deep path"
+        if self.max_segment_repeats and len(set(segments)) < len(segments):
+            if Counter(segments).most_common(1)[0][1] > self.max_segment_repeats:
+                return "repeated path segment"
+        for rx in (_DATE_RE, _YEAR_PARAM_RE):
+            for m in rx.finditer(url, start):
+                if not self.min_year <= int(m[1]) <= self.max_year:
+                    return "calendar"
+        return None
+
+    def observe(self, url: str, fp: int) -> None:
+        """Learn from a crawled page's SimHash which parameters of its host change nothing."""
+        if not self.learn_after:
+            return
+        base, _, query = url.partition("?")
+        params = {_param_name(p): p for p in query.split("&") if p}
+        recent = self._recent.get(base)
+        if recent is None:
+            if len(self._recent) >= RECENT_PATHS:
+                del self._recent[next(iter(self._recent))]
+            recent = self._recent[base] = deque(maxlen=4)
+        host = base[base.find("//") + 2:].partition("/")[0].lower()
+        for other, other_fp in recent:
+            changed = {k for k in params.keys() | other.keys() if params.get(k) != other.get(k)}
+            if not changed or len(changed) > 2:
+                continue
+            if (fp ^ other_fp).bit_count() <= self.max_distance:
+                for name in changed:
+                    self._vote(host, name)
+            elif len(changed) == 1:
+                self._kept.add((host, changed.pop()))
+        recent.append((params, fp))
+
+    def _vote(self, host: str, name: str) -> None:
+        key = (host, name)
+        if key in self._kept or name in self.learned.get(host, ()):
+            return
+        n = self._votes[key] = self._votes.get(key, 0) + 1
+        if n >= self.learn_after:
+            del self._votes[key]
+            self.learned.setdefault(host, set()).add(name)
+            logger.info(
+                "Ignoring parameter %r on %s: %d page pairs differing in it were near-duplicates",
+                name, host, n,
+            )
@@ -4,6 +4,26 @@ from dataclasses import dataclass, field
 from typing import Set
 import os
 
+# (regex, penalty) searched in every frontier URL: patterns that mostly re-list
+# pages already found. Each match delays the URL like `penalty` more link levels.
+PRIORITY_PATTERNS: tuple[tuple[str, float], ...] = (
+    (r"[?&](page|paged|pg|p|offset|start)=\d", 3.0),  # pagination
+    (r"/page/\d", 3.0),
+    (r"/(tag|tags|category|categories|author|label|archive|archives)/", 2.0),
+    (r"/(19|20)\d\d/(\d\d/)?(\d\d/?)?$", 2.0),  # date archives
+    (r"[?&](sort|order|orderby|dir|filter|view|limit|replytocom|share|sessionid|sid|utm_\w+)=",
+     3.0),
+    (r"/(feed|rss|print|amp|login|wp-login\.php|cart|checkout|search)(/|$|\?)", 4.0),
+)
+
+# Query (and ;path) parameter names, matched whole and case-insensitively, that
+# never change what a page shows: tracking tags and session ids.
+IGNORE_PARAMS: tuple[str, ...] = (
+    r"utm_\w+", r"gclid", r"gbraid", r"wbraid", r"dclid", r"fbclid", r"msclkid", r"yclid",
+    r"mc_[ce]id", r"_ga", r"_gl", r"igshid", r"ref_src", r"_hs(enc|mi)",
+    r"(php|asp|j)?sess(ion)?_?id\w*", r"sid", r"cfid", r"cftoken",
+)
+
 
 @dataclass
 class CrawlConfig:
@@ -11,17 +31,151 @@ class CrawlConfig:
 
     max_pages_per_domain: int = 500
     max_concurrent: int = 5
+    # delay between requests to one host; with adaptive_rate only until its first response
     request_delay_seconds: float = 1.0
+    max_crawl_delay_seconds: float = 30.0  # cap on robots.txt Crawl-delay / Request-rate
     timeout_seconds: float = 15.0
+    # per-host AIMD rate control (scheduler.AdaptiveRate) driven by response times and overload
+    adaptive_rate: bool = field(
+        default_factory=lambda: os.environ.get("SCRAPER_ENGINE_ADAPTIVE_RATE", "1") != "0"
+    )
+    min_request_delay_seconds: float = 0.1  # adaptive floor (request_delay_seconds if lower)
+    max_host_concurrency: int = 0  # adaptive in-flight cap per host; 0 = max_concurrent
+    latency_slowdown_factor: float = 3.0  # response time above this x the host's fastest = overload
+    # 429/5xx, timeouts and dropped connections re-queue the URL after a pause of the host
+    retry_statuses: tuple[int, ...] = (429, 500, 502, 503, 504)
+    max_retries: int = 3
+    retry_backoff_seconds: float = 1.0  # first pause, doubled per consecutive failure of a host
+    max_retry_after_seconds: float = 300.0  # cap on Retry-After and on the backoff
+    # shared HTTP client (scraper_engine.transport)
+    http2: bool = True  # multiplex requests to a host over one TLS connection
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry_seconds: float = 30.0
+    # response bodies: larger ones are cut here and only the prefix is parsed
+    max_body_bytes: int = 5 * 1024 * 1024
+    # Content-Type values (without parameters) that are downloaded and parsed
+    html_content_types: tuple[str, ...] = ("text/html", "application/xhtml+xml")
     user_agent: str = (
         "RivisoScraper/1.0 (+https://github.com/your-org/riviso; "
         "self-hosted research crawler)"
     )
     respect_robots: bool = True
+    # robots.txt still unreachable (5xx / 429 / network error) after retries: "disallow" the
+    # origin until it is fetched again (RFC 9309) or "allow" everything, as if it were a 404
+    robots_unreachable: str = field(
+        default_factory=lambda: os.environ.get("SCRAPER_ENGINE_ROBOTS_UNREACHABLE", "disallow")
+    )
     follow_external_referrers_only: bool = True
     referrer_domains: Set[str] = field(default_factory=set)
+    # dedupe: "exact" (URL strings) or "fingerprint" (64-bit hashes, 9-18 bytes/URL)
+    seen_backend: str = field(
+        default_factory=lambda: os.environ.get("SCRAPER_ENGINE_SEEN_BACKEND", "exact")
+    )
+    # queued URLs kept in memory; beyond this the frontier spills to a temp file (0 = never)
+    frontier_memory_limit: int = field(
+        default_factory=lambda: int(os.environ.get("SCRAPER_ENGINE_FRONTIER_MEMORY_LIMIT", "0"))
+    )
+    # order of each host's queue: "priority" (priority.CrawlPriority: depth, links seen,
+    # priority_patterns, directory_quota) or "fifo" (breadth-first)
+    frontier_order: str = field(
+        default_factory=lambda: os.environ.get("SCRAPER_ENGINE_FRONTIER_ORDER", "priority")
+    )
+    priority_patterns: tuple[tuple[str, float], ...] = PRIORITY_PATTERNS
+    directory_quota: int = 25  # pages per directory before the rest of it falls back; 0 = no quota
+    # seed the frontier from the target's sitemaps (robots.txt Sitemap: lines, else /sitemap.xml)
+    use_sitemaps: bool = field(
+        default_factory=lambda: os.environ.get("SCRAPER_ENGINE_SITEMAPS", "1") != "0"
+    )
+    sitemap_max_urls: int = 50_000  # page URLs taken from sitemaps per crawl
+    sitemap_max_files: int = 50  # sitemaps read per origin, indexes included
+    # crawl-key rewriting and trap detection (canonical.UrlCanonicalizer): ignore_params
+    # and per-host learned parameters dropped, the rest sorted; rel=canonical targets
+    # count as seen; URLs over the trap limits are not queued
+    canonicalize_urls: bool = field(
+        default_factory=lambda: os.environ.get("SCRAPER_ENGINE_CANONICALIZE", "1") != "0"
+    )
+    ignore_params: tuple[str, ...] = IGNORE_PARAMS
+    # Near-duplicate pairs before a host's parameter is ignored; 0 = never.
+    learn_params_after: int = 3
+    max_url_length: int = 1024
+    max_path_segments: int = 16
+    max_segment_repeats: int = 2  # a path segment occurring more often marks a trap (/a/b/a/b/a)
+    # a page within this many SimHash bits of one already crawled is skipped: not stored, but
+    # its fetch counts against max_pages_per_domain and its links are queued (negative = off);
+    # pages under near_duplicate_min_words never are
+    near_duplicate_bits: int = field(
+        default_factory=lambda: int(os.environ.get("SCRAPER_ENGINE_NEAR_DUPLICATE_BITS", "-1"))
+    )
+    near_duplicate_min_words: int = 50
+    checkpoint_every_pages: int = 100  # crawl state is checkpointed this often (with a sink)
+    # HTML extraction: "inline" (on the event loop), "thread" or "process" pool; "process"
+    # forks extract_workers processes on the first crawl, so it is opt-in
+    extract_mode: str = field(
+        default_factory=lambda: os.environ.get("SCRAPER_ENGINE_EXTRACT_MODE", "thread")
+    )
+    extract_workers: int = 0  # pool size; 0 = os.cpu_count()
+    # "bs4" (BeautifulSoup tree) or "fast" (streaming lxml target parser, same output)
+    extract_engine: str = field(
+        default_factory=lambda: os.environ.get("SCRAPER_ENGINE_EXTRACT_ENGINE", "bs4")
+    )
+    # crawl jobs append their raw responses to <archive_dir>/job-<id>.warc.gz (archive.py)
+    # for offline re-extraction (reextract.py); "" = no archive
+    archive_dir: str = field(
+        default_factory=lambda: os.environ.get("SCRAPER_ENGINE_ARCHIVE_DIR", "")
+    )
+
+
+@dataclass
+class WorkerConfig:
+    """Crawl job worker settings (scraper_engine.worker)."""
+
+    # crawl jobs one worker process runs at once
+    concurrency: int = field(
+        default_factory=lambda: int(os.environ.get("SCRAPER_ENGINE_WORKER_CONCURRENCY", "2"))
+    )
+    # running jobs across all worker processes sharing the DB; 0 = no global cap
+    max_running_jobs: int = field(
+        default_factory=lambda: int(os.environ.get("SCRAPER_ENGINE_MAX_RUNNING_JOBS", "0"))
+    )
+    # a job whose worker has not heartbeated for this long is claimed again
+    lease_seconds: float = field(
+        default_factory=lambda: float(os.environ.get("SCRAPER_ENGINE_JOB_LEASE_SECONDS", "60"))
+    )
+    poll_interval_seconds: float = 2.0  # idle wait between claim attempts
+    # run a worker inside the API process (single-process deployments)
+    embedded: bool = field(
+        default_factory=lambda: os.environ.get("SCRAPER_ENGINE_EMBEDDED_WORKER", "1") != "0"
+    )
+
+
+@dataclass
+class AnalyzeCacheConfig:
+    """/off-page-analyze result cache."""
+
+    # results (crawled or read from crawl_metrics) are reused for this long
+    ttl_seconds: float = field(
+        default_factory=lambda: float(os.environ.get("SCRAPER_ENGINE_ANALYZE_CACHE_TTL", "900"))
+    )
+    # domains kept in memory; least recently used are evicted first
+    max_entries: int = field(
+        default_factory=lambda: int(os.environ.get("SCRAPER_ENGINE_ANALYZE_CACHE_SIZE", "256"))
+    )
 
 
 def get_db_path() -> str:
     """SQLite DB path. Override via SCRAPER_ENGINE_DB."""
     return os.environ.get("SCRAPER_ENGINE_DB", "scraper_engine.db")
+
+
+@dataclass
+class AuthorityConfig:
+    """PageRank behind the authority score in /report."""
+
+    damping: float = 0.85
+    tolerance: float = 1e-6  # stop when the L1 change of an iteration is below this
+    max_iterations: int = 100
+    # the API merges newly completed jobs and re-runs PageRank at most this often
+    refresh_seconds: float = field(
+        default_factory=lambda: float(os.environ.get("SCRAPER_ENGINE_AUTHORITY_REFRESH", "30"))
+    )
@@ -1,269 +1,666 @@
 """Async crawler with politeness and rate limiting."""
 
 import asyncio
+import hashlib
 import logging
-from urllib.parse import urljoin, urlparse
-from urllib.robotparser import RobotFileParser
+import time
+from collections.abc import Awaitable, Callable
+from contextlib import aclosing, asynccontextmanager
+from email.utils import parsedate_to_datetime
 
 import httpx
-from bs4 import BeautifulSoup
 
+from . import sitemaps
+from .archive import ResponseArchive
+from .async_storage import CachedResponse, HttpCache
+from .canonical import UrlCanonicalizer
 from .config import CrawlConfig
-from .extractor import extract
+from .executor import get_executor
+from .priority import FRONTIER_ORDERS, CrawlPriority
+from .robots import get_robots_cache, robots_origin
+from .scheduler import AdaptiveRate, HostScheduler, host_key
+from .seen import make_seen
+from .simhash import NearDuplicateIndex
+from .transport import get_client, transport_counter
+from .urls import DomainMatcher, normalize_url, url_domain
 
 logger = logging.getLogger(__name__)
 
 
-def _normalize_domain(url: str) -> str:
-    p = urlparse(url)
-    d = (p.netloc or "").lower().strip()
-    if d.startswith("www."):
-        d = d[4:]
-    return d
+class RetryLater(Exception):
+    """A fetch failed in a way worth retrying (429/5xx, timeout, dropped connection)."""
 
+    def __init__(self, reason: str, retry_after: float | None = None):
+        super().__init__(reason)
+        self.retry_after = retry_after
 
-def _same_domain(a: str, b: str) -> bool:
-    """Check if two URLs are on the same domain (including subdomains)."""
-    return _normalize_domain(a) == _normalize_domain(b)
 
-def _is_same_base_domain(url: str, base_domain: str) -> bool:
-    """
-    Check if URL belongs to the same base domain, including subdomains.
-    e.g., blog.example.com and www.example.com both match example.com
-    url: full URL (e.g., "https://thelawcodes.com/about")
-    base_domain: domain string (e.g., "thelawcodes.com")
-    """
-    url_domain = _normalize_domain(url)  # Extract domain from URL
-    # base_domain might be a URL or just a domain string
-    if base_domain.startswith(("http://", "https://")):
-        base = _normalize_domain(base_domain)
-    else:
-        # It's already a domain string, just normalize it
-        base = base_domain.lower().strip().replace("www.", "")
-    
-    # Exact match
-    if url_domain == base:
-        return True
-    
-    # Check if URL domain ends with base domain (subdomain case)
-    # e.g., blog.example.com ends with .example.com
-    if url_domain.endswith('.' + base):
-        return True
-    
-    # Reverse check: base might be a subdomain of url_domain
-    if base.endswith('.' + url_domain):
-        return True
-    
-    return False
+def _retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
 
 
-async def _robots_allowed(rp: RobotFileParser | None, url: str, ua: str) -> bool:
-    if rp is None:
-        return True
-    try:
-        return rp.can_fetch(ua, url)
-    except Exception:
+def _is_html(content_type: str | None, allowed: tuple[str, ...]) -> bool:
+    """Content-Type gate; a missing header is let through (the parser copes)."""
+    if not content_type:
         return True
+    return content_type.split(";", 1)[0].strip().lower() in allowed
 
 
-async def fetch_robots(base_url: str, ua: str) -> RobotFileParser | None:
-    try:
-        parsed = urlparse(base_url)
-        robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
-        async with httpx.AsyncClient(timeout=10.0) as c:
-            r = await c.get(robots_url, headers={"User-Agent": ua})
-            if r.status_code != 200:
-                return None
-            rp = RobotFileParser()
-            rp.parse(r.text.splitlines())
-            return rp
-    except Exception as e:
-        logger.warning("robots fetch failed for %s: %s", base_url, e)
-        return None
+async def _read_capped(r: httpx.Response, max_bytes: int) -> tuple[bytes, bool]:
+    """
+    Read at most max_bytes of the (decompressed) body, then stop: the rest is
+    never downloaded. Returns (body, truncated).
+    """
+    declared = r.headers.get("content-length")
+    encoded = r.headers.get("content-encoding")
+    if declared and declared.isdigit() and int(declared) <= max_bytes and not encoded:
+        return await r.aread(), False
+    buf = bytearray()
+    async for chunk in r.aiter_bytes():
+        buf += chunk
+        if len(buf) >= max_bytes:
+            # Leaving the stream context closes the connection without reading on.
+            return bytes(buf[:max_bytes]), True
+    return bytes(buf), False
 
 
 async def crawl(
     seed_urls: list[str],
     target_domain: str,
     config: CrawlConfig | None = None,
+    on_page: Callable[[dict], Awaitable[None]] | None = None,
+    checkpoint: Callable[[dict], Awaitable[None]] | None = None,
+    resume: dict | None = None,
+    http_cache: HttpCache | None = None,
+    archive: ResponseArchive | None = None,
 ) -> list[dict]:
     """
     Crawl seed URLs and same-domain links. Extract links and meta.
-    Returns list of ExtractedPage-like dicts for storage/graph.
+    Runs cfg.max_concurrent workers that drain a shared host-aware frontier;
+    each host is fetched at most once per its politeness delay (the larger of
+    cfg.request_delay_seconds and robots.txt Crawl-delay / Request-rate).
+    With cfg.adaptive_rate the former adapts per host instead: it shrinks and
+    concurrent requests grow while the host answers quickly, and both back off
+    on 429/5xx, timeouts or rising response times. Retryable failures re-queue
+    the URL (up to cfg.max_retries) and pause its host for Retry-After or an
+    exponential backoff.
+
+    Within a host, cfg.frontier_order "priority" fetches the best-scored URL
+    first (shallow, often linked, not pagination/archive/faceted variants,
+    directories not yet over quota; see priority.CrawlPriority), so the page
+    budget covers the site broadly; "fifo" crawls breadth-first.
+
+    With cfg.use_sitemaps the target's sitemaps are streamed alongside the
+    crawl and their URLs queued. With http_cache, a sitemap URL whose lastmod
+    is older than the cached page's last validation is reused without a
+    request.
+
+    With cfg.canonicalize_urls, crawl keys go through canonical.UrlCanonicalizer
+    (tracking / session parameters dropped, the rest sorted, parameters learned
+    per host from near-duplicate pages dropped too), a page's rel=canonical URL
+    counts as seen, and URLs that look like crawler traps are not queued. With
+    cfg.near_duplicate_bits >= 0 a page whose SimHash is that close to an
+    earlier page's is skipped as if already seen: not handed to on_page,
+    though its links are still queued and its fetch counts against the page
+    budget. Neither the canonicalizer nor the SimHash index is kept in
+    checkpoints.
+
+    Returns list of ExtractedPage-like dicts for storage/graph. If on_page is
+    given, each page is awaited into it as soon as it is extracted and not
+    kept in memory; the returned list is then empty.
+
+    With checkpoint, every cfg.checkpoint_every_pages pages the crawl state
+    (frontier incl. in-flight URLs, seen set, pages_done) is awaited into it.
+    The snapshot is taken synchronously right before the call, so it matches
+    exactly the pages handed to on_page so far. Passing that state back as
+    resume continues the crawl where it stopped.
+
+    With http_cache, requests are conditional (If-None-Match / If-Modified-Since
+    from the previous crawl) and a 304 or an unchanged body reuses the stored
+    page instead of extracting it again.
+
+    With archive, every response that gets extracted is appended to it
+    (archive.ResponseArchive) and the page's "archive" entry points at the
+    record; a cached page without one is fetched unconditionally once. The
+    archive is flushed before each checkpoint, so stored pages never point
+    past the end of the file.
     """
     cfg = config or CrawlConfig()
-    seen: set[str] = set()
-    queue: asyncio.Queue[str] = asyncio.Queue()
+    if cfg.frontier_order not in FRONTIER_ORDERS:
+        raise ValueError(
+            f"frontier_order must be one of {FRONTIER_ORDERS}, got {cfg.frontier_order!r}"
+        )
+    if cfg.robots_unreachable not in ("allow", "disallow"):
+        raise ValueError(
+            f"robots_unreachable must be 'allow' or 'disallow', got {cfg.robots_unreachable!r}"
+        )
+    allow_unreachable = cfg.robots_unreachable == "allow"
+    seen = make_seen(cfg.seen_backend)
+    rate = None
+    min_delay = cfg.request_delay_seconds
+    if cfg.adaptive_rate:
+        min_delay = min(cfg.request_delay_seconds, cfg.min_request_delay_seconds)
+        rate = AdaptiveRate(
+            initial_delay=cfg.request_delay_seconds,
+            min_delay=min_delay,
+            max_window=cfg.max_host_concurrency or cfg.max_concurrent,
+            latency_factor=cfg.latency_slowdown_factor,
+        )
+    queue = HostScheduler(
+        min_delay,
+        cfg.max_crawl_delay_seconds,
+        memory_limit=cfg.frontier_memory_limit,
+        rate=rate,
+        retry_backoff=cfg.retry_backoff_seconds,
+        max_backoff=cfg.max_retry_after_seconds,
+        priority=(CrawlPriority(cfg.priority_patterns, cfg.directory_quota)
+                  if cfg.frontier_order == "priority" else None),
+    )
     results: list[dict] = []
-    sem = asyncio.Semaphore(cfg.max_concurrent)
-    robots: dict[str, RobotFileParser | None] = {}
-    
-    # Store first seed URL for normalization closure
+    queue_wait_ms = parse_ms = 0.0
+    robots = get_robots_cache()
+    polite_hosts: set[str] = set()
+    # Relative seeds are resolved against the first seed URL
     first_seed_url = seed_urls[0] if seed_urls else ""
+    # Crawl scope: the target, its subdomains, and hosts the target is a subdomain of
+    in_scope = DomainMatcher(target_domain)
+    canon = None
+    if cfg.canonicalize_urls:
+        canon = UrlCanonicalizer(
+            cfg.ignore_params,
+            learn_after=cfg.learn_params_after if cfg.near_duplicate_bits >= 0 else 0,
+            max_distance=cfg.near_duplicate_bits,
+            max_url_length=cfg.max_url_length,
+            max_path_segments=cfg.max_path_segments,
+            max_segment_repeats=cfg.max_segment_repeats,
+        )
+    near_dups = (
+        NearDuplicateIndex(cfg.near_duplicate_bits) if cfg.near_duplicate_bits >= 0 else None
+    )
+
+    def _canonical(key: str) -> str:
+        return canon.canonical(key) if canon is not None else key
 
     def _normalize(u: str) -> str:
-        """Normalize URL: strip trailing slash, preserve query params, ensure absolute."""
-        u = u.strip()
-        if not u:
-            return u
+        """Normalize URL: strip trailing slash, ensure absolute, canonicalize query params."""
         try:
-            # If relative URL, make it absolute using the first seed URL as base
-            if not u.startswith(("http://", "https://")):
-                if first_seed_url:
-                    from urllib.parse import urljoin
-                    u = urljoin(first_seed_url, u)
-            p = urlparse(u)
-            # Remove fragment, normalize path (keep trailing slash for root)
-            path = p.path
-            if path and path != "/":
-                path = path.rstrip("/")
-            query = f"?{p.query}" if p.query else ""
-            normalized = f"{p.scheme}://{p.netloc}{path}{query}"
-            return normalized
-        except Exception as e:
+            return _canonical(normalize_url(u, first_seed_url))
+        except ValueError as e:
             logger.warning("Failed to normalize URL %s: %s", u, e)
-            return u
+            return u.strip()
+
+    executor = get_executor(cfg.extract_mode, cfg.extract_workers)
+    fetch_stats = {"not_modified": 0, "unchanged": 0, "bytes": 0, "skipped_type": 0, "truncated": 0,
+                   "retried": 0, "gave_up": 0, "near_duplicates": 0, "traps": 0, "canonical": 0,
+                   "relearned": 0}
+    attempts: dict[str, int] = {}  # URL -> retryable failures so far
 
-    async def _fetch_one(client: httpx.AsyncClient, url: str) -> dict | None:
-        async with sem:
-            await asyncio.sleep(cfg.request_delay_seconds)
-        domain = _normalize_domain(url)
+    async def _cache_write(write: Awaitable[None]) -> None:
+        # The revalidation cache is an optimization; losing a write only costs a full fetch later.
+        try:
+            await write
+        except Exception as e:
+            logger.warning("http cache write failed: %s", e)
+
+    def _polite(host: str, rules) -> None:
+        """Apply the host's robots.txt Crawl-delay / Request-rate once."""
+        if host not in polite_hosts:
+            polite_hosts.add(host)
+            queue.set_delay(host, rules.delay(cfg.user_agent))
+
+    async def _fetch_one(client: httpx.AsyncClient, url: str, host: str) -> dict | None:
+        """The page at url, None if there is none to extract; raises RetryLater."""
         if cfg.respect_robots:
-            if domain not in robots:
-                base = f"https://{domain}" if not urlparse(url).scheme else url
-                robots[domain] = await fetch_robots(base, cfg.user_agent)
-            if not await _robots_allowed(robots.get(domain), url, cfg.user_agent):
+            origin = robots_origin(url)
+            rules = robots.peek(origin) or await robots.get(origin, cfg.user_agent, client)
+            _polite(host, rules)
+            if not rules.allowed(url, cfg.user_agent, allow_unreachable):
+                logger.debug("Disallowed by robots.txt: %s", url)
                 return None
+        headers = {"User-Agent": cfg.user_agent}
+        cached = await http_cache.get(url) if http_cache is not None else None
+        if cached is not None and archive is not None and "archive" not in cached.page:
+            cached = None  # extracted before archiving: fetch the body again to archive it
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        started = time.monotonic()
         try:
-            r = await client.get(
+            async with client.stream(
+                "GET",
                 url,
-                headers={"User-Agent": cfg.user_agent},
+                headers=headers,
                 follow_redirects=True,
                 timeout=cfg.timeout_seconds,
-            )
+            ) as r:
+                logger.debug("Fetched headers of %s (status %d)", url, r.status_code)
+                if r.status_code in cfg.retry_statuses:
+                    retry_after = _retry_after(r.headers.get("retry-after"))
+                    raise RetryLater(f"status {r.status_code}", retry_after)
+                queue.record(host, time.monotonic() - started)
+                if r.status_code == 304 and cached is not None:
+                    body, truncated = b"", False
+                elif r.status_code != 200:
+                    logger.debug("Skipping %s: status %d", url, r.status_code)
+                    return None
+                elif not _is_html(r.headers.get("content-type"), cfg.html_content_types):
+                    # Decided on headers alone: the body is never downloaded.
+                    fetch_stats["skipped_type"] += 1
+                    logger.debug("Skipping %s: content type %s", url, r.headers.get("content-type"))
+                    return None
+                else:
+                    body, truncated = await _read_capped(r, cfg.max_body_bytes)
+        except RetryLater:
+            raise
+        except (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError) as e:
+            raise RetryLater(f"{type(e).__name__}: {e}") from e
         except Exception as e:
             logger.warning("fetch failed %s: %s", url, e)
             return None
-        logger.debug("Successfully fetched %s (status %d)", url, r.status_code)
-        if r.status_code != 200:
-            logger.debug("Skipping %s: status %d", url, r.status_code)
-            return None
+        fetch_stats["bytes"] += len(body)
+        etag = r.headers.get("etag")
+        last_modified = r.headers.get("last-modified")
+        if r.status_code == 304:
+            fetch_stats["not_modified"] += 1
+            await _cache_write(http_cache.touch(url, etag, last_modified))
+            return {**cached.page, "queue_wait_ms": 0.0, "parse_ms": 0.0}
+        if truncated:
+            fetch_stats["truncated"] += 1
+            logger.info("Truncated %s at %d bytes; parsing the prefix", url, cfg.max_body_bytes)
         final_url = str(r.url)
-        html = r.text
-        ep = extract(html, final_url, target_domain)
-        return {
-            "url": ep.url,
-            "domain": ep.domain,
-            "title": ep.title,
-            "meta_description": ep.meta_description,
-            "canonical": ep.canonical,
-            "internal_count": ep.internal_count,
-            "external_count": ep.external_count,
-            "follow_count": ep.follow_count,
-            "nofollow_count": ep.nofollow_count,
-            "links": [
-                {
-                    "href": L.href,
-                    "anchor": L.anchor,
-                    "rel": L.rel,
-                    "is_internal": L.is_internal,
-                    "is_nofollow": L.is_nofollow,
-                }
-                for L in ep.links
-            ],
-        }
+        content_hash = b""
+        if http_cache is not None:
+            content_hash = hashlib.blake2b(body, digest_size=16).digest()
+            if (
+                cached is not None
+                and cached.content_hash == content_hash
+                and cached.final_url == final_url
+            ):
+                fetch_stats["unchanged"] += 1
+                await _cache_write(http_cache.touch(url, etag, last_modified))
+                return {**cached.page, "queue_wait_ms": 0.0, "parse_ms": 0.0}
+        page, timing = await executor.extract(
+            body, r.charset_encoding, final_url, target_domain, cfg.extract_engine
+        )
+        if archive is not None:
+            try:
+                page["archive"] = await archive.write(r, body, truncated)
+            except OSError as e:
+                # Only re-extraction needs it; the page itself is fine.
+                logger.warning("archiving %s failed: %s", final_url, e)
+        if http_cache is not None and "no-store" not in r.headers.get("cache-control", ""):
+            entry = CachedResponse(final_url, etag, last_modified, content_hash, page)
+            await _cache_write(http_cache.put(url, entry))
+        page["queue_wait_ms"] = timing.queue_wait_ms
+        page["parse_ms"] = timing.parse_ms
+        logger.debug("Extracted %s: queue wait %.1f ms, parse %.1f ms",
+                     final_url, timing.queue_wait_ms, timing.parse_ms)
+        return page
 
-    for u in seed_urls:
-        u = _normalize(u)
-        if u not in seen:
-            seen.add(u)
-            await queue.put(u)
-
-    async with httpx.AsyncClient(
-        headers={"User-Agent": cfg.user_agent},
-        follow_redirects=True,
-    ) as client:
-        pages_done = 0
-        consecutive_empty = 0
-        max_empty_iterations = 3  # Allow a few empty iterations to catch async queue additions
-        
-        while pages_done < cfg.max_pages_per_domain:
-            # Check if queue is empty
-            if queue.empty():
-                consecutive_empty += 1
-                if consecutive_empty >= max_empty_iterations:
-                    logger.info("Queue empty for %d iterations, stopping crawl. Crawled %d pages.", 
-                               consecutive_empty, pages_done)
-                    break
-                await asyncio.sleep(0.5)  # Brief wait for async queue additions
+    pages_done = 0
+    duplicates_done = 0  # near-duplicates skipped; they use up the page budget too
+    in_flight: dict[str, int] = {}  # URL being fetched -> its depth
+    if resume:
+        seen.restore(resume["seen"])
+        for entry in resume["frontier"]:
+            # [url, depth]; checkpoints written before depth was kept hold bare URLs
+            u, depth = (entry, 0) if isinstance(entry, str) else entry
+            queue.put(u, depth=depth)
+        pages_done = resume["pages_done"]
+        duplicates_done = resume.get("duplicates_done", 0)
+        logger.info("Resuming crawl: %d pages done, %d queued, %d seen",
+                    pages_done, queue.qsize(), len(seen))
+    else:
+        for u in seed_urls:
+            u = _normalize(u)
+            if seen.add(u):
+                queue.put(u)
+
+    last_checkpoint = pages_done
+    checkpointing = False
+    stopping = asyncio.Event()
+    if pages_done + duplicates_done >= cfg.max_pages_per_domain:
+        stopping.set()
+    sink_errors: list[Exception] = []
+
+    boost = queue.boost if queue.priority is not None else None
+
+    def _enqueue_links(url: str, out: dict, depth: int) -> None:
+        """Enqueue same-domain links (including subdomains) we haven't seen; credit the rest."""
+        new_links_count = 0
+        skipped_seen = 0
+        total_links = len(out["links"])
+        internal_links_found = sum(1 for L in out["links"] if L["is_internal"])
+        logger.debug("Page %s: Found %d total links, %d marked as internal",
+                     url, total_links, internal_links_found)
+        credited: set[str] = set()  # a page counts once per URL it links to
+
+        for L in out["links"]:
+            href = L["href"]
+            # Host and crawl key come from extraction; pages reused from the
+            # revalidation cache before they were added still need a parse.
+            if not in_scope.related(L.get("domain") or url_domain(href)):
                 continue
-            
-            consecutive_empty = 0  # Reset counter when we get a URL
-            
             try:
-                url = await asyncio.wait_for(queue.get(), timeout=2.0)
-            except asyncio.TimeoutError:
-                consecutive_empty += 1
-                if consecutive_empty >= max_empty_iterations:
-                    logger.info("Queue timeout, stopping crawl. Crawled %d pages.", pages_done)
-                    break
-                continue
-            
-            if pages_done % 10 == 0 or pages_done < 5:
-                logger.info("Crawling page %d/%d: %s", pages_done + 1, cfg.max_pages_per_domain, url)
-            out = await _fetch_one(client, url)
-            if out is None:
+                key = L.get("normalized")
+                href_normalized = _canonical(key) if key else _normalize(href)
+                if not seen.add(href_normalized):
+                    skipped_seen += 1
+                    if boost is not None and href_normalized not in credited:
+                        credited.add(href_normalized)
+                        boost(href_normalized)
+                    continue
+                if canon is not None and (trap := canon.trap(href_normalized)):
+                    fetch_stats["traps"] += 1
+                    logger.debug("Not queueing %s: %s", href_normalized, trap)
+                    continue
+                if boost is not None:
+                    credited.add(href_normalized)
+                queue.put(href_normalized, depth=depth + 1)
+                new_links_count += 1
+            except Exception as e:
+                logger.warning("Failed to process link %s: %s", href, e)
                 continue
+
+        if new_links_count > 0:
+            logger.debug("Added %d new internal links to queue from %s (skipped %d already seen, "
+                         "total queued: %d, total seen: %d)",
+                         new_links_count, url, skipped_seen, queue.qsize(), len(seen))
+
+    def _snapshot() -> dict:
+        return {
+            "frontier": [[u, d] for u, d in queue.pending() + sorted(in_flight.items())],
+            "seen": seen.state(),
+            "pages_done": pages_done,
+            "duplicates_done": duplicates_done,
+        }
+
+    async def _maybe_checkpoint() -> None:
+        nonlocal last_checkpoint, checkpointing
+        if checkpoint is None or checkpointing:
+            return
+        if pages_done - last_checkpoint < cfg.checkpoint_every_pages:
+            return
+        checkpointing = True
+        last_checkpoint = pages_done
+        try:
+            if archive is not None:
+                archive.flush()
+            await checkpoint(_snapshot())
+        finally:
+            checkpointing = False
+
+    def _retry(url: str, host: str, depth: int, e: RetryLater) -> None:
+        wait = queue.backoff(host, e.retry_after)
+        if stopping.is_set():
+            return
+        n = attempts[url] = attempts.get(url, 0) + 1
+        if n > cfg.max_retries:
+            del attempts[url]
+            fetch_stats["gave_up"] += 1
+            logger.warning("fetch failed %s: %s (gave up after %d attempts)", url, e, n)
+            return
+        fetch_stats["retried"] += 1
+        logger.debug("Retrying %s (%s): attempt %d, %s paused %.1fs", url, e, n + 1, host, wait)
+        queue.put(url, host, front=True, depth=depth)
+
+    def _near_duplicate(url: str, out: dict) -> bool:
+        """Is the page a near-duplicate of one crawled before? Learns parameters from it too."""
+        fp = out.get("simhash") or 0
+        if near_dups is None or not fp or out.get("word_count", 0) < cfg.near_duplicate_min_words:
+            return False
+        if canon is not None:
+            canon.observe(url, fp)
+        dup = near_dups.add(fp, url)
+        if dup is None:
+            return False
+        fetch_stats["near_duplicates"] += 1
+        logger.debug("Skipping %s: near-duplicate of %s (following its links)", url, dup)
+        return True
+
+    def _skip_duplicate(url: str, out: dict, depth: int) -> None:
+        """Count a near-duplicate against the budget and queue its links."""
+        nonlocal duplicates_done
+        duplicates_done += 1
+        if pages_done + duplicates_done >= cfg.max_pages_per_domain:
+            stopping.set()
+        else:
+            _enqueue_links(url, out, depth)
+
+    def _claim_canonical(url: str, out: dict) -> None:
+        """The page's rel=canonical URL has been crawled as url: do not queue it."""
+        target = out.get("canonical")
+        if not target:
+            return
+        key = _normalize(target)
+        if key != url and in_scope.related(url_domain(key)) and seen.add(key):
+            fetch_stats["canonical"] += 1
+
+    async def _accept(url: str, out: dict, depth: int) -> None:
+        """Count a crawled page, queue its links and hand it to the sink."""
+        nonlocal pages_done, queue_wait_ms, parse_ms
+        pages_done += 1
+        queue_wait_ms += out["queue_wait_ms"]
+        parse_ms += out["parse_ms"]
+        if pages_done % 10 == 0 or pages_done <= 5:
+            logger.info("Crawled page %d/%d: %s", pages_done, cfg.max_pages_per_domain, url)
+        if pages_done + duplicates_done >= cfg.max_pages_per_domain:
+            stopping.set()
+        else:
+            if canon is not None:
+                _claim_canonical(url, out)
+            _enqueue_links(url, out, depth)
+        # From here the page belongs to the sink, not to the frontier.
+        in_flight.pop(url, None)
+        if on_page is None:
             results.append(out)
-            pages_done += 1
-
-            # Enqueue same-domain links (including subdomains) we haven't seen
-            new_links_count = 0
-            skipped_seen = 0
-            total_links = len(out["links"])
-            internal_links_found = sum(1 for L in out["links"] if L["is_internal"])
-            logger.info("Page %s: Found %d total links, %d marked as internal", url, total_links, internal_links_found)
-            
-            for L in out["links"]:
-                href = L["href"]
-                is_internal = L["is_internal"]
-                
-                # Check if internal - use base domain matching to include subdomains
-                if not is_internal:
-                    # Double-check: maybe extractor missed it (e.g., subdomain case)
-                    if not _is_same_base_domain(href, target_domain):
-                        continue
-                    # It's actually internal, update our check
-                    is_internal = True
-                    logger.debug("Link %s was not marked internal but matches base domain", href)
+            return
+        try:
+            await on_page(out)
+            await _maybe_checkpoint()
+        except Exception as e:
+            # The sink (storage) failing stops the crawl; crawl() re-raises it.
+            sink_errors.append(e)
+            stopping.set()
+
+    sitemap_stats = {"urls": 0, "queued": 0, "unchanged": 0}
+
+    async def _seed_batch(batch: list[sitemaps.SitemapEntry]) -> None:
+        urls = [_normalize(e.loc) for e in batch]
+        cached: dict[str, CachedResponse] = {}
+        if http_cache is not None:
+            dated = [u for u, e in zip(urls, batch) if e.lastmod is not None and u not in seen]
+            if dated:
+                cached = await http_cache.get_many(dated)
+        for u, e in zip(urls, batch):
+            if stopping.is_set():
+                return
+            if not seen.add(u):
+                continue
+            c = cached.get(u)
+            if c is not None and e.lastmod is not None and c.validated_at is not None \
+                    and e.lastmod <= c.validated_at and (archive is None or "archive" in c.page):
+                # Not modified since we last saw it: no request at all.
+                sitemap_stats["unchanged"] += 1
+                if _near_duplicate(u, c.page):
+                    _skip_duplicate(u, c.page, 1)
                 else:
-                    # Already marked as internal, but verify with base domain check
-                    if not _is_same_base_domain(href, target_domain):
-                        logger.debug("Link %s marked internal but doesn't match base domain", href)
-                        continue
-                
-                # href should already be absolute from extractor, but normalize it
+                    await _accept(u, {**c.page, "queue_wait_ms": 0.0, "parse_ms": 0.0}, 1)
+            else:
+                queue.put(u, depth=1)
+                sitemap_stats["queued"] += 1
+
+    @asynccontextmanager
+    async def _host_turn(url: str):
+        """A sitemap request waits its host's turn like a page request."""
+        host = host_key(url)
+        await queue.acquire(host)
+        try:
+            yield
+        finally:
+            queue.release(host)
+
+    async def _seed_from_sitemaps(client: httpx.AsyncClient) -> None:
+        """Stream the sitemaps of the in-scope seed origins into the frontier."""
+        origins = dict.fromkeys(
+            robots_origin(u) for u in map(_normalize, seed_urls) if in_scope.related(url_domain(u))
+        )
+        batch: list[sitemaps.SitemapEntry] = []
+        try:
+            for origin in origins:
+                rules = robots.peek(origin) or await robots.get(origin, cfg.user_agent, client)
+                if cfg.respect_robots:
+                    _polite(host_key(origin), rules)
+                entries = sitemaps.discover(client, origin, rules, cfg.user_agent,
+                                            cfg.timeout_seconds, cfg.sitemap_max_files,
+                                            slot=_host_turn)
+                async with aclosing(entries):
+                    async for e in entries:
+                        if not in_scope.related(url_domain(e.loc)):
+                            continue
+                        batch.append(e)
+                        sitemap_stats["urls"] += 1
+                        if len(batch) >= 500:
+                            await _seed_batch(batch)
+                            batch = []
+                        if stopping.is_set() or sitemap_stats["urls"] >= cfg.sitemap_max_urls:
+                            break
+                if stopping.is_set() or sitemap_stats["urls"] >= cfg.sitemap_max_urls:
+                    break
+            await _seed_batch(batch)
+        except Exception as e:
+            # Sitemaps only add seeds; the link crawl goes on without them.
+            logger.warning("sitemap seeding failed: %s", e)
+
+    async def _worker(client: httpx.AsyncClient) -> None:
+        while True:
+            url, depth = await queue.get_entry()
+            host = host_key(url)
+            in_flight[url] = depth
+            try:
                 try:
-                    href_normalized = _normalize(href)
-                    if href_normalized in seen:
-                        skipped_seen += 1
+                    if stopping.is_set():
                         continue
-                    seen.add(href_normalized)
-                    await queue.put(href_normalized)
-                    new_links_count += 1
-                    if new_links_count <= 5:  # Log first few
-                        logger.info("Added link to queue: %s", href_normalized)
-                except Exception as e:
-                    logger.warning("Failed to process link %s: %s", href, e)
+                    if canon is not None:
+                        # Parameters learned since url was queued may make it a known page.
+                        key = canon.canonical(url)
+                        if key != url and not seen.add(key):
+                            fetch_stats["relearned"] += 1
+                            continue
+                    out = await _fetch_one(client, url, host)
+                except RetryLater as e:
+                    _retry(url, host, depth, e)
                     continue
-            
-            if new_links_count > 0:
-                logger.info("Added %d new internal links to queue from %s (skipped %d already seen, total queued: %d, total seen: %d)", 
-                           new_links_count, url, skipped_seen, queue.qsize(), len(seen))
-            else:
-                logger.warning("No new internal links found on %s (had %d total links, %d internal, %d already seen)", 
-                              url, total_links, internal_links_found, skipped_seen)
-        
-        logger.info("Crawl completed: %d pages crawled, %d unique URLs seen", pages_done, len(seen))
+                finally:
+                    # The host's slot is free once the page is fetched and parsed.
+                    queue.release(host)
+                if attempts:
+                    attempts.pop(url, None)
+                if out is None or stopping.is_set():
+                    continue
+                if _near_duplicate(url, out):
+                    _skip_duplicate(url, out, depth)
+                    continue
+                await _accept(url, out, depth)
+            except Exception as e:
+                logger.warning("crawl worker failed on %s: %s", url, e)
+            finally:
+                in_flight.pop(url, None)
+                queue.task_done()
+
+    client = get_client(cfg)
+    # N workers drain the shared frontier; the crawl is finished once the
+    # sitemap seeder is done and every queued URL has been processed
+    # (queue.join), or the page budget is spent. Tasks created under the
+    # counter count their requests into this crawl's net stats.
+    with transport_counter() as net:
+        workers = [
+            asyncio.create_task(_worker(client))
+            for _ in range(max(1, cfg.max_concurrent))
+        ]
+        seeder = asyncio.create_task(_seed_from_sitemaps(client)) if cfg.use_sitemaps else None
+
+    async def _drained() -> None:
+        if seeder is not None:
+            await seeder
+        await queue.join()
+
+    drained = asyncio.create_task(_drained())
+    stopped = asyncio.create_task(stopping.wait())
+    tasks = (*workers, *([seeder] if seeder else []), drained, stopped)
+    try:
+        await asyncio.wait({drained, stopped}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        queue.close()
+
+    if http_cache is not None:
+        await _cache_write(http_cache.flush())
+    if archive is not None:
+        archive.flush()
+    if sink_errors:
+        raise sink_errors[0]
+    logger.info("Crawl completed: %d pages crawled, %d unique URLs seen", pages_done, len(seen))
+    if pages_done:
+        logger.info(
+            "Extraction (%s): avg queue wait %.1f ms, avg parse %.1f ms",
+            executor.mode,
+            queue_wait_ms / pages_done,
+            parse_ms / pages_done,
+        )
+    logger.info(
+        "Bodies: %.1f MB downloaded, %d truncated at %d bytes, %d skipped by content type",
+        fetch_stats["bytes"] / 1e6,
+        fetch_stats["truncated"],
+        cfg.max_body_bytes,
+        fetch_stats["skipped_type"],
+    )
+    if sitemap_stats["urls"]:
+        logger.info(
+            "Sitemaps: %d URLs, %d queued, "
+            "%d unchanged since last validated (reused without a request)",
+            sitemap_stats["urls"], sitemap_stats["queued"], sitemap_stats["unchanged"],
+        )
+    if canon is not None or near_dups is not None:
+        learned = (
+            {h: sorted(names) for h, names in canon.learned.items()} if canon is not None else {}
+        )
+        logger.info(
+            "Dedupe: %d near-duplicate pages skipped, %d trap URLs not queued, %d rel=canonical "
+            "URLs marked seen, %d queued URLs dropped by learned parameters %s",
+            fetch_stats["near_duplicates"], fetch_stats["traps"], fetch_stats["canonical"],
+            fetch_stats["relearned"], learned or "",
+        )
+    if archive is not None:
+        logger.info("Archive: %d responses, %.1f MB compressed, appended to %s",
+                    archive.records, archive.bytes / 1e6, archive.file)
+    if fetch_stats["retried"] or fetch_stats["gave_up"]:
+        logger.info(
+            "Retries: %d re-queued, %d URLs given up after %d retries",
+            fetch_stats["retried"], fetch_stats["gave_up"], cfg.max_retries,
+        )
+    if http_cache is not None:
+        logger.info(
+            "Revalidation: %d not modified, %d unchanged bodies",
+            fetch_stats["not_modified"],
+            fetch_stats["unchanged"],
+        )
+    logger.info(
+        "Transport: %d requests over %d new connections (%d reused, %d TLS handshakes, %d HTTP/2)",
+        net.requests, net.connections, net.reused, net.tls_handshakes, net.http2_connections,
+    )
 
     return results
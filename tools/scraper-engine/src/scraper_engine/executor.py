@@ -0,0 +1,113 @@
+"""Run HTML extraction inline, in a thread pool or in a process pool."""
+
+import asyncio
+import codecs
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+
+from .extractor import extract_page, page_to_dict
+
+logger = logging.getLogger(__name__)
+
+EXTRACT_MODES = ("inline", "thread", "process")
+
+
+@dataclass
+class ExtractTiming:
+    queue_wait_ms: float  # submitted -> a worker started parsing
+    parse_ms: float  # decode + parse + extract
+
+
+def _codec(encoding: str | None) -> str:
+    """encoding if Python has a codec for it, else utf-8: pages declare any charset."""
+    if encoding:
+        try:
+            return codecs.lookup(encoding).name
+        except LookupError:
+            pass
+    return "utf-8"
+
+
+def _extract_job(
+    content: bytes,
+    encoding: str | None,
+    page_url: str,
+    target_domain: str,
+    engine: str,
+    submitted_at: float,
+) -> tuple[dict, float, float]:
+    """Pool worker: decode raw bytes, extract, return (page dict, start time, parse seconds)."""
+    started_at = time.time()
+    t0 = time.perf_counter()
+    html = content.decode(_codec(encoding), errors="replace")
+    page = page_to_dict(extract_page(html, page_url, target_domain, engine))
+    return page, started_at, time.perf_counter() - t0
+
+
+class ExtractionExecutor:
+    """
+    Extraction front-end for the crawler.
+
+    "inline" parses on the calling event loop (lowest overhead, blocks the loop).
+    "thread" and "process" hand raw HTML bytes to a pool and get back the compact
+    page dict, so the FastAPI loop keeps serving requests while pages are parsed;
+    "process" also spreads parsing across cores.
+    """
+
+    def __init__(self, mode: str = "inline", workers: int = 0):
+        if mode not in EXTRACT_MODES:
+            raise ValueError(f"extract_mode must be one of {EXTRACT_MODES}, got {mode!r}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self._pool: Executor | None = None
+        if mode == "thread":
+            self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="extract")
+        elif mode == "process":
+            self._pool = ProcessPoolExecutor(self.workers)
+
+    async def extract(
+        self,
+        content: bytes,
+        encoding: str | None,
+        page_url: str,
+        target_domain: str,
+        engine: str = "bs4",
+    ) -> tuple[dict, ExtractTiming]:
+        submitted_at = time.time()
+        args = (content, encoding, page_url, target_domain, engine, submitted_at)
+        if self._pool is None:
+            page, started_at, parse_s = _extract_job(*args)
+        else:
+            loop = asyncio.get_running_loop()
+            page, started_at, parse_s = await loop.run_in_executor(self._pool, _extract_job, *args)
+        return page, ExtractTiming(
+            queue_wait_ms=max(0.0, (started_at - submitted_at) * 1000),
+            parse_ms=parse_s * 1000,
+        )
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+_executors: dict[tuple[str, int], ExtractionExecutor] = {}
+
+
+def get_executor(mode: str = "inline", workers: int = 0) -> ExtractionExecutor:
+    """Process-wide executor per (mode, workers), so pools are reused across crawl jobs."""
+    key = (mode, workers)
+    ex = _executors.get(key)
+    if ex is None:
+        ex = _executors[key] = ExtractionExecutor(mode, workers)
+        logger.info("extraction executor: mode=%s workers=%d", ex.mode, ex.workers)
+    return ex
+
+
+def shutdown_executors() -> None:
+    for ex in _executors.values():
+        ex.shutdown()
+    _executors.clear()
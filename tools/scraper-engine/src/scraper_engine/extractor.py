@@ -1,8 +1,18 @@
 """Extract links, meta, and structure from HTML."""
 
 from dataclasses import dataclass, field
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urljoin, urlsplit
 from bs4 import BeautifulSoup
+from bs4.element import PreformattedString
+
+from .psl import registrable_domain
+from .simhash import simhash, tokens
+from .urls import DomainMatcher, crawl_key, join_url, normalize_host, url_domain
+
+# Text inside these is not page text (get_text() in BeautifulSoup skips it too).
+_NON_TEXT = frozenset(("script", "style", "template"))
+# Page chrome: its links and headings count, its text is left out of word_count and simhash.
+_BOILERPLATE = frozenset(("nav", "header", "footer", "aside"))
 
 
 @dataclass
@@ -12,12 +22,16 @@ class ExtractedLink:
     rel: str
     is_internal: bool
     is_nofollow: bool
+    domain: str = ""  # normalized host of href
+    site: str = ""  # registrable domain (eTLD+1) of href
+    normalized: str = ""  # crawl dedupe key of href (urls.crawl_key)
 
 
 @dataclass
 class ExtractedPage:
     url: str
     domain: str
+    site: str
     title: str
     meta_description: str
     canonical: str | None
@@ -27,24 +41,92 @@ class ExtractedPage:
     external_count: int = 0
     follow_count: int = 0
     nofollow_count: int = 0
+    word_count: int = 0  # words of the page text outside the page chrome (_BOILERPLATE)
+    simhash: int = 0  # simhash.simhash of those words, for near-duplicate detection
+
+
+def _target_matcher(target_domain: str, base_domain: str) -> DomainMatcher:
+    """Internal-link test for the target (URL or domain string); the page's own domain if unset."""
+    return DomainMatcher(target_domain or base_domain)
+
+
+_SKIP_SCHEMES = ("javascript:", "mailto:", "tel:", "data:")
+
+
+def _make_link(
+    page_url: str, href: str, anchor_text: str, rel: list[str], is_target: DomainMatcher
+) -> ExtractedLink | None:
+    """Build an ExtractedLink from raw <a> data; None for links the crawl ignores."""
+    href = (href or "").strip()
+    # Skip anchors, javascript, mailto, tel, etc.
+    if not href or href.startswith("#") or href.lower().startswith(_SKIP_SCHEMES):
+        return None
+
+    # Convert to absolute URL; this is the only parse of the link
+    try:
+        abs_href = join_url(page_url, href)
+        parsed = urlsplit(abs_href)
+        if parsed.scheme not in ("http", "https"):
+            return None
+    except Exception:
+        return None
+
+    anchor = (anchor_text or "").strip()[:500]
+    rel_str = " ".join(r.lower() for r in rel)
+    is_nofollow = "nofollow" in rel_str
+
+    # Internal: the target domain or a subdomain (blog.thelawcodes.com matches thelawcodes.com)
+    domain = normalize_host(parsed.netloc)
+
+    return ExtractedLink(
+        href=abs_href,
+        anchor=anchor,
+        rel=rel_str,
+        is_internal=is_target(domain),
+        is_nofollow=is_nofollow,
+        domain=domain,
+        site=registrable_domain(domain),
+        normalized=crawl_key(parsed),
+    )
 
 
-def _normalize_domain(url: str) -> str:
-    p = urlparse(url)
-    d = (p.netloc or "").lower().strip()
-    if d.startswith("www."):
-        d = d[4:]
-    return d
-
+def _build_page(
+    page_url: str,
+    base_domain: str,
+    title: str,
+    meta_description: str,
+    canonical: str | None,
+    links: list[ExtractedLink],
+    h1: list[str],
+    words: list[str],
+) -> ExtractedPage:
+    internal_count = sum(1 for L in links if L.is_internal)
+    external_count = len(links) - internal_count
+    follow_count = sum(1 for L in links if not L.is_nofollow)
+    nofollow_count = len(links) - follow_count
 
-def _same_domain(url: str, domain: str) -> bool:
-    return _normalize_domain(url) == domain
+    return ExtractedPage(
+        url=page_url,
+        domain=base_domain,
+        site=registrable_domain(base_domain),
+        title=title,
+        meta_description=meta_description,
+        canonical=canonical,
+        links=links,
+        h1=h1,
+        internal_count=internal_count,
+        external_count=external_count,
+        follow_count=follow_count,
+        nofollow_count=nofollow_count,
+        word_count=len(words),
+        simhash=simhash(words),
+    )
 
 
 def extract(html: str, page_url: str, target_domain: str) -> ExtractedPage:
     """Parse HTML and extract links, meta, headings."""
     soup = BeautifulSoup(html, "lxml")
-    base_domain = _normalize_domain(page_url)
+    base_domain = url_domain(page_url)
 
     # Meta
     title = ""
@@ -68,81 +150,65 @@ def extract(html: str, page_url: str, target_domain: str) -> ExtractedPage:
     h1 = [t.get_text(strip=True) for t in soup.find_all("h1") if t.get_text(strip=True)]
 
     # Links - extract all links including those in nav, footer, etc.
+    is_target = _target_matcher(target_domain, base_domain)
     links: list[ExtractedLink] = []
-    # Normalize target domain - handle both URL and domain string formats
-    if target_domain:
-        # If it looks like a URL, extract domain; otherwise use as-is
-        if target_domain.startswith(("http://", "https://")):
-            target_d = _normalize_domain(target_domain)
-        else:
-            # It's already a domain string, just normalize it
-            target_d = target_domain.lower().strip().replace("www.", "")
-    else:
-        target_d = base_domain
-    
     for a in soup.find_all("a", href=True):
-        href = (a["href"] or "").strip()
-        # Skip anchors, javascript, mailto, tel, etc.
-        if not href or href.startswith("#") or href.lower().startswith(("javascript:", "mailto:", "tel:", "data:")):
-            continue
-        
-        # Convert to absolute URL
-        try:
-            abs_href = urljoin(page_url, href)
-            parsed = urlparse(abs_href)
-            if parsed.scheme not in ("http", "https"):
-                continue
-        except Exception as e:
-            continue
-        
-        anchor = (a.get_text() or "").strip()[:500]
         rel = (a.get("rel") or [])
         if isinstance(rel, str):
             rel = [rel]
-        rel_str = " ".join(r.lower() for r in rel)
-        is_nofollow = "nofollow" in rel_str
-        
-        # Check if internal - compare normalized domains (including subdomains)
-        # target_d is already a normalized domain string (e.g., "thelawcodes.com")
-        # abs_href is a full URL (e.g., "https://thelawcodes.com/about")
-        url_domain = _normalize_domain(abs_href)  # Extract domain from full URL
-        target_domain_normalized = target_d.lower().strip()  # target_d is already normalized
-        
-        # Exact match
-        if url_domain == target_domain_normalized:
-            is_internal = True
-        # Subdomain check: blog.thelawcodes.com matches thelawcodes.com
-        elif url_domain.endswith('.' + target_domain_normalized):
-            is_internal = True
-        # Reverse: thelawcodes.com matches www.thelawcodes.com (already handled by normalize)
-        else:
-            is_internal = False
-
-        links.append(
-            ExtractedLink(
-                href=abs_href,
-                anchor=anchor,
-                rel=rel_str,
-                is_internal=is_internal,
-                is_nofollow=is_nofollow,
-            )
-        )
-
-    internal_count = sum(1 for L in links if L.is_internal)
-    external_count = len(links) - internal_count
-    follow_count = sum(1 for L in links if not L.is_nofollow)
-    nofollow_count = len(links) - follow_count
-
-    return ExtractedPage(
-        url=page_url,
-        domain=base_domain,
-        title=title,
-        meta_description=meta_description,
-        canonical=canonical,
-        links=links,
-        h1=h1,
-        internal_count=internal_count,
-        external_count=external_count,
-        follow_count=follow_count,
-        nofollow_count=nofollow_count,
-    )
+        link = _make_link(page_url, a["href"], a.get_text(), rel, is_target)
+        if link is not None:
+            links.append(link)
+
+    # Page text: every text node outside script / style / template and the
+    # page chrome. The tree is done with after this.
+    for t in soup.find_all(_NON_TEXT | _BOILERPLATE):
+        t.decompose()
+    text = (s for s in soup.find_all(string=True) if not isinstance(s, PreformattedString))
+    words = tokens(" ".join(text))
+
+    return _build_page(page_url, base_domain, title, meta_description, canonical, links, h1, words)
+
+
+def extract_page(
+    html: str, page_url: str, target_domain: str, engine: str = "bs4"
+) -> ExtractedPage:
+    """Extract with the configured engine: "bs4" (BeautifulSoup tree) or "fast" (streaming)."""
+    if engine == "fast":
+        from .fast_extractor import extract_fast
+
+        return extract_fast(html, page_url, target_domain)
+    if engine != "bs4":
+        raise ValueError(f"unknown extract engine {engine!r}")
+    return extract(html, page_url, target_domain)
+
+
+def page_to_dict(ep: ExtractedPage) -> dict:
+    """Compact, JSON-ready page record used by the crawler, graph and storage."""
+    return {
+        "url": ep.url,
+        "domain": ep.domain,
+        "site": ep.site,
+        "title": ep.title,
+        "meta_description": ep.meta_description,
+        "canonical": ep.canonical,
+        "internal_count": ep.internal_count,
+        "external_count": ep.external_count,
+        "follow_count": ep.follow_count,
+        "nofollow_count": ep.nofollow_count,
+        "word_count": ep.word_count,
+        "simhash": ep.simhash,
+        "links": [
+            {
+                "href": L.href,
+                "anchor": L.anchor,
+                "rel": L.rel,
+                "is_internal": L.is_internal,
+                "is_nofollow": L.is_nofollow,
+                "domain": L.domain,
+                "site": L.site,
+                "normalized": L.normalized,
+            }
+            for L in ep.links
+        ],
+    }
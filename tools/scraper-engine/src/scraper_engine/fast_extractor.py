@@ -0,0 +1,199 @@
+"""
+Streaming extractor: same ExtractedPage as extractor.extract, without a DOM.
+
+Drives lxml's HTML parser with a target object, so the parse events are the
+ones BeautifulSoup's lxml builder sees, but no tree is built: only <a>, <title>,
+<meta>, <link rel=canonical> and <h1> are looked at, and anchor / heading text
+is collected incrementally while those elements are open. The other text nodes
+outside page chrome (_BOILERPLATE) are only kept for the word count and SimHash.
+"""
+
+from urllib.parse import urljoin
+
+from lxml import etree
+
+from .extractor import (
+    _BOILERPLATE,
+    _NON_TEXT,
+    ExtractedLink,
+    ExtractedPage,
+    _build_page,
+    _make_link,
+    _target_matcher,
+)
+from .simhash import tokens
+from .urls import url_domain
+
+
+class _Target:
+    """lxml parser target collecting the fields ExtractedPage needs."""
+
+    def __init__(self) -> None:
+        self.title: str | None = None
+        self._title_parts: list[str] | None = None
+        self._title_children = 0
+        self._title_done = False
+        self.meta_name: str | None = None  # content of first <meta name="description">
+        self.meta_name_seen = False
+        self.meta_og: str | None = None  # content of first <meta property="og:description">
+        self.meta_og_seen = False
+        self.canonical_href: str | None = None
+        self.canonical_seen = False
+        self._head_done = False
+        # Open <a href> elements: (slot index, text chunks); text goes to all of them.
+        self._anchors: list[tuple[int, list[str]]] = []
+        self.anchors: list[tuple[str, str, list[str]]] = []
+        self._anchor_depth: list[bool] = []  # per open <a>: does it carry href?
+        self._h1: list[tuple[int, list[str]]] = []
+        self.h1: list[str] = []  # one slot per <h1>, in document order
+        self._skip = 0  # depth inside script/style
+        self._chrome = 0  # depth inside nav/header/footer/aside
+        # lxml may split one text node into several data() calls (e.g. around
+        # entities); BeautifulSoup joins them, so buffer until the next event.
+        self._text: list[str] = []
+        self.texts: list[str] = []  # every text node outside script/style/template and chrome
+
+    def start(self, tag, attrib) -> None:
+        if self._text:
+            self._flush()
+        if not isinstance(tag, str):
+            return
+        if self._title_parts is not None:
+            self._title_children += 1
+        if tag == "a":
+            has_href = "href" in attrib
+            self._anchor_depth.append(has_href)
+            if has_href:
+                rel = attrib.get("rel")
+                self._anchors.append((len(self.anchors), []))
+                self.anchors.append((attrib["href"], "", rel.split() if rel else []))
+            return
+        if tag == "h1":
+            self._h1.append((len(self.h1), []))
+            self.h1.append("")
+            return
+        if tag in _NON_TEXT:
+            self._skip += 1
+            return
+        if tag in _BOILERPLATE:
+            self._chrome += 1
+            return
+        if self._head_done:
+            # Metadata is complete once <head> has closed and every field was seen.
+            return
+        if tag == "title" and not self._title_done:
+            self._title_parts = []
+            self._title_children = 0
+        elif tag == "meta":
+            if not self.meta_name_seen and attrib.get("name") == "description":
+                self.meta_name_seen = True
+                self.meta_name = attrib.get("content")
+            elif not self.meta_og_seen and attrib.get("property") == "og:description":
+                self.meta_og_seen = True
+                self.meta_og = attrib.get("content")
+        elif tag == "link" and not self.canonical_seen:
+            rel = attrib.get("rel")
+            if rel and ("canonical" in rel.split() or rel == "canonical"):
+                self.canonical_seen = True
+                self.canonical_href = attrib.get("href")
+
+    def end(self, tag) -> None:
+        if self._text:
+            self._flush()
+        if not isinstance(tag, str):
+            return
+        if tag == "a":
+            if self._anchor_depth and self._anchor_depth.pop():
+                slot, parts = self._anchors.pop()
+                href, _, rel = self.anchors[slot]
+                self.anchors[slot] = (href, "".join(parts), rel)
+        elif tag == "h1":
+            if self._h1:
+                slot, parts = self._h1.pop()
+                self.h1[slot] = "".join(parts)
+        elif tag in _NON_TEXT:
+            self._skip = max(0, self._skip - 1)
+        elif tag in _BOILERPLATE:
+            self._chrome = max(0, self._chrome - 1)
+        elif tag == "title" and self._title_parts is not None and not self._title_done:
+            if self._title_children == 0 and self._title_parts:
+                self.title = "".join(self._title_parts)
+            self._title_parts = None
+            self._title_done = True
+        elif tag == "head":
+            self._head_done = (
+                self._title_done and self.meta_name_seen and self.canonical_seen
+            )
+
+    def data(self, text: str) -> None:
+        self._text.append(text)
+
+    def comment(self, text: str) -> None:
+        if self._text:
+            self._flush()
+        if self._title_parts is not None:
+            self._title_children += 1
+
+    def _flush(self) -> None:
+        text = "".join(self._text)
+        self._text.clear()
+        if self._skip:
+            return
+        if not self._chrome:
+            self.texts.append(text)
+        if self._title_parts is not None:
+            self._title_parts.append(text)
+        for _, parts in self._anchors:
+            parts.append(text)
+        if self._h1:
+            stripped = text.strip()
+            if stripped:
+                for _, parts in self._h1:
+                    parts.append(stripped)
+
+    def close(self) -> "_Target":
+        if self._text:
+            self._flush()
+        # Elements still open at EOF keep the text collected so far.
+        while self._anchors:
+            slot, parts = self._anchors.pop()
+            href, _, rel = self.anchors[slot]
+            self.anchors[slot] = (href, "".join(parts), rel)
+        while self._h1:
+            slot, parts = self._h1.pop()
+            self.h1[slot] = "".join(parts)
+        if self._title_parts is not None and self._title_children == 0 and self._title_parts:
+            self.title = "".join(self._title_parts)
+        return self
+
+
+def extract_fast(html: str | bytes, page_url: str, target_domain: str) -> ExtractedPage:
+    """Streaming equivalent of extractor.extract."""
+    target = _Target()
+    parser = etree.HTMLParser(target=target, recover=True)
+    try:
+        parser.feed(html)
+        parser.close()
+    except etree.LxmlError:
+        target.close()
+    base_domain = url_domain(page_url)
+
+    title = target.title.strip()[:500] if target.title else ""
+
+    content = target.meta_name if target.meta_name_seen else target.meta_og
+    meta_description = content.strip()[:1000] if content else ""
+
+    canonical = None
+    if target.canonical_href:
+        canonical = urljoin(page_url, target.canonical_href).strip()
+
+    is_target = _target_matcher(target_domain, base_domain)
+    links: list[ExtractedLink] = []
+    for href, text, rel in target.anchors:
+        link = _make_link(page_url, href, text, rel, is_target)
+        if link is not None:
+            links.append(link)
+
+    h1 = [t for t in target.h1 if t]
+    words = tokens(" ".join(target.texts))
+    return _build_page(page_url, base_domain, title, meta_description, canonical, links, h1, words)
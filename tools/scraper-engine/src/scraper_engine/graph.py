@@ -1,53 +1,82 @@
 """Link graph and derived metrics from crawl results."""
 
-from collections import defaultdict
-from urllib.parse import urlparse
+import math
 
+from .psl import registrable_domain
+from .urls import normalize_target, url_domain
 
-def _normalize_domain(url: str) -> str:
-    p = urlparse(url)
-    d = (p.netloc or "").lower().strip()
-    if d.startswith("www."):
-        d = d[4:]
-    return d
 
-
-def build_graph_and_metrics(
-    pages: list[dict],
-    target_domain: str,
-) -> dict:
+class MetricsAccumulator:
     """
-    Build link graph from crawl results and compute metrics.
-    Returns dict with referring_domains, total_backlinks, follow_pct, etc.
+    Incremental link metrics: feed pages one at a time with add(), read
+    result() at any point. Memory is bounded by the number of referring
+    domains, plus the backlink list itself only when keep_backlinks is set.
     """
-    target = _normalize_domain(target_domain)
-    # Backlinks: (source_url, target_url) where target is our domain
-    backlinks: list[tuple[str, str, str, bool]] = []
-    outbound: list[tuple[str, str, str, bool]] = []
-
-    for p in pages:
-        src = p["url"]
-        src_domain = _normalize_domain(src)
-        for L in p.get("links", []):
+
+    def __init__(self, target_domain: str, keep_backlinks: bool = True):
+        self.target_domain = target_domain
+        self.target = normalize_target(target_domain)  # URL or bare domain
+        self.target_site = registrable_domain(self.target)
+        self.keep_backlinks = keep_backlinks
+        self.pages = 0
+        self.total_backlinks = 0
+        self.follow = 0
+        self.referring: set[str] = set()  # registrable domains (eTLD+1) of referrers
+        # Backlinks: (source_url, target_url) where target is our domain
+        self.backlinks: list[tuple[str, str, str, bool]] = []
+
+    def add(self, page: dict) -> None:
+        self.pages += 1
+        src = page["url"]
+        src_site = page.get("site") or registrable_domain(page.get("domain") or url_domain(src))
+        for L in page.get("links", []):
             href = L["href"]
-            anchor = L.get("anchor", "")
-            nofollow = L.get("is_nofollow", False)
-            tgt_domain = _normalize_domain(href)
-            if tgt_domain == target:
-                # Backlink only if source is *external* (referrer), not same domain
-                if src_domain != target:
-                    backlinks.append((src, href, anchor, nofollow))
-            else:
-                outbound.append((src, href, anchor, nofollow))
-
-    referring_domains = len({_normalize_domain(s) for s, _, _, _ in backlinks})
-    total_backlinks = len(backlinks)
-    follow = sum(1 for _, _, _, nf in backlinks if not nf)
+            tgt_domain = L.get("domain") or url_domain(href)
+            # Backlink only if source is another site (referrer), not the target's own
+            if tgt_domain == self.target and src_site != self.target_site:
+                nofollow = L.get("is_nofollow", False)
+                self.total_backlinks += 1
+                if not nofollow:
+                    self.follow += 1
+                self.referring.add(src_site)
+                if self.keep_backlinks:
+                    self.backlinks.append((src, href, L.get("anchor", ""), nofollow))
+
+    def state(self) -> dict:
+        """Counters to persist in a crawl checkpoint (backlinks are in storage)."""
+        return {
+            "pages": self.pages,
+            "total_backlinks": self.total_backlinks,
+            "follow": self.follow,
+            "referring": sorted(self.referring),
+        }
+
+    def restore(self, state: dict) -> None:
+        self.pages = state["pages"]
+        self.total_backlinks = state["total_backlinks"]
+        self.follow = state["follow"]
+        self.referring = set(state["referring"])
+
+    def result(self) -> dict:
+        out = link_metrics(self.target_domain, len(self.referring), self.total_backlinks,
+                           self.follow, self.pages)
+        if self.keep_backlinks:
+            out["backlinks"] = [
+                {"source": s, "target": t, "anchor": a, "nofollow": nf}
+                for s, t, a, nf in self.backlinks
+            ]
+        return out
+
+
+def link_metrics(
+    target_domain: str, referring_domains: int, total_backlinks: int, follow: int, pages: int
+) -> dict:
+    """Metrics dict from backlink counters (shared by MetricsAccumulator and LinkGraph)."""
     nofollow = total_backlinks - follow
     follow_pct = (100 * follow / total_backlinks) if total_backlinks else 0.0
 
-    # Estimated "DA-like" score (your own formula; label as Estimated in UI)
-    import math
+    # Estimated "DA-like" score (your own formula; label as Estimated in UI). The API
+    # reports the link-graph authority score (authority.py) instead when it has one.
     da_est = min(
         100,
         max(
@@ -65,9 +94,21 @@ def build_graph_and_metrics(
         "nofollow_count": nofollow,
         "follow_pct": round(follow_pct, 2),
         "estimated_da": round(da_est, 1),
-        "pages_crawled": len(pages),
-        "backlinks": [
-            {"source": s, "target": t, "anchor": a, "nofollow": nf}
-            for s, t, a, nf in backlinks
-        ],
+        "pages_crawled": pages,
     }
+
+
+def build_graph_and_metrics(
+    pages: list[dict],
+    target_domain: str,
+) -> dict:
+    """
+    Build link graph from crawl results and compute metrics.
+    Returns dict with referring_domains, total_backlinks, follow_pct, etc.
+    For metrics across several crawls, merge them into one linkgraph.LinkGraph.
+    """
+    from .linkgraph import LinkGraph
+
+    graph = LinkGraph()
+    graph.merge(pages)
+    return graph.metrics(target_domain, backlinks=None)
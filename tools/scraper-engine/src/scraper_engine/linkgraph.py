@@ -0,0 +1,257 @@
+"""
+Cross-job link graph with interned node ids and array-backed edges.
+
+URLs (by crawl key), hosts, sites (eTLD+1) and anchors are interned to dense
+integer ids; edges are parallel array('i') columns (source url, target url,
+anchor) plus an array('B') of flags. A page's out-edges are appended as one
+contiguous range. Merging a newer crawl of the same page retires its previous
+range, so the graph always reflects the latest crawl of every page. A job
+merged again (re-extracted) keeps its place in that order: its pages replace
+their earlier version, not a later crawl of the same URL.
+
+Backlink aggregates per target host (links, follow links and the number of
+links from each referring site) are kept up to date on every merge, so
+metrics() for a domain is O(referring sites) however many crawls were merged.
+"""
+
+from array import array
+from collections.abc import Iterable
+
+from .graph import link_metrics
+from .psl import registrable_domain
+from .urls import normalize_target, normalize_url, url_domain
+
+NOFOLLOW = 1
+_DEAD = 2  # edge retired by a later crawl of its source page
+
+
+class Interner:
+    """Bidirectional str <-> dense int id map."""
+
+    __slots__ = ("_ids", "_keys")
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self._keys: list[str] = []
+
+    def id(self, key: str) -> int:
+        i = self._ids.get(key)
+        if i is None:
+            i = self._ids[key] = len(self._keys)
+            self._keys.append(key)
+        return i
+
+    def get(self, key: str) -> int | None:
+        return self._ids.get(key)
+
+    def key(self, i: int) -> str:
+        return self._keys[i]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+
+class LinkGraph:
+    def __init__(self) -> None:
+        self.urls = Interner()
+        self.hosts = Interner()
+        self.sites = Interner()
+        self.anchors = Interner()
+        self.url_host = array("i")  # url id -> host id
+        self.host_site = array("i")  # host id -> site id
+        # edge columns
+        self.src = array("i")
+        self.dst = array("i")
+        self.anchor = array("i")
+        self.flags = array("B")
+        self.dead = 0
+        self.version = 0  # bumped on every change (authority scores are cached per version)
+        self.jobs: dict[int, int] = {}  # job ids merged so far -> the revision merged
+        self._job_rank: dict[int, int] = {}  # job id -> its place in merge order
+        self._merges = 0
+        # source url id -> its edge range and the rank of the merge it came from
+        self._out: dict[int, tuple[int, int, int]] = {}
+        self._inbound: dict[int, array] = {}  # target host id -> backlink edge ids
+        # target host id -> {referring site id: [links, follow links]}
+        self._ref: dict[int, dict[int, list[int]]] = {}
+
+    # -- building -----------------------------------------------------------
+
+    def _url(self, key: str, host: str | None = None, site: str | None = None) -> int:
+        uid = self.urls.get(key)
+        if uid is not None:
+            return uid
+        host = host or url_domain(key)
+        hid = self.hosts.get(host)
+        if hid is None:
+            hid = self.hosts.id(host)
+            self.host_site.append(self.sites.id(site or registrable_domain(host)))
+        self.url_host.append(hid)
+        return self.urls.id(key)
+
+    def _count(self, dst_host: int, src_site: int, flags: int, delta: int) -> None:
+        refs = self._ref.setdefault(dst_host, {})
+        c = refs.get(src_site)
+        if c is None:
+            c = refs[src_site] = [0, 0]
+        c[0] += delta
+        if not flags & NOFOLLOW:
+            c[1] += delta
+        if c[0] == 0:
+            del refs[src_site]
+
+    def _is_backlink(self, e: int) -> tuple[int, int] | None:
+        """(target host, source site) if edge e crosses sites, else None."""
+        dst_host = self.url_host[self.dst[e]]
+        src_site = self.host_site[self.url_host[self.src[e]]]
+        return None if self.host_site[dst_host] == src_site else (dst_host, src_site)
+
+    def _retire(self, start: int, end: int) -> None:
+        for e in range(start, end):
+            hit = self._is_backlink(e)
+            if hit is not None:
+                self._count(hit[0], hit[1], self.flags[e], -1)
+            self.flags[e] |= _DEAD
+        self.dead += end - start
+
+    def add_page(self, page: dict, rank: int | None = None) -> bool:
+        """
+        Merge one crawled page (a crawler page dict), replacing any earlier
+        crawl of its URL; False if a later merge than rank (default: the
+        latest) already has it.
+        """
+        rank = self._merges if rank is None else rank
+        # Keyed like link targets, so /about/ crawled and /about linked are one node.
+        src = self._url(normalize_url(page["url"]), page.get("domain"), page.get("site"))
+        old = self._out.get(src)
+        if old is not None:
+            if old[2] > rank:
+                return False
+            self._retire(old[0], old[1])
+        # bound lookups: this loop runs once per edge
+        url_id, anchor_get = self.urls._ids.get, self.anchors._ids.get
+        url_host, host_site = self.url_host, self.host_site
+        src_site = host_site[url_host[src]]
+        start = e = len(self.src)
+        dsts = array("i")
+        anchors = array("i")
+        flags = array("B")
+        for L in page.get("links", ()):
+            key = L.get("normalized") or normalize_url(L["href"])
+            dst = url_id(key)
+            if dst is None:
+                dst = self._url(key, L.get("domain"), L.get("site"))
+            f = NOFOLLOW if L.get("is_nofollow") else 0
+            dsts.append(dst)
+            text = L.get("anchor") or ""
+            a = anchor_get(text)
+            anchors.append(self.anchors.id(text) if a is None else a)
+            flags.append(f)
+            dst_host = url_host[dst]
+            if host_site[dst_host] != src_site:
+                self._count(dst_host, src_site, f, 1)
+                inbound = self._inbound.get(dst_host)
+                if inbound is None:
+                    inbound = self._inbound[dst_host] = array("i")
+                inbound.append(e)
+            e += 1
+        self.src.extend(array("i", [src]) * len(dsts))
+        self.dst.extend(dsts)
+        self.anchor.extend(anchors)
+        self.flags.extend(flags)
+        self._out[src] = (start, e, rank)
+        self.version += 1
+        if self.dead > 100_000 and self.dead > len(self.src) // 2:
+            self.compact()
+        return True
+
+    def merge(self, pages: Iterable[dict], job_id: int | None = None, revision: int = 0) -> int:
+        """
+        Merge a crawl's pages in crawl order; returns how many were merged.
+        A job_id merged before is merged again in its original place.
+        """
+        rank = self._job_rank.get(job_id) if job_id is not None else None
+        if rank is None:
+            self._merges += 1
+            rank = self._merges
+            if job_id is not None:
+                self._job_rank[job_id] = rank
+        n = 0
+        for page in pages:
+            n += self.add_page(page, rank)
+        if job_id is not None:
+            self.jobs[job_id] = revision
+        return n
+
+    def compact(self) -> None:
+        """Drop retired edges and renumber the live ones."""
+        src, dst, anchor, flags = array("i"), array("i"), array("i"), array("B")
+        out: dict[int, tuple[int, int, int]] = {}
+        for uid, (start, end, rank) in self._out.items():
+            first = len(src)
+            src.extend(self.src[start:end])
+            dst.extend(self.dst[start:end])
+            anchor.extend(self.anchor[start:end])
+            flags.extend(self.flags[start:end])
+            out[uid] = (first, len(src), rank)
+        self.src, self.dst, self.anchor, self.flags = src, dst, anchor, flags
+        self._out = out
+        self.dead = 0
+        self._inbound = {}
+        for e in range(len(self.src)):
+            hit = self._is_backlink(e)
+            if hit is not None:
+                self._inbound.setdefault(hit[0], array("i")).append(e)
+
+    # -- queries ------------------------------------------------------------
+
+    @property
+    def pages(self) -> int:
+        return len(self._out)
+
+    @property
+    def edges(self) -> int:
+        return len(self.src) - self.dead
+
+    def metrics(self, target_domain: str, backlinks: int | None = 0) -> dict:
+        """
+        MetricsAccumulator.result()-shaped metrics for target_domain over every
+        merged crawl, plus up to `backlinks` backlinks (None = all, 0 = none).
+        """
+        hid = self.hosts.get(normalize_target(target_domain))
+        refs = self._ref.get(hid, {}) if hid is not None else {}
+        total = sum(c[0] for c in refs.values())
+        follow = sum(c[1] for c in refs.values())
+        out = link_metrics(target_domain, len(refs), total, follow, self.pages)
+        if backlinks != 0:
+            out["backlinks"] = self.backlinks(target_domain, backlinks)
+        return out
+
+    def backlinks(self, target_domain: str, limit: int | None = 100) -> list[dict]:
+        hid = self.hosts.get(normalize_target(target_domain))
+        out: list[dict] = []
+        for e in self._inbound.get(hid, ()) if hid is not None else ():
+            f = self.flags[e]
+            if f & _DEAD:
+                continue
+            out.append({
+                "source": self.urls.key(self.src[e]),
+                "target": self.urls.key(self.dst[e]),
+                "anchor": self.anchors.key(self.anchor[e]),
+                "nofollow": bool(f & NOFOLLOW),
+            })
+            if limit is not None and len(out) >= limit:
+                break
+        return out
+
+    def referring_sites(self, target_domain: str) -> list[tuple[str, int, int]]:
+        """(site, links, follow links) for every site linking to target_domain, most links first."""
+        hid = self.hosts.get(normalize_target(target_domain))
+        refs = self._ref.get(hid, {}) if hid is not None else {}
+        rows = [(self.sites.key(s), c[0], c[1]) for s, c in refs.items()]
+        return sorted(rows, key=lambda r: (-r[1], r[0]))
+
+    def nbytes(self) -> int:
+        """Bytes held by the id and edge arrays (excluding interned strings)."""
+        cols = (self.url_host, self.host_site, self.src, self.dst, self.anchor, self.flags)
+        return sum(a.itemsize * len(a) for a in cols)
@@ -0,0 +1,181 @@
+"""
+Crawl frontier order within a host: which queued URL is fetched next.
+
+CrawlPriority scores a URL, lower first, from:
+- its link depth;
+- the links to it seen so far;
+- penalties for URL patterns that rarely lead anywhere new (pagination, tag
+  and date archives, sort/filter/session query strings, each query parameter);
+- a per-directory quota: every `directory_quota` pages fetched from one
+  directory (host + first path segment) push the rest of it back by
+  `quota_penalty`.
+
+UrlHeap is one host's queue in score order, used by HostScheduler in place of
+its FIFO deque.
+"""
+
+import heapq
+import itertools
+import math
+import re
+from collections.abc import Iterator
+
+from .config import PRIORITY_PATTERNS
+
+FRONTIER_ORDERS = ("priority", "fifo")
+
+
+def directory(url: str) -> str:
+    """Quota key of url: scheme://host plus its first path segment, if that is a directory."""
+    start = url.find("/", url.find("//") + 2)
+    if start < 0:
+        return url
+    end = len(url)
+    for c in "?#":
+        i = url.find(c, start)
+        if 0 <= i < end:
+            end = i
+    slash = url.find("/", start + 1, end)
+    return url[:slash] if slash >= 0 else url[:start]
+
+
+class CrawlPriority:
+    """Frontier scoring policy (lower scores are fetched first)."""
+
+    def __init__(
+        self,
+        patterns: tuple[tuple[str, float], ...] = PRIORITY_PATTERNS,
+        directory_quota: int = 25,
+        depth_weight: float = 1.0,
+        inlink_weight: float = 1.0,
+        query_param_penalty: float = 0.5,
+        quota_penalty: float = 2.0,
+    ):
+        self.patterns = [(re.compile(p, re.IGNORECASE), w) for p, w in patterns]
+        self.directory_quota = directory_quota
+        self.depth_weight = depth_weight
+        self.inlink_weight = inlink_weight
+        self.query_param_penalty = query_param_penalty
+        self.quota_penalty = quota_penalty
+        self._fetched: dict[str, int] = {}  # directory -> URLs handed out
+
+    def base(self, url: str, depth: int) -> tuple[float, str]:
+        """The part of url's score that never changes, and its directory."""
+        s = depth * self.depth_weight
+        for rx, w in self.patterns:
+            if rx.search(url):
+                s += w
+        q = url.find("?")
+        if q >= 0:
+            s += self.query_param_penalty * (url.count("&", q) + 1)
+        return s, directory(url)
+
+    def score(self, base: float, directory: str, inlinks: int) -> float:
+        s = base - self.inlink_weight * math.log2(1 + inlinks)
+        if self.directory_quota:
+            s += self.quota_penalty * (self._fetched.get(directory, 0) // self.directory_quota)
+        return s
+
+    def dispatched(self, directory: str) -> None:
+        self._fetched[directory] = self._fetched.get(directory, 0) + 1
+
+
+class _Entry:
+    __slots__ = ("queue", "base", "directory", "depth", "inlinks", "score")
+
+    def __init__(self, queue: "UrlHeap", base: float, directory: str, depth: int, score: float):
+        self.queue = queue
+        self.base = base
+        self.directory = directory
+        self.depth = depth
+        self.inlinks = 0
+        self.score = score
+
+
+class UrlHeap:
+    """
+    One host's queued URLs, lowest score first.
+
+    Scores improve eagerly: boost() pushes a better heap item and the old one
+    is skipped when it surfaces. They worsen lazily: pop_next() re-scores the
+    best item and puts it back if its directory quota filled up meanwhile.
+    `entries` (URL -> entry, which knows its UrlHeap) is shared by all hosts
+    of a HostScheduler, so a link can be credited without parsing its host.
+    """
+
+    __slots__ = ("policy", "entries", "_heap", "_n", "_seq")
+
+    def __init__(self, policy: CrawlPriority, entries: dict[str, _Entry]):
+        self.policy = policy
+        self.entries = entries
+        self._heap: list[tuple[float, int, str]] = []
+        self._n = 0
+        self._seq = itertools.count()  # FIFO among equal scores
+
+    def __len__(self) -> int:
+        return self._n
+
+    def __iter__(self) -> Iterator[str]:
+        entries = self.entries
+        for score, _, url in self._heap:
+            e = entries.get(url)
+            if e is not None and e.score == score:
+                yield url
+
+    def queued(self) -> Iterator[tuple[str, int]]:
+        """(url, depth) of every queued URL."""
+        entries = self.entries
+        for url in self:
+            yield url, entries[url].depth
+
+    def best(self) -> float:
+        """Score of the best queued URL (possibly of one already handed out: a lower bound)."""
+        return self._heap[0][0] if self._heap else math.inf
+
+    def push(self, url: str, depth: int = 0) -> None:
+        base, d = self.policy.base(url, depth)
+        e = self.entries[url] = _Entry(self, base, d, depth, self.policy.score(base, d, 0))
+        self._n += 1
+        heapq.heappush(self._heap, (e.score, next(self._seq), url))
+
+    def push_front(self, url: str, depth: int = 0) -> None:
+        """Queue url ahead of everything else (a retry)."""
+        base, d = self.policy.base(url, depth)
+        self.entries[url] = _Entry(self, base, d, depth, -math.inf)
+        self._n += 1
+        heapq.heappush(self._heap, (-math.inf, next(self._seq), url))
+
+    def boost(self, e: _Entry, url: str) -> None:
+        """Credit one more link to url, queued here as entry e."""
+        e.inlinks += 1
+        s = self.policy.score(e.base, e.directory, e.inlinks)
+        if s < e.score:
+            e.score = s
+            heapq.heappush(self._heap, (s, next(self._seq), url))
+            if len(self._heap) > 2 * self._n + 64:
+                self._compact()
+
+    def pop_next(self) -> tuple[str, int]:
+        """Best (url, depth); the queue must not be empty."""
+        heap, entries, policy = self._heap, self.entries, self.policy
+        while True:
+            score, _, url = heapq.heappop(heap)
+            e = entries.get(url)
+            if e is None or e.score != score:
+                continue  # superseded by a boost, or already handed out
+            if score != -math.inf:
+                now = policy.score(e.base, e.directory, e.inlinks)
+                if now > score:
+                    e.score = now
+                    heapq.heappush(heap, (now, next(self._seq), url))
+                    continue
+            del entries[url]
+            self._n -= 1
+            policy.dispatched(e.directory)
+            return url, e.depth
+
+    def _compact(self) -> None:
+        entries = self.entries
+        self._heap = [item for item in self._heap
+                      if (e := entries.get(item[2])) is not None and e.score == item[0]]
+        heapq.heapify(self._heap)
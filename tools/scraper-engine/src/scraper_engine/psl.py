@@ -0,0 +1,106 @@
+"""
+Registrable domains (eTLD+1) from the Public Suffix List.
+
+The list is bundled as data/public_suffix_list.dat (from
+https://publicsuffix.org/list/; MPL 2.0), so lookups never hit the network;
+refresh that file to pick up new suffixes. Both the ICANN and the private
+section are used, so a.blogspot.com and b.blogspot.com are separate sites,
+while www.example.co.uk and shop.example.co.uk are one.
+
+The rules are compiled on first use into a trie keyed by labels from the
+right; a lookup walks it once, O(labels), and results are memoized per host.
+"""
+
+from functools import lru_cache
+from importlib.resources import files
+
+SITE_CACHE_SIZE = 65_536  # distinct hosts memoized by registrable_domain
+
+_RULE = "$"  # trie node key: a rule ends here
+_EXCEPTION = "!"  # trie node key: an exception rule ends here
+
+_trie: dict | None = None
+
+
+def _labels(rule: str) -> list[list[str]]:
+    """Label lists (right to left) for a rule: as written, plus the punycode form of IDN rules."""
+    labels = rule.split(".")[::-1]
+    out = [labels]
+    if not rule.isascii():
+        try:
+            out.append([lb if lb == "*" else lb.encode("idna").decode() for lb in labels])
+        except UnicodeError:
+            pass
+    return out
+
+
+def compile_rules(lines) -> dict:
+    """Build the suffix trie from Public Suffix List lines."""
+    root: dict = {}
+    for line in lines:
+        rule = line.split(None, 1)[0] if line.strip() else ""
+        if not rule or rule.startswith("//"):
+            continue
+        rule = rule.lower()
+        mark = _RULE
+        if rule.startswith("!"):
+            rule, mark = rule[1:], _EXCEPTION
+        for labels in _labels(rule):
+            node = root
+            for lb in labels:
+                node = node.setdefault(lb, {})
+            node[mark] = True
+    return root
+
+
+def _get_trie() -> dict:
+    global _trie
+    if _trie is None:
+        data = files(__package__).joinpath("data", "public_suffix_list.dat")
+        _trie = compile_rules(data.read_text(encoding="utf-8").splitlines())
+    return _trie
+
+
+def suffix_labels(labels: list[str]) -> int:
+    """Number of rightmost labels forming the public suffix (labels in host order)."""
+    node = _get_trie()
+    best = 1  # the implicit "*" rule: an unlisted TLD is a public suffix
+    depth = 0
+    for lb in reversed(labels):
+        depth += 1
+        child = node.get(lb)
+        if child is not None and _EXCEPTION in child:
+            return depth - 1
+        wild = node.get("*")
+        if (child is not None and _RULE in child) or (wild is not None and _RULE in wild):
+            best = depth
+        if child is None:
+            break
+        node = child
+    return best
+
+
+def _split_port(host: str) -> str:
+    if host.startswith("["):  # [v6]:port
+        return host.split("]", 1)[0] + "]"
+    return host.rsplit(":", 1)[0] if host.count(":") == 1 else host
+
+
+@lru_cache(maxsize=SITE_CACHE_SIZE)
+def registrable_domain(host: str) -> str:
+    """
+    eTLD+1 of a normalized host ("shop.example.co.uk" -> "example.co.uk").
+    Ports are dropped; IP literals, single-label hosts and hosts that are
+    themselves public suffixes are returned as they are.
+    """
+    name = _split_port(host).rstrip(".")
+    if not name or "." not in name or name.startswith("["):
+        return name
+    labels = name.split(".")
+    if labels[-1].isdigit():  # IPv4 literal; no TLD is numeric
+        return name
+    n = suffix_labels(labels)
+    if n >= len(labels):
+        return name
+    return ".".join(labels[-n - 1:])
+
@@ -0,0 +1,139 @@
+"""
+Offline re-extraction of archived crawl jobs (python run_reextract.py).
+
+Re-runs extraction over the raw responses a job archived while it crawled
+(archive.py, cfg.archive_dir) instead of fetching anything again: a process
+pool reads the records through mmap and extracts them, then the job's pages,
+links and metrics are replaced in one transaction. The revalidation cache
+gets the new pages too, so later re-crawls do not bring the old extraction
+back. Jobs with pages that were never archived are left as they are.
+"""
+
+import argparse
+import hashlib
+import logging
+import os
+import time
+import zlib
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from .archive import ArchiveReader
+from .config import CrawlConfig
+from .executor import _extract_job
+from .graph import MetricsAccumulator
+from .storage import get_db, get_job, job_archive, list_jobs, replace_job_pages
+
+logger = logging.getLogger(__name__)
+
+CHUNK_RECORDS = 64  # records per pool task
+
+_reader: ArchiveReader | None = None  # per worker process
+
+
+def open_archive(archive_dir: str) -> None:
+    """Point this process's record reader at archive_dir (pool initializer)."""
+    global _reader
+    _reader = ArchiveReader(archive_dir)
+
+
+def _extract_records(
+    locations: list[dict], target_domain: str, engine: str
+) -> list[tuple[bytes, dict]]:
+    """Pool worker: (content hash, page dict) of each archived response."""
+    out = []
+    for location in locations:
+        record = _reader.read(location)
+        page, _, _ = _extract_job(
+            record.body, record.encoding, record.url, target_domain, engine, 0.0
+        )
+        page["archive"] = location
+        out.append((hashlib.blake2b(record.body, digest_size=16).digest(), page))
+    return out
+
+
+def reextract_job(
+    db: str,
+    job_id: int,
+    map_fn: Callable[..., Iterable] = map,
+    engine: str = "bs4",
+    dry_run: bool = False,
+) -> dict | None:
+    """
+    Re-extract one job from its archive; its new metrics, or None if it was
+    skipped. map_fn is map (after open_archive()) or a process pool's map.
+    """
+    job = get_job(db, job_id)
+    if job is None or job["status"] not in ("completed", "failed"):
+        logger.warning("job %s: %s, skipped", job_id, job["status"] if job else "not found")
+        return None
+    locations = job_archive(db, job_id)
+    missing = sum(loc is None for loc in locations)
+    if not locations or missing:
+        logger.warning(
+            "job %s: %d of %d pages not archived, skipped", job_id, missing, len(locations)
+        )
+        return None
+    target = job["target_domain"]
+    chunks = [locations[i:i + CHUNK_RECORDS] for i in range(0, len(locations), CHUNK_RECORDS)]
+    results = map_fn(_extract_records, chunks, repeat(target), repeat(engine))
+    extracted = [item for chunk in results for item in chunk]
+    pages = [page for _, page in extracted]
+    # Same counters as the crawl's PageSink, so a re-extracted job reads like a crawled one.
+    acc = MetricsAccumulator(target, keep_backlinks=False)
+    for page in pages:
+        acc.add(page)
+    metrics = acc.result()
+    if not dry_run:
+        replace_job_pages(db, job_id, target, pages, metrics, cache_pages=extracted)
+    return metrics
+
+
+def main() -> None:
+    defaults = CrawlConfig()
+    ap = argparse.ArgumentParser(
+        description="Re-extract archived crawl jobs without re-crawling them."
+    )
+    ap.add_argument("--db", default=None, help="SQLite DB path (default: SCRAPER_ENGINE_DB)")
+    ap.add_argument("--archive-dir", default=defaults.archive_dir,
+                    help="directory of the job archives (default: SCRAPER_ENGINE_ARCHIVE_DIR)")
+    ap.add_argument("--jobs", type=int, nargs="*", help="job ids (default: every completed job)")
+    ap.add_argument("--workers", type=int, default=0, help="extraction processes (0 = one per CPU)")
+    ap.add_argument("--engine", default=defaults.extract_engine, choices=("bs4", "fast"))
+    ap.add_argument("--dry-run", action="store_true", help="extract and report, write nothing")
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    if not args.archive_dir:
+        ap.error("no archive directory (--archive-dir or SCRAPER_ENGINE_ARCHIVE_DIR)")
+    db = get_db(args.db)
+    job_ids = args.jobs or list_jobs(db, "completed")
+    workers = args.workers or os.cpu_count() or 1
+    done = pages = 0
+    t0 = time.perf_counter()
+    pool = ProcessPoolExecutor(workers, initializer=open_archive, initargs=(args.archive_dir,))
+    with pool:
+        for job_id in job_ids:
+            started = time.perf_counter()
+            try:
+                metrics = reextract_job(db, job_id, pool.map, args.engine, args.dry_run)
+            except (OSError, ValueError, KeyError, zlib.error) as e:
+                # Missing or damaged archive file: leave the job as it is.
+                logger.warning("job %s: archive unreadable (%s), skipped", job_id, e)
+                continue
+            if metrics is None:
+                continue
+            done += 1
+            pages += metrics["pages_crawled"]
+            logger.info(
+                "job %s: %d pages re-extracted in %.1fs: %d referring domains, %d backlinks",
+                job_id, metrics["pages_crawled"], time.perf_counter() - started,
+                metrics["referring_domains"], metrics["total_backlinks"],
+            )
+    logger.info("%d of %d jobs re-extracted%s: %d pages in %.1fs with %d workers",
+                done, len(job_ids), " (dry run)" if args.dry_run else "", pages,
+                time.perf_counter() - t0, workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Process-wide robots.txt cache following RFC 9309 caching rules.
+
+Rules are cached per origin (scheme://host:port, the scope of a robots.txt):
+- 2xx: parsed (first 500 KiB) and cached for 24 h, or less if Cache-Control
+  max-age says so;
+- 4xx ("unavailable"): no rules apply, cached for 24 h;
+- 5xx, 429 or network error ("unreachable"): retried ROBOTS_RETRIES times
+  with backoff; if it stays unreachable, everything is disallowed for
+  ROBOTS_ERROR_TTL seconds (CrawlConfig.robots_unreachable="allow" crawls
+  the origin anyway), then fetched again. A previously fetched copy, if
+  there is one, keeps being used instead.
+
+Concurrent lookups of an origin share one fetch. With a store (see
+async_storage.RobotsStore) entries survive restarts and are shared by
+worker processes.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Protocol
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+from .cache import SingleFlight
+from .scheduler import robots_delay
+from .transport import get_client
+
+logger = logging.getLogger(__name__)
+
+ROBOTS_TTL = 24 * 3600.0  # RFC 9309 2.4: SHOULD NOT use a cached copy for more than 24 h
+ROBOTS_ERROR_TTL = 300.0  # re-fetch an unreachable robots.txt after this long
+ROBOTS_RETRIES = 2  # extra attempts before robots.txt counts as unreachable
+ROBOTS_RETRY_DELAY = 1.0  # seconds before the first retry, doubled for each further one
+ROBOTS_MAX_BYTES = 500 * 1024  # RFC 9309 2.5: parse at least 500 KiB
+ROBOTS_CACHE_SIZE = 10_000  # origins kept in memory
+
+_MAX_AGE = re.compile(r"max-age\s*=\s*(\d+)", re.I)
+
+
+def robots_origin(url: str) -> str:
+    p = urlparse(url)
+    return f"{(p.scheme or 'https').lower()}://{p.netloc.lower()}"
+
+
+@dataclass
+class RobotsRules:
+    status: int  # HTTP status of the fetch; 0 = network error
+    body: str | None  # robots.txt text for 2xx
+    fetched_at: float  # unix time
+    expires_at: float  # unix time
+    parser: RobotFileParser | None = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        if self.parser is None and self.body is not None:
+            self.parser = RobotFileParser()
+            self.parser.parse(self.body.splitlines())
+
+    @property
+    def disallow_all(self) -> bool:
+        return self.body is None and (self.status == 0 or self.status == 429 or self.status >= 500)
+
+    def fresh(self, now: float | None = None) -> bool:
+        return (time.time() if now is None else now) < self.expires_at
+
+    def allowed(self, url: str, ua: str, unreachable: bool = False) -> bool:
+        """Whether ua may fetch url; unreachable is the answer while robots.txt is."""
+        if self.parser is None:
+            return unreachable if self.disallow_all else True
+        try:
+            return self.parser.can_fetch(ua, url)
+        except Exception:
+            return True
+
+    def delay(self, ua: str) -> float | None:
+        return robots_delay(self.parser, ua)
+
+
+class RobotsStore(Protocol):
+    async def load(self, origin: str) -> RobotsRules | None: ...
+
+    async def save(self, origin: str, rules: RobotsRules) -> None: ...
+
+
+def _ttl(r: httpx.Response) -> float:
+    m = _MAX_AGE.search(r.headers.get("cache-control", ""))
+    return min(ROBOTS_TTL, float(m.group(1))) if m else ROBOTS_TTL
+
+
+async def _fetch_once(origin: str, ua: str, client: httpx.AsyncClient | None) -> RobotsRules:
+    now = time.time()
+    try:
+        c = client or get_client()
+        r = await c.get(f"{origin}/robots.txt", headers={"User-Agent": ua}, timeout=10.0)
+    except Exception as e:
+        logger.warning("robots fetch failed for %s: %s", origin, e)
+        return RobotsRules(0, None, now, now + ROBOTS_ERROR_TTL)
+    if 200 <= r.status_code < 300:
+        body = r.content[:ROBOTS_MAX_BYTES].decode(r.encoding or "utf-8", errors="replace")
+        return RobotsRules(r.status_code, body, now, now + _ttl(r))
+    if 400 <= r.status_code < 500 and r.status_code != 429:
+        return RobotsRules(r.status_code, None, now, now + ROBOTS_TTL)
+    logger.warning("robots.txt for %s unreachable (status %d)", origin, r.status_code)
+    return RobotsRules(r.status_code, None, now, now + ROBOTS_ERROR_TTL)
+
+
+async def fetch_rules(
+    origin: str, ua: str, client: httpx.AsyncClient | None = None
+) -> RobotsRules:
+    """Fetch origin/robots.txt and classify the result per RFC 9309, retrying if unreachable."""
+    rules = await _fetch_once(origin, ua, client)
+    for attempt in range(ROBOTS_RETRIES):
+        if not rules.disallow_all:
+            break
+        await asyncio.sleep(ROBOTS_RETRY_DELAY * 2**attempt)
+        rules = await _fetch_once(origin, ua, client)
+    return rules
+
+
+class RobotsCache:
+    """
+    peek() is the hot path (a dict lookup); get() fetches on a miss, once per
+    origin however many workers ask at the same time.
+    """
+
+    def __init__(self, max_entries: int = ROBOTS_CACHE_SIZE, store: RobotsStore | None = None):
+        self.max_entries = max_entries
+        self.store = store
+        self._entries: OrderedDict[str, RobotsRules] = OrderedDict()
+        self._flight = SingleFlight()
+        self.fetches = 0
+
+    def peek(self, origin: str) -> RobotsRules | None:
+        rules = self._entries.get(origin)
+        if rules is None or not rules.fresh():
+            return None
+        return rules
+
+    async def get(
+        self, origin: str, ua: str, client: httpx.AsyncClient | None = None
+    ) -> RobotsRules:
+        rules = self.peek(origin)
+        if rules is not None:
+            return rules
+        rules, _ = await self._flight.do(origin, lambda: self._refresh(origin, ua, client))
+        return rules
+
+    async def _refresh(self, origin: str, ua: str, client: httpx.AsyncClient | None) -> RobotsRules:
+        stale = self._entries.get(origin)
+        if self.store is not None:
+            try:
+                stored = await self.store.load(origin)
+            except Exception as e:
+                logger.warning("robots store load failed for %s: %s", origin, e)
+                stored = None
+            if stored is not None:
+                if stored.fresh():
+                    self._put(origin, stored)
+                    return stored
+                if stale is None or stored.fetched_at > stale.fetched_at:
+                    stale = stored
+        self.fetches += 1
+        rules = await fetch_rules(origin, ua, client)
+        if rules.disallow_all:
+            if stale is not None and stale.body is not None:
+                # Unreachable now, but we have rules from an earlier fetch: keep using them.
+                rules = RobotsRules(stale.status, stale.body, stale.fetched_at,
+                                    rules.expires_at, parser=stale.parser)
+                logger.info(
+                    "robots.txt for %s: keeping rules from the last successful fetch", origin
+                )
+            else:
+                logger.warning(
+                    "robots.txt for %s unreachable after %d attempts, fetched again in %.0fs",
+                    origin, ROBOTS_RETRIES + 1, ROBOTS_ERROR_TTL,
+                )
+        self._put(origin, rules)
+        if self.store is not None:
+            try:
+                await self.store.save(origin, rules)
+            except Exception as e:
+                logger.warning("robots store save failed for %s: %s", origin, e)
+        return rules
+
+    def _put(self, origin: str, rules: RobotsRules) -> None:
+        self._entries[origin] = rules
+        self._entries.move_to_end(origin)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+_cache = RobotsCache()
+
+
+def get_robots_cache() -> RobotsCache:
+    return _cache
+
+
+def set_robots_store(store: RobotsStore | None) -> None:
+    """Persist robots.txt entries (API / worker startup); None turns persistence off."""
+    _cache.store = store
@@ -0,0 +1,476 @@
+"""Host-aware crawl frontier with per-host politeness delays and adaptive rates."""
+
+import asyncio
+import heapq
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from collections import deque
+from collections.abc import Iterator
+from dataclasses import dataclass
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+from .priority import CrawlPriority, UrlHeap
+
+
+def host_key(url: str) -> str:
+    """Politeness key for a URL: lower-cased host[:port]."""
+    return (urlparse(url).netloc or "").lower()
+
+
+def robots_delay(rp: RobotFileParser | None, ua: str) -> float | None:
+    """Seconds between requests asked for by robots.txt (Crawl-delay / Request-rate)."""
+    if rp is None:
+        return None
+    delays: list[float] = []
+    try:
+        cd = rp.crawl_delay(ua)
+        if cd is not None:
+            delays.append(float(cd))
+        rr = rp.request_rate(ua)
+        if rr is not None and rr.requests > 0:
+            delays.append(rr.seconds / rr.requests)
+    except Exception:
+        return None
+    return max(delays) if delays else None
+
+
+@dataclass
+class HostRate:
+    """AIMD state of one host (see AdaptiveRate)."""
+
+    window: float = 1.0  # concurrent requests; below 1 it stretches the spacing instead
+    ssthresh: float = math.inf  # slow start ends at the first overload
+    srtt: float = 0.0  # smoothed response time (0 = no response yet)
+    min_rtt: float = math.inf
+    cut_at: float = -math.inf  # time of the last decrease
+
+
+class AdaptiveRate:
+    """
+    Per-host AIMD rate control, after TCP congestion control.
+
+    Each host has a window of concurrent requests. It grows by one per healthy
+    response until the first overload (slow start), then by 1/window, about
+    one per round of responses. On overload it is halved, at most once per
+    smoothed response time. Overload is a retryable failure (429/5xx, timeout,
+    dropped connection; reported via on_overload) or a smoothed response time
+    above latency_factor x the host's fastest. Requests to a host start
+    srtt / window apart, i.e. window requests per response time, never closer
+    than min_delay; before the first response, initial_delay apart.
+    """
+
+    MIN_WINDOW = 0.125  # at most 8 response times between requests
+
+    def __init__(
+        self,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.1,
+        max_window: int = 8,
+        latency_factor: float = 3.0,
+    ):
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.max_window = max(1, max_window)
+        self.latency_factor = latency_factor
+        self._hosts: dict[str, HostRate] = {}
+
+    def state(self, host: str) -> HostRate:
+        st = self._hosts.get(host)
+        if st is None:
+            st = self._hosts[host] = HostRate()
+        return st
+
+    def interval(self, host: str) -> float:
+        st = self._hosts.get(host)
+        if st is None or not st.srtt:
+            return max(self.min_delay, self.initial_delay)
+        return max(self.min_delay, st.srtt / st.window)
+
+    def limit(self, host: str) -> int:
+        """Requests to host allowed in flight at once."""
+        st = self._hosts.get(host)
+        return 1 if st is None else max(1, int(st.window))
+
+    def on_response(self, host: str, seconds: float) -> None:
+        """A non-retryable response arrived after `seconds` (time to headers)."""
+        st = self.state(host)
+        # The baseline drifts up 0.1% per response, so one fluke doesn't pin it.
+        st.min_rtt = min(seconds, st.min_rtt * 1.001)
+        st.srtt = seconds if not st.srtt else st.srtt + (seconds - st.srtt) / 8
+        if st.srtt > self.latency_factor * st.min_rtt:
+            self._cut(st)
+        elif st.window < st.ssthresh:
+            st.window = min(self.max_window, st.window + 1)
+        else:
+            st.window = min(self.max_window, st.window + 1 / st.window)
+
+    def on_overload(self, host: str) -> None:
+        self._cut(self.state(host))
+
+    def _cut(self, st: HostRate) -> None:
+        now = time.monotonic()
+        if now - st.cut_at < st.srtt:
+            return  # the responses still arriving were sent before the last cut
+        st.cut_at = now
+        st.window = st.ssthresh = max(self.MIN_WINDOW, st.window / 2)
+
+
+class _Fifo(deque):
+    """A host queue in arrival order (the UrlHeap interface over a deque of (url, depth))."""
+
+    __slots__ = ()
+
+    def push(self, url: str, depth: int = 0) -> None:
+        self.append((url, depth))
+
+    def push_front(self, url: str, depth: int = 0) -> None:
+        self.appendleft((url, depth))
+
+    def pop_next(self) -> tuple[str, int]:
+        return self.popleft()
+
+    def queued(self) -> Iterator[tuple[str, int]]:
+        return iter(self)
+
+
+class FrontierSpill:
+    """
+    Overflow of HostScheduler host queues in a temporary SQLite file, in
+    (score, arrival) order per host. The file is private to one crawl and
+    removed by close().
+    """
+
+    def __init__(self, directory: str | None = None):
+        fd, self.path = tempfile.mkstemp(prefix="frontier-", suffix=".db", dir=directory)
+        os.close(fd)
+        self._conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=OFF")
+        self._conn.execute("PRAGMA synchronous=OFF")
+        self._conn.execute(
+            "CREATE TABLE spill (id INTEGER PRIMARY KEY, host TEXT NOT NULL, url TEXT NOT NULL,"
+            " depth INTEGER NOT NULL, score REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX spill_host ON spill(host, score, id)")
+        # One open transaction for the crawl: nothing here needs to survive a crash.
+        self._conn.execute("BEGIN")
+
+    def push(self, host: str, url: str, depth: int = 0, score: float = 0.0) -> None:
+        self._conn.execute(
+            "INSERT INTO spill (host, url, depth, score) VALUES (?, ?, ?, ?)",
+            (host, url, depth, score),
+        )
+
+    def pop(self, host: str, n: int) -> list[tuple[str, int]]:
+        """Up to n (url, depth) of host, best score first."""
+        rows = self._conn.execute(
+            "SELECT id, url, depth FROM spill WHERE host = ? ORDER BY score, id LIMIT ?", (host, n)
+        ).fetchall()
+        if rows:
+            self._conn.executemany("DELETE FROM spill WHERE id = ?", [(r[0],) for r in rows])
+        return [(u, d) for _, u, d in rows]
+
+    def best(self, host: str) -> float:
+        sql = "SELECT min(score) FROM spill WHERE host = ?"
+        return self._conn.execute(sql, (host,)).fetchone()[0]
+
+    def queued(self, host: str) -> list[tuple[str, int]]:
+        """Every (url, depth) of host, in arrival order."""
+        return self._conn.execute(
+            "SELECT url, depth FROM spill WHERE host = ? ORDER BY id", (host,)
+        ).fetchall()
+
+    def close(self) -> None:
+        self._conn.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+class HostScheduler:
+    """
+    Frontier of per-host FIFO queues plus a heap of (next_allowed_time, host).
+
+    get() returns the URL of whichever host may be fetched soonest, so many hosts
+    are crawled in parallel while each host still waits its own delay between
+    requests. Waiting happens here, before a worker takes a URL, so the delay
+    never holds a concurrency slot. task_done()/join() follow asyncio.Queue.
+
+    Workers report each URL back: record() for a response, backoff() for a
+    retryable failure (pauses the host, exponentially longer per consecutive
+    failure unless the server sent Retry-After), and release() when done. With
+    an AdaptiveRate, its interval is added to a host's delay and a host at its
+    in-flight limit is skipped until one of its requests is released.
+    acquire() waits the same way for a request that is not in the frontier.
+
+    With a CrawlPriority each host's queue is a UrlHeap: get_entry() returns
+    the host's best-scored URL instead of its oldest, and boost() credits a
+    link to a queued URL.
+    """
+
+    def __init__(
+        self,
+        default_delay: float = 1.0,
+        max_delay: float | None = None,
+        memory_limit: int = 0,
+        rate: AdaptiveRate | None = None,
+        retry_backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        priority: CrawlPriority | None = None,
+    ):
+        self.default_delay = max(0.0, default_delay)
+        self.max_delay = max_delay
+        self.rate = rate
+        self.priority = priority
+        self._entries: dict = {}  # URL -> UrlHeap entry, for every queued URL (priority only)
+        self.retry_backoff = retry_backoff
+        self.max_backoff = max_backoff
+        self._active: dict[str, int] = {}  # host -> requests in flight
+        self._blocked: set[str] = set()  # hosts waiting for release() (at their limit)
+        self._acquiring: dict[str, int] = {}  # host -> acquire() calls waiting
+        self._failures: dict[str, int] = {}  # host -> consecutive retryable failures
+        # Beyond memory_limit queued URLs (0 = no limit), new URLs go to a FrontierSpill.
+        self.memory_limit = memory_limit
+        self._spill: FrontierSpill | None = None
+        self._spilled: dict[str, int] = {}  # host -> URLs in the spill
+        self._in_memory = 0
+        self._queues: dict[str, _Fifo | UrlHeap] = {}
+        self._delays: dict[str, float] = {}
+        self._last_at: dict[str, float] = {}
+        self._next_at: dict[str, float] = {}
+        self._heap: list[tuple[float, int, str]] = []
+        self._scheduled: set[str] = set()
+        self._seq = 0
+        self._size = 0
+        self._unfinished = 0
+        self._finished = asyncio.Event()
+        self._finished.set()
+        self._changed = asyncio.Event()
+
+    def qsize(self) -> int:
+        return self._size
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def pending(self) -> list[tuple[str, int]]:
+        """Snapshot of every queued (url, depth), spilled ones included (for checkpoints)."""
+        out = []
+        for host, q in self._queues.items():
+            out.extend(q.queued())
+            if self._spilled.get(host):
+                out.extend(self._spill.queued(host))
+        return out
+
+    def spilled(self) -> int:
+        return self._size - self._in_memory
+
+    def close(self) -> None:
+        """Drop the spill file, if any (end of crawl)."""
+        if self._spill is not None:
+            self._spill.close()
+            self._spill = None
+            self._spilled.clear()
+
+    def hosts(self) -> int:
+        return len(self._queues)
+
+    def delay_for(self, host: str) -> float:
+        d = self._delays.get(host, self.default_delay)
+        if self.rate is not None:
+            d = max(d, self.rate.interval(host))
+        return d
+
+    def set_delay(self, host: str, delay: float | None) -> None:
+        """Set a host's delay; never below the configured default, capped at max_delay."""
+        d = self.default_delay if delay is None else max(self.default_delay, delay)
+        if self.max_delay is not None:
+            d = min(d, self.max_delay)
+        self._delays[host] = d
+        if host in self._last_at:
+            self._next_at[host] = max(self._next_at.get(host, 0.0), self._last_at[host] + d)
+
+    def put(self, url: str, host: str | None = None, front: bool = False, depth: int = 0) -> None:
+        """
+        Queue url, found `depth` links from a seed. front=True puts it ahead
+        of its host's other URLs (retries).
+        """
+        host = host if host is not None else host_key(url)
+        q = self._queues.get(host)
+        if q is None:
+            if self.priority is None:
+                q = self._queues[host] = _Fifo()
+            else:
+                q = self._queues[host] = UrlHeap(self.priority, self._entries)
+        if front:
+            q.push_front(url, depth)
+            self._in_memory += 1
+        elif self.memory_limit and (
+            self._spilled.get(host) or self._in_memory >= self.memory_limit
+        ):
+            # Once a host has spilled URLs, later ones follow them; spilled
+            # URLs are ordered among themselves but not boosted by later links.
+            if self._spill is None:
+                self._spill = FrontierSpill()
+            score = 0.0
+            if self.priority is not None:
+                score = self.priority.score(*self.priority.base(url, depth), 0)
+            self._spill.push(host, url, depth, score)
+            self._spilled[host] = self._spilled.get(host, 0) + 1
+        else:
+            q.push(url, depth)
+            self._in_memory += 1
+        self._size += 1
+        self._unfinished += 1
+        self._finished.clear()
+        self._schedule(host)
+
+    def boost(self, url: str) -> None:
+        """Another link to url was found; a queued url moves up (priority order only)."""
+        e = self._entries.get(url)
+        if e is not None:
+            e.queue.boost(e, url)
+
+    def record(self, host: str, seconds: float) -> None:
+        """A request to host got a (non-retryable) response after `seconds`."""
+        self._failures.pop(host, None)
+        if self.rate is not None:
+            self.rate.on_response(host, seconds)
+
+    def backoff(self, host: str, retry_after: float | None = None) -> float:
+        """Pause host after a retryable failure; returns the pause in seconds."""
+        n = self._failures[host] = self._failures.get(host, 0) + 1
+        if retry_after is None:
+            wait = self.retry_backoff * 2 ** min(n - 1, 30) * random.uniform(0.5, 1.0)
+        else:
+            wait = retry_after
+        wait = min(max(0.0, wait), self.max_backoff)
+        if self.rate is not None:
+            self.rate.on_overload(host)
+        self._next_at[host] = max(self._next_at.get(host, 0.0), time.monotonic() + wait)
+        return wait
+
+    async def acquire(self, host: str) -> None:
+        """
+        Wait for host's turn for a request from outside the frontier (a sitemap),
+        as if get() had returned one of its URLs; call release() when it is done.
+        """
+        self._acquiring[host] = self._acquiring.get(host, 0) + 1
+        try:
+            while True:
+                changed = self._changed
+                if self.rate is not None and self._active.get(host, 0) >= self.rate.limit(host):
+                    await changed.wait()
+                    continue
+                wait = self._next_at.get(host, 0.0) - time.monotonic()
+                if wait <= 0:
+                    break
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=wait)
+                except TimeoutError:
+                    pass
+        finally:
+            n = self._acquiring.pop(host) - 1
+            if n:
+                self._acquiring[host] = n
+        now = time.monotonic()
+        self._last_at[host] = now
+        self._next_at[host] = now + self.delay_for(host)
+        self._active[host] = self._active.get(host, 0) + 1
+
+    def release(self, host: str) -> None:
+        """A URL returned by get() for host is finished (call before task_done())."""
+        n = self._active.get(host, 0) - 1
+        if n > 0:
+            self._active[host] = n
+        else:
+            self._active.pop(host, None)
+        if host in self._acquiring:
+            self._notify()
+        if host in self._blocked:
+            self._blocked.discard(host)
+            if host in self._queues:
+                self._schedule(host)
+
+    def _schedule(self, host: str) -> None:
+        if host in self._scheduled or host in self._blocked:
+            return
+        self._scheduled.add(host)
+        self._seq += 1
+        heapq.heappush(self._heap, (self._next_at.get(host, 0.0), self._seq, host))
+        self._notify()
+
+    def _notify(self) -> None:
+        # Wake every waiter; each re-checks the heap against its own clock.
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def get(self) -> str:
+        """Wait until some host is allowed a request and return its next URL."""
+        return (await self.get_entry())[0]
+
+    async def get_entry(self) -> tuple[str, int]:
+        """Like get(), with the URL's depth (0 unless the frontier is priority-ordered)."""
+        while True:
+            changed = self._changed
+            if self._heap:
+                ready_at, _, host = self._heap[0]
+                wait = ready_at - time.monotonic()
+                if wait <= 0:
+                    heapq.heappop(self._heap)
+                    self._scheduled.discard(host)
+                    if self._next_at.get(host, 0.0) > ready_at:
+                        # Delay was raised (e.g. robots Crawl-delay, backoff) after scheduling.
+                        self._schedule(host)
+                        continue
+                    if self.rate is not None and self._active.get(host, 0) >= self.rate.limit(host):
+                        self._blocked.add(host)
+                        continue
+                    q = self._queues[host]
+                    if not q or (self.priority is not None and self._spilled.get(host)
+                                 and self._spill.best(host) < q.best()):
+                        self._refill(host, q)
+                    url, depth = q.pop_next()
+                    self._size -= 1
+                    self._in_memory -= 1
+                    now = time.monotonic()
+                    self._last_at[host] = now
+                    self._next_at[host] = now + self.delay_for(host)
+                    self._active[host] = self._active.get(host, 0) + 1
+                    if q or self._spilled.get(host):
+                        self._schedule(host)
+                    else:
+                        del self._queues[host]
+                    return url, depth
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=wait)
+                except TimeoutError:
+                    pass
+            else:
+                await changed.wait()
+
+    def _refill(self, host: str, q: _Fifo | UrlHeap) -> None:
+        batch = self._spill.pop(host, max(1, min(1000, self.memory_limit // 4)))
+        for url, depth in batch:
+            q.push(url, depth)
+        self._in_memory += len(batch)
+        left = self._spilled[host] - len(batch)
+        if left:
+            self._spilled[host] = left
+        else:
+            del self._spilled[host]
+
+    def task_done(self) -> None:
+        if self._unfinished <= 0:
+            raise ValueError("task_done() called too many times")
+        self._unfinished -= 1
+        if self._unfinished == 0:
+            self._finished.set()
+
+    async def join(self) -> None:
+        await self._finished.wait()
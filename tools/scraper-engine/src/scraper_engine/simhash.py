@@ -0,0 +1,94 @@
+"""
+SimHash fingerprints of page text for near-duplicate detection.
+
+simhash() is Charikar's 64-bit SimHash over the distinct SHINGLE-word runs
+of the page's text, each counted once: pages whose text differs only a little
+(a session id, a date) get fingerprints a few bits apart, unrelated pages ~32
+bits apart. Runs rather than single words, so that pages built from the same
+words (a listing of "Page 12", "Page 40", ... and one of "Page 7", "Page 81",
+...) are still told apart by what follows what.
+
+NearDuplicateIndex finds an indexed fingerprint within max_distance bits by
+the pigeonhole trick of Manku et al. (WWW 2007): the 64 bits are cut into
+max_distance + 1 blocks, two fingerprints that close agree on at least one
+whole block, so only fingerprints sharing a block value are compared.
+"""
+
+import hashlib
+import re
+from collections.abc import Sequence
+from functools import lru_cache
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"\w+")
+SHINGLE = 3  # words per feature
+
+
+def tokens(text: str) -> list[str]:
+    """Lower-cased words of text, as counted by simhash()."""
+    return TOKEN_RE.findall(text.lower())
+
+
+@lru_cache(maxsize=65_536)
+def _feature(token: str) -> bytes:
+    return hashlib.blake2b(token.encode(), digest_size=8).digest()
+
+
+def simhash(words: Sequence[str]) -> int:
+    """64-bit SimHash of the distinct SHINGLE-word runs of words; 0 for no words."""
+    if not words:
+        return 0
+    h = np.frombuffer(b"".join(map(_feature, words)), dtype="<u8")
+    if len(h) >= SHINGLE:
+        # run i hashes to word i ^ rotl(word i+1, 21) ^ rotl(word i+2, 42): order counts
+        n = len(h) - SHINGLE + 1
+        runs = h[:n].copy()
+        for k in range(1, SHINGLE):
+            w, r = h[k:k + n], np.uint64(21 * k)
+            runs ^= (w << r) | (w >> np.uint64(64 - 21 * k))
+        h = runs
+    features = np.unique(h)
+    bits = np.unpackbits(features.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    # bit i is set where most features have bit i set
+    ones = 2 * bits.sum(axis=0, dtype=np.int64) > len(features)
+    return int.from_bytes(np.packbits(ones, bitorder="little").tobytes(), "little")
+
+
+def distance(a: int, b: int) -> int:
+    """Number of differing bits."""
+    return (a ^ b).bit_count()
+
+
+class NearDuplicateIndex:
+    """Fingerprints of the pages seen so far, each with the URL it came from."""
+
+    def __init__(self, max_distance: int = 3):
+        self.max_distance = max_distance
+        n = max_distance + 1
+        # (shift, mask) of each block; the last one takes the leftover bits
+        cuts = [64 * i // n for i in range(n + 1)]
+        self._blocks = [(lo, (1 << (hi - lo)) - 1) for lo, hi in zip(cuts, cuts[1:])]
+        self._tables: list[dict[int, list[tuple[int, str]]]] = [{} for _ in self._blocks]
+        self._n = 0
+
+    def __len__(self) -> int:
+        return self._n
+
+    def find(self, fp: int) -> str | None:
+        """URL of an indexed fingerprint at most max_distance bits from fp, if any."""
+        for (shift, mask), table in zip(self._blocks, self._tables):
+            for other, url in table.get((fp >> shift) & mask, ()):
+                if (fp ^ other).bit_count() <= self.max_distance:
+                    return url
+        return None
+
+    def add(self, fp: int, url: str) -> str | None:
+        """Index fp for url, unless it is a near-duplicate: then the URL it duplicates."""
+        dup = self.find(fp)
+        if dup is not None:
+            return dup
+        for (shift, mask), table in zip(self._blocks, self._tables):
+            table.setdefault((fp >> shift) & mask, []).append((fp, url))
+        self._n += 1
+        return None
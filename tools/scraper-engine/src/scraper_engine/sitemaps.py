@@ -0,0 +1,167 @@
+"""
+Streaming sitemap discovery (sitemaps.org protocol).
+
+Sitemaps are found in robots.txt (`Sitemap:` lines) or at /sitemap.xml,
+downloaded as a stream and parsed incrementally: each chunk is gunzipped
+if needed (.xml.gz) and fed to an XMLPullParser, and every finished <url> /
+<sitemap> element is emitted and dropped, so memory stays flat however big
+the file. Sitemap indexes are followed breadth-first, nested ones included.
+Each file is cut off at max_bytes of XML; at most max_files are read. With
+slot, every file is fetched inside slot(url), e.g. a HostScheduler turn, so
+sitemap requests keep to the host's politeness delay.
+"""
+
+import logging
+import xml.etree.ElementTree as ET
+import zlib
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager, nullcontext
+from dataclasses import dataclass
+from datetime import UTC, datetime, timedelta
+
+import httpx
+
+from .robots import RobotsRules
+
+logger = logging.getLogger(__name__)
+
+Slot = Callable[[str], AbstractAsyncContextManager]
+
+SITEMAP_MAX_BYTES = 50 * 1024 * 1024  # protocol limit for one (uncompressed) sitemap
+SITEMAP_MAX_FILES = 50
+
+
+@dataclass
+class SitemapEntry:
+    kind: str  # "url" (a page) or "sitemap" (a child of a sitemap index)
+    loc: str
+    lastmod: float | None  # unix time; a date without time counts as the end of that day
+
+
+def parse_lastmod(value: str | None) -> float | None:
+    """W3C datetime (YYYY-MM-DD, YYYY-MM-DDThh:mm[:ss][TZD]) to unix time; None if unparseable."""
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=UTC)
+    if len(value.strip()) == 10:  # date only: the page may have changed any time that day
+        dt += timedelta(days=1)
+    return dt.timestamp()
+
+
+class SitemapParser:
+    """Incremental <urlset> / <sitemapindex> parser: feed() bytes, get the entries read so far."""
+
+    def __init__(self) -> None:
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root: ET.Element | None = None
+        self._loc: str | None = None
+        self._lastmod: str | None = None
+
+    def feed(self, data: bytes) -> list[SitemapEntry]:
+        self._parser.feed(data)
+        return self._read()
+
+    def close(self) -> list[SitemapEntry]:
+        self._parser.close()
+        return self._read()
+
+    def _read(self) -> list[SitemapEntry]:
+        out = []
+        for event, el in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = el
+                continue
+            tag = el.tag.rpartition("}")[2]  # drop the namespace
+            if tag == "loc":
+                self._loc = (el.text or "").strip()
+            elif tag == "lastmod":
+                self._lastmod = el.text
+            elif tag in ("url", "sitemap"):
+                if self._loc:
+                    out.append(SitemapEntry(tag, self._loc, parse_lastmod(self._lastmod)))
+                self._loc = self._lastmod = None
+                self._root.clear()  # finished entries are not kept in the tree
+        return out
+
+
+async def read_sitemap(
+    client: httpx.AsyncClient,
+    url: str,
+    user_agent: str,
+    timeout: float = 15.0,
+    max_bytes: int = SITEMAP_MAX_BYTES,
+    slot: Slot | None = None,
+) -> AsyncIterator[SitemapEntry]:
+    """Entries of the sitemap at url as they are downloaded; nothing on errors."""
+    parser = SitemapParser()
+    size = 0
+    try:
+        async with (slot(url) if slot is not None else nullcontext()), client.stream(
+            "GET", url, headers={"User-Agent": user_agent}, follow_redirects=True, timeout=timeout
+        ) as r:
+            if r.status_code != 200:
+                logger.info("Sitemap %s: status %d", url, r.status_code)
+                return
+            gunzip = None
+            async for chunk in r.aiter_bytes():
+                if gunzip is None:
+                    # .xml.gz is served as a gzip file, not with Content-Encoding
+                    gzipped = chunk[:2] == b"\x1f\x8b"
+                    gunzip = zlib.decompressobj(16 + zlib.MAX_WBITS) if gzipped else False
+                if gunzip:
+                    # Inflate at most one byte past the cap: a bomb never expands in memory.
+                    chunk = gunzip.decompress(chunk, max_bytes - size + 1)
+                size += len(chunk)
+                over = size - max_bytes
+                for entry in parser.feed(chunk[:len(chunk) - over] if over > 0 else chunk):
+                    yield entry
+                if over > 0:
+                    logger.warning("Sitemap %s: cut off at %d bytes", url, max_bytes)
+                    break
+            else:
+                for entry in parser.close():
+                    yield entry
+    except ET.ParseError as e:
+        logger.warning("Sitemap %s: invalid XML (%s)", url, e)
+    except httpx.HTTPError as e:
+        logger.warning("Sitemap %s: fetch failed (%s)", url, e)
+
+
+async def discover(
+    client: httpx.AsyncClient,
+    origin: str,
+    rules: RobotsRules | None,
+    user_agent: str,
+    timeout: float = 15.0,
+    max_files: int = SITEMAP_MAX_FILES,
+    max_bytes: int = SITEMAP_MAX_BYTES,
+    slot: Slot | None = None,
+) -> AsyncIterator[SitemapEntry]:
+    """Page entries of every sitemap of origin, following sitemap indexes."""
+    listed = None
+    if rules is not None and rules.parser is not None:
+        listed = rules.parser.site_maps()
+    todo = deque(listed or [f"{origin}/sitemap.xml"])
+    done: set[str] = set()
+    while todo and len(done) < max_files:
+        url = todo.popleft()
+        if url in done:
+            continue
+        done.add(url)
+        pages = 0
+        async for entry in read_sitemap(client, url, user_agent, timeout, max_bytes, slot):
+            if entry.kind == "sitemap":
+                todo.append(entry.loc)
+            else:
+                pages += 1
+                yield entry
+        logger.debug("Sitemap %s: %d page URLs", url, pages)
+    if todo:
+        logger.info("Sitemaps of %s: stopped after %d files", origin, max_files)
@@ -2,6 +2,322 @@
 
 import json
 import sqlite3
+import threading
+import zlib
+
+from .psl import registrable_domain
+from .urls import normalize_target, url_domain
+
+PAGE_BATCH_SIZE = 500  # crawl_pages rows per executemany / transaction
+
+# Bit flags stored in links.rel_flags
+REL_INTERNAL = 1
+REL_NOFOLLOW = 2
+REL_UGC = 4
+REL_SPONSORED = 8
+
+_SCHEMA_V1 = """
+    CREATE TABLE IF NOT EXISTS crawl_jobs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        target_domain TEXT NOT NULL,
+        seed_urls TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        created_at TEXT NOT NULL DEFAULT (datetime('now'))
+    );
+    CREATE TABLE IF NOT EXISTS crawl_pages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER NOT NULL,
+        url TEXT NOT NULL,
+        domain TEXT NOT NULL,
+        title TEXT,
+        meta_description TEXT,
+        internal_count INTEGER,
+        external_count INTEGER,
+        follow_count INTEGER,
+        nofollow_count INTEGER,
+        links_json TEXT,
+        FOREIGN KEY (job_id) REFERENCES crawl_jobs(id)
+    );
+    CREATE TABLE IF NOT EXISTS crawl_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        job_id INTEGER NOT NULL UNIQUE,
+        target_domain TEXT NOT NULL,
+        referring_domains INTEGER,
+        total_backlinks INTEGER,
+        follow_pct REAL,
+        estimated_da REAL,
+        metrics_json TEXT,
+        updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+        FOREIGN KEY (job_id) REFERENCES crawl_jobs(id)
+    );
+"""
+
+# v2: links move out of crawl_pages.links_json / crawl_metrics.metrics_json
+# into an indexed links table over interned urls and domains.
+_SCHEMA_V2 = """
+    CREATE TABLE IF NOT EXISTS domains (
+        id INTEGER PRIMARY KEY,
+        domain TEXT NOT NULL UNIQUE
+    );
+    CREATE TABLE IF NOT EXISTS urls (
+        id INTEGER PRIMARY KEY,
+        url TEXT NOT NULL UNIQUE,
+        domain_id INTEGER NOT NULL REFERENCES domains(id)
+    );
+    CREATE TABLE IF NOT EXISTS links (
+        id INTEGER PRIMARY KEY,
+        job_id INTEGER NOT NULL REFERENCES crawl_jobs(id),
+        source_page_id INTEGER NOT NULL REFERENCES crawl_pages(id),
+        source_domain_id INTEGER NOT NULL REFERENCES domains(id),
+        target_url_id INTEGER NOT NULL REFERENCES urls(id),
+        target_domain_id INTEGER NOT NULL REFERENCES domains(id),
+        anchor TEXT,
+        rel_flags INTEGER NOT NULL DEFAULT 0
+    );
+    CREATE INDEX IF NOT EXISTS idx_links_target_domain ON links(target_domain_id, job_id);
+    CREATE INDEX IF NOT EXISTS idx_links_job_target_url ON links(job_id, target_url_id);
+    CREATE INDEX IF NOT EXISTS idx_links_target_url ON links(target_url_id);
+    CREATE INDEX IF NOT EXISTS idx_links_source_page ON links(source_page_id);
+    CREATE INDEX IF NOT EXISTS idx_crawl_pages_job ON crawl_pages(job_id);
+    CREATE INDEX IF NOT EXISTS idx_crawl_metrics_domain_updated
+        ON crawl_metrics(target_domain, updated_at);
+"""
+
+# v3: resumable crawls. Checkpoints hold the zlib-compressed JSON crawl state
+# (frontier, seen set, progress, metric counters) of running jobs.
+_SCHEMA_V3 = """
+    CREATE TABLE IF NOT EXISTS crawl_checkpoints (
+        job_id INTEGER PRIMARY KEY REFERENCES crawl_jobs(id),
+        pages_done INTEGER NOT NULL,
+        state BLOB NOT NULL,
+        updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+    );
+    ALTER TABLE crawl_jobs ADD COLUMN max_pages INTEGER;
+    CREATE INDEX IF NOT EXISTS idx_crawl_jobs_status ON crawl_jobs(status);
+"""
+
+# v4: crawl_jobs is the durable job queue. Status goes queued -> running ->
+# completed | failed; a running job is leased to one worker (lease_owner) until
+# lease_expires_at (unix seconds), which the worker extends by heartbeats. A job
+# whose lease expires (worker crashed) is claimed again and resumes from its
+# checkpoint.
+_SCHEMA_V4 = """
+    ALTER TABLE crawl_jobs ADD COLUMN lease_owner TEXT;
+    ALTER TABLE crawl_jobs ADD COLUMN lease_expires_at REAL;
+    ALTER TABLE crawl_jobs ADD COLUMN heartbeat_at REAL;
+    ALTER TABLE crawl_jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0;
+    ALTER TABLE crawl_jobs ADD COLUMN error TEXT;
+    ALTER TABLE crawl_jobs ADD COLUMN finished_at TEXT;
+    UPDATE crawl_jobs SET status = 'queued' WHERE status = 'pending';
+    CREATE INDEX IF NOT EXISTS idx_crawl_jobs_status_id ON crawl_jobs(status, id);
+    DROP INDEX IF EXISTS idx_crawl_jobs_status;
+"""
+
+# v5: conditional re-crawls. Per (url, target domain): the response validators,
+# a hash of the body and the page dict extracted from it (zlib JSON).
+_SCHEMA_V5 = """
+    CREATE TABLE IF NOT EXISTS http_cache (
+        url TEXT NOT NULL,
+        target_domain TEXT NOT NULL,
+        final_url TEXT NOT NULL,
+        etag TEXT,
+        last_modified TEXT,
+        content_hash BLOB NOT NULL,
+        page BLOB NOT NULL,
+        fetched_at TEXT NOT NULL DEFAULT (datetime('now')),
+        validated_at TEXT NOT NULL DEFAULT (datetime('now')),
+        PRIMARY KEY (url, target_domain)
+    );
+"""
+
+# v6: robots.txt cache shared by processes and restarts (see robots.py).
+# body is NULL unless the fetch returned 2xx; times are unix seconds.
+_SCHEMA_V6 = """
+    CREATE TABLE IF NOT EXISTS robots_cache (
+        origin TEXT PRIMARY KEY,
+        status INTEGER NOT NULL,
+        body TEXT,
+        fetched_at REAL NOT NULL,
+        expires_at REAL NOT NULL
+    );
+"""
+
+# v7: raw response archive (archive.py). Where the record a page was extracted
+# from sits: .warc.gz file name in the archive directory, byte offset, length.
+_SCHEMA_V7 = """
+    ALTER TABLE crawl_pages ADD COLUMN archive_file TEXT;
+    ALTER TABLE crawl_pages ADD COLUMN archive_offset INTEGER;
+    ALTER TABLE crawl_pages ADD COLUMN archive_length INTEGER;
+    CREATE INDEX IF NOT EXISTS idx_http_cache_final_url ON http_cache(final_url);
+"""
+
+# Bumped whenever a job's pages are replaced, so the link graph merges it again.
+_SCHEMA_V8 = """
+    ALTER TABLE crawl_jobs ADD COLUMN revision INTEGER NOT NULL DEFAULT 0;
+"""
+
+JOB_MAX_ATTEMPTS = 3  # claims per job before an expiring lease fails it
+
+_INSERT_PAGE = """INSERT INTO crawl_pages
+    (job_id, url, domain, title, meta_description,
+     internal_count, external_count, follow_count, nofollow_count,
+     archive_file, archive_offset, archive_length)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+_INSERT_DOMAIN = "INSERT OR IGNORE INTO domains (domain) VALUES (?)"
+_INSERT_URL = """INSERT OR IGNORE INTO urls (url, domain_id)
+    VALUES (?, (SELECT id FROM domains WHERE domain = ?))"""
+_INSERT_LINK = """INSERT INTO links
+    (job_id, source_page_id, source_domain_id, target_url_id, target_domain_id, anchor, rel_flags)
+    VALUES (?, ?, (SELECT id FROM domains WHERE domain = ?), (SELECT id FROM urls WHERE url = ?),
+            (SELECT id FROM domains WHERE domain = ?), ?, ?)"""
+_INSERT_METRICS = """INSERT OR REPLACE INTO crawl_metrics
+    (job_id, target_domain, referring_domains, total_backlinks,
+     follow_pct, estimated_da, metrics_json, updated_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))"""
+_SELECT_REPORT = """SELECT metrics_json, updated_at, m.job_id FROM crawl_metrics m
+    JOIN crawl_jobs j ON j.id = m.job_id
+    WHERE m.target_domain = ? AND j.status = 'completed'
+    ORDER BY m.updated_at DESC LIMIT 1"""
+# ?1 target host, ?2 job id, ?3 target registrable domain; sources on the
+# target's own site (?3 or a subdomain of it) are not backlinks.
+_SELECT_BACKLINKS = """SELECT p.url, u.url, l.anchor, l.rel_flags
+    FROM links l
+    JOIN crawl_pages p ON p.id = l.source_page_id
+    JOIN urls u ON u.id = l.target_url_id
+    JOIN domains sd ON sd.id = l.source_domain_id
+    WHERE l.target_domain_id = (SELECT id FROM domains WHERE domain = ?1)
+      AND l.job_id = ?2
+      AND sd.domain != ?3 AND substr(sd.domain, -length(?3) - 1) != '.' || ?3
+    ORDER BY l.id"""
+
+# Link-graph sync: completed jobs in finish order, then one job's pages with
+# their out-links (one row per link; a page without links once, with NULLs).
+_SELECT_COMPLETED_JOBS = """SELECT id, revision FROM crawl_jobs WHERE status = 'completed'
+    ORDER BY finished_at, id"""
+_SELECT_JOB_GRAPH = """SELECT p.url, p.domain, u.url, d.domain, l.anchor, l.rel_flags
+    FROM crawl_pages p
+    LEFT JOIN links l ON l.source_page_id = p.id
+    LEFT JOIN urls u ON u.id = l.target_url_id
+    LEFT JOIN domains d ON d.id = l.target_domain_id
+    WHERE p.job_id = ?
+    ORDER BY p.id, l.id"""
+
+# Offline re-extraction (reextract.py): a job's archive locations in page order;
+# its pages, links and metrics replaced in place. updated_at stays, so an old
+# job does not become its domain's latest report.
+_SELECT_JOB_ARCHIVE = """SELECT archive_file, archive_offset, archive_length
+    FROM crawl_pages WHERE job_id = ? ORDER BY id"""
+_DELETE_JOB_PAGES = (
+    "DELETE FROM links WHERE job_id = ?",
+    "DELETE FROM crawl_pages WHERE job_id = ?",
+)
+_BUMP_JOB_REVISION = "UPDATE crawl_jobs SET revision = revision + 1 WHERE id = ?"
+# _metrics_row order: (job_id, target_domain, referring, total, follow_pct, da, json)
+_UPDATE_METRICS = """UPDATE crawl_metrics
+    SET referring_domains = ?3, total_backlinks = ?4, follow_pct = ?5, estimated_da = ?6,
+        metrics_json = ?7
+    WHERE job_id = ?1 AND target_domain = ?2"""
+# Cached page of the exact body re-extracted: (page, target_domain, final_url, content_hash)
+_REFRESH_HTTP_CACHE_PAGE = """UPDATE http_cache SET page = ?
+    WHERE target_domain = ? AND final_url = ? AND content_hash = ?"""
+
+_UPSERT_CHECKPOINT = """INSERT INTO crawl_checkpoints (job_id, pages_done, state, updated_at)
+    VALUES (?, ?, ?, datetime('now'))
+    ON CONFLICT(job_id) DO UPDATE SET pages_done = excluded.pages_done,
+        state = excluded.state, updated_at = excluded.updated_at"""
+_SELECT_JOB = """SELECT id, target_domain, seed_urls, status, created_at, max_pages,
+    (SELECT pages_done FROM crawl_checkpoints c WHERE c.job_id = j.id),
+    attempts, error, lease_owner, heartbeat_at, finished_at
+    FROM crawl_jobs j WHERE id = ?"""
+
+_INSERT_JOB = """INSERT INTO crawl_jobs (target_domain, seed_urls, status, max_pages)
+    VALUES (?, ?, 'queued', ?)"""
+# Jobs whose lease ran out after their last allowed attempt: (error, now, max_attempts)
+_FAIL_EXPIRED_JOBS = """UPDATE crawl_jobs
+    SET status = 'failed', error = ?, lease_owner = NULL, lease_expires_at = NULL,
+        finished_at = datetime('now')
+    WHERE status = 'running' AND COALESCE(lease_expires_at, 0) < ? AND attempts >= ?"""
+# Claim the oldest queued (or lease-expired) job in one statement, so concurrent
+# workers in any process never get the same job. The last condition is the
+# global running-jobs cap (0 = unlimited).
+# (owner, lease_expires_at, now, now, max_attempts, max_running, now, max_running)
+_CLAIM_JOB = """UPDATE crawl_jobs
+    SET status = 'running', lease_owner = ?, lease_expires_at = ?, heartbeat_at = ?,
+        attempts = attempts + 1, error = NULL
+    WHERE id = (
+        SELECT id FROM crawl_jobs
+        WHERE (status = 'queued' OR (status = 'running' AND COALESCE(lease_expires_at, 0) < ?))
+          AND attempts < ?
+        ORDER BY id LIMIT 1)
+      AND (? <= 0 OR (SELECT COUNT(*) FROM crawl_jobs
+                      WHERE status = 'running' AND lease_expires_at >= ?) < ?)
+    RETURNING id, target_domain, seed_urls, max_pages, attempts"""
+# (lease_expires_at, now, job_id, owner)
+_HEARTBEAT_JOB = """UPDATE crawl_jobs SET lease_expires_at = ?, heartbeat_at = ?
+    WHERE id = ? AND status = 'running' AND lease_owner = ?"""
+# (status, error, job_id); also used to re-queue a failed job
+_FINISH_JOB = """UPDATE crawl_jobs
+    SET status = ?1, error = ?2, lease_owner = NULL, lease_expires_at = NULL,
+        finished_at = CASE WHEN ?1 IN ('completed', 'failed') THEN datetime('now') END
+    WHERE id = ?3"""
+# Put a failed job back in the queue with fresh attempts: (job_id,)
+_REQUEUE_JOB = """UPDATE crawl_jobs
+    SET status = 'queued', attempts = 0, error = NULL, finished_at = NULL
+    WHERE id = ? AND status = 'failed'"""
+# Graceful worker shutdown hands a job back without using up an attempt: (job_id, owner)
+_RELEASE_JOB = """UPDATE crawl_jobs
+    SET status = 'queued', lease_owner = NULL, lease_expires_at = NULL, attempts = attempts - 1
+    WHERE id = ? AND status = 'running' AND lease_owner = ?"""
+
+_SELECT_HTTP_CACHE = """SELECT final_url, etag, last_modified, content_hash, page,
+        CAST(strftime('%s', validated_at) AS REAL)
+    FROM http_cache WHERE url = ? AND target_domain = ?"""
+# Batch lookup for sitemap URLs: (target_domain, url, ...) with {marks} placeholders
+_SELECT_HTTP_CACHE_MANY = """SELECT url, final_url, etag, last_modified, content_hash, page,
+        CAST(strftime('%s', validated_at) AS REAL)
+    FROM http_cache WHERE target_domain = ? AND url IN ({marks})"""
+# (url, target_domain, final_url, etag, last_modified, content_hash, page)
+_UPSERT_HTTP_CACHE = """INSERT INTO http_cache
+    (url, target_domain, final_url, etag, last_modified, content_hash, page)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(url, target_domain) DO UPDATE SET
+        final_url = excluded.final_url, etag = excluded.etag,
+        last_modified = excluded.last_modified, content_hash = excluded.content_hash,
+        page = excluded.page, fetched_at = datetime('now'), validated_at = datetime('now')"""
+# Revalidated without a new body: (etag, last_modified, url, target_domain)
+_TOUCH_HTTP_CACHE = """UPDATE http_cache
+    SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified),
+        validated_at = datetime('now')
+    WHERE url = ? AND target_domain = ?"""
+
+_SELECT_ROBOTS = "SELECT status, body, fetched_at, expires_at FROM robots_cache WHERE origin = ?"
+_UPSERT_ROBOTS = """INSERT INTO robots_cache (origin, status, body, fetched_at, expires_at)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(origin) DO UPDATE SET
+        status = excluded.status, body = excluded.body,
+        fetched_at = excluded.fetched_at, expires_at = excluded.expires_at"""
+
+# Rewind a job to its checkpoint: pages past the first pages_done (by id) go.
+_SELECT_REWIND_CUTOFF = "SELECT id FROM crawl_pages WHERE job_id = ? ORDER BY id LIMIT 1 OFFSET ?"
+_REWIND_JOB = (
+    "DELETE FROM links WHERE job_id = ? AND source_page_id >= ?",
+    "DELETE FROM crawl_pages WHERE job_id = ? AND id >= ?",
+)
+
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",  # readers don't block the writer and vice versa
+    "PRAGMA synchronous=NORMAL",  # fsync at checkpoints only; safe with WAL
+    "PRAGMA busy_timeout=30000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-32000",  # ~32 MB page cache
+    "PRAGMA mmap_size=268435456",
+)
+
+_local = threading.local()
+_lock = threading.Lock()
+_initialized: set[str] = set()
+_open: list[sqlite3.Connection] = []
+_generation = 0  # bumped by close_all() so other threads drop closed connections
 
 
 def get_db(path: str | None = None) -> str:
@@ -9,45 +325,332 @@ def get_db(path: str | None = None) -> str:
     return path or get_db_path()
 
 
+def _configure(conn: sqlite3.Connection) -> None:
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    """
+    Long-lived connection for db_path, one per thread (sqlite3 connections are
+    not shared across threads). Pragmas are applied and the schema is created
+    once per process, not on every call.
+    """
+    conns: dict[str, sqlite3.Connection] | None = getattr(_local, "conns", None)
+    if conns is None or getattr(_local, "generation", -1) != _generation:
+        conns = _local.conns = {}
+        _local.generation = _generation
+    conn = conns.get(db_path)
+    if conn is None:
+        init_schema(db_path)
+        conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        _configure(conn)
+        conns[db_path] = conn
+        with _lock:
+            _open.append(conn)
+    return conn
+
+
 def init_schema(db_path: str) -> None:
-    conn = sqlite3.connect(db_path)
-    conn.executescript("""
-        CREATE TABLE IF NOT EXISTS crawl_jobs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            target_domain TEXT NOT NULL,
-            seed_urls TEXT NOT NULL,
-            status TEXT NOT NULL DEFAULT 'pending',
-            created_at TEXT NOT NULL DEFAULT (datetime('now'))
-        );
-        CREATE TABLE IF NOT EXISTS crawl_pages (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            job_id INTEGER NOT NULL,
-            url TEXT NOT NULL,
-            domain TEXT NOT NULL,
-            title TEXT,
-            meta_description TEXT,
-            internal_count INTEGER,
-            external_count INTEGER,
-            follow_count INTEGER,
-            nofollow_count INTEGER,
-            links_json TEXT,
-            FOREIGN KEY (job_id) REFERENCES crawl_jobs(id)
-        );
-        CREATE TABLE IF NOT EXISTS crawl_metrics (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            job_id INTEGER NOT NULL UNIQUE,
-            target_domain TEXT NOT NULL,
-            referring_domains INTEGER,
-            total_backlinks INTEGER,
-            follow_pct REAL,
-            estimated_da REAL,
-            metrics_json TEXT,
-            updated_at TEXT NOT NULL DEFAULT (datetime('now')),
-            FOREIGN KEY (job_id) REFERENCES crawl_jobs(id)
-        );
-    """)
-    conn.commit()
-    conn.close()
+    """Create / migrate tables once per process (run from the API lifespan)."""
+    with _lock:
+        if db_path in _initialized:
+            return
+        conn = sqlite3.connect(db_path, timeout=30)
+        try:
+            _configure(conn)
+            migrate(conn)
+        finally:
+            conn.close()
+        _initialized.add(db_path)
+
+
+def _run_script(conn: sqlite3.Connection, script: str) -> None:
+    # executescript() would COMMIT first; run statements inside the migration transaction.
+    for stmt in script.split(";"):
+        if stmt.strip():
+            conn.execute(stmt)
+
+
+def _migrate_v1(conn: sqlite3.Connection) -> None:
+    _run_script(conn, _SCHEMA_V1)
+
+
+def _migrate_v2(conn: sqlite3.Connection) -> None:
+    """Normalize links: move links_json / metrics backlinks into the links table."""
+    _run_script(conn, _SCHEMA_V2)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            """SELECT id, job_id, domain, links_json FROM crawl_pages
+               WHERE id > ? AND links_json IS NOT NULL ORDER BY id LIMIT ?""",
+            (last_id, PAGE_BATCH_SIZE),
+        ).fetchall()
+        if not rows:
+            break
+        for page_id, job_id, domain, links_json in rows:
+            links = json.loads(links_json or "[]")
+            for sql, params in _link_statements(job_id, [(page_id, domain, links)]):
+                conn.executemany(sql, params)
+        last_id = rows[-1][0]
+    for metrics_id, metrics_json in conn.execute(
+        "SELECT id, metrics_json FROM crawl_metrics WHERE metrics_json LIKE '%\"backlinks\"%'"
+    ).fetchall():
+        metrics = json.loads(metrics_json)
+        metrics.pop("backlinks", None)
+        conn.execute(
+            "UPDATE crawl_metrics SET metrics_json = ? WHERE id = ?",
+            (json.dumps(metrics), metrics_id),
+        )
+    if sqlite3.sqlite_version_info >= (3, 35, 0):
+        conn.execute("ALTER TABLE crawl_pages DROP COLUMN links_json")
+    else:
+        conn.execute("UPDATE crawl_pages SET links_json = NULL")
+
+
+def _migrate_v3(conn: sqlite3.Connection) -> None:
+    _run_script(conn, _SCHEMA_V3)
+
+
+def _migrate_v4(conn: sqlite3.Connection) -> None:
+    _run_script(conn, _SCHEMA_V4)
+
+
+def _migrate_v5(conn: sqlite3.Connection) -> None:
+    _run_script(conn, _SCHEMA_V5)
+
+
+def _migrate_v6(conn: sqlite3.Connection) -> None:
+    _run_script(conn, _SCHEMA_V6)
+
+
+def _migrate_v7(conn: sqlite3.Connection) -> None:
+    _run_script(conn, _SCHEMA_V7)
+
+
+def _migrate_v8(conn: sqlite3.Connection) -> None:
+    _run_script(conn, _SCHEMA_V8)
+
+
+# (version, step); PRAGMA user_version records the last applied step.
+_MIGRATIONS = (
+    (1, _migrate_v1),
+    (2, _migrate_v2),
+    (3, _migrate_v3),
+    (4, _migrate_v4),
+    (5, _migrate_v5),
+    (6, _migrate_v6),
+    (7, _migrate_v7),
+    (8, _migrate_v8),
+)
+
+
+def migrate(conn: sqlite3.Connection) -> None:
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    for target, step in _MIGRATIONS:
+        if version >= target:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            step(conn)
+            conn.execute(f"PRAGMA user_version = {target}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        version = target
+
+
+def close_all() -> None:
+    """Close every pooled connection (API shutdown)."""
+    global _generation
+    with _lock:
+        for conn in _open:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        _open.clear()
+        _generation += 1
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _page_row(job_id: int, p: dict) -> tuple:
+    archived = p.get("archive") or {}
+    return (
+        job_id,
+        p["url"],
+        p["domain"],
+        p.get("title", ""),
+        p.get("meta_description", ""),
+        p.get("internal_count", 0),
+        p.get("external_count", 0),
+        p.get("follow_count", 0),
+        p.get("nofollow_count", 0),
+        archived.get("file"),
+        archived.get("offset"),
+        archived.get("length"),
+    )
+
+
+def rel_flags(link: dict) -> int:
+    rel = (link.get("rel") or "").split()
+    flags = 0
+    if link.get("is_internal"):
+        flags |= REL_INTERNAL
+    if link.get("is_nofollow") or "nofollow" in rel:
+        flags |= REL_NOFOLLOW
+    if "ugc" in rel:
+        flags |= REL_UGC
+    if "sponsored" in rel:
+        flags |= REL_SPONSORED
+    return flags
+
+
+def _link_statements(
+    job_id: int, pages: list[tuple[int, str, list[dict]]]
+) -> list[tuple[str, list]]:
+    """
+    executemany batches interning domains / urls and inserting links for
+    (page_id, page_domain, links) triples. Ids are resolved by sub-selects so
+    the whole batch runs without per-row round trips.
+    """
+    domains: set[str] = set()
+    urls: dict[str, str] = {}
+    link_rows: list[tuple] = []
+    for page_id, page_domain, links in pages:
+        domains.add(page_domain)
+        for L in links:
+            href = L["href"]
+            tgt_domain = L.get("domain") or url_domain(href)
+            domains.add(tgt_domain)
+            urls[href] = tgt_domain
+            link_rows.append(
+                (job_id, page_id, page_domain, href, tgt_domain, L.get("anchor", ""), rel_flags(L))
+            )
+    return [
+        (_INSERT_DOMAIN, [(d,) for d in domains]),
+        (_INSERT_URL, list(urls.items())),
+        (_INSERT_LINK, link_rows),
+    ]
+
+
+def encode_state(state: dict) -> bytes:
+    return zlib.compress(json.dumps(state, separators=(",", ":")).encode(), 6)
+
+
+def decode_state(blob: bytes) -> dict:
+    return json.loads(zlib.decompress(blob))
+
+
+def _job(row: tuple | None) -> dict | None:
+    if not row:
+        return None
+    (job_id, target_domain, seed_urls, status, created_at, max_pages, pages_done,
+     attempts, error, lease_owner, heartbeat_at, finished_at) = row
+    return {
+        "job_id": job_id,
+        "target_domain": target_domain,
+        "seed_urls": json.loads(seed_urls),
+        "status": status,
+        "created_at": created_at,
+        "finished_at": finished_at,
+        "max_pages": max_pages,
+        "pages_done": pages_done,
+        "attempts": attempts,
+        "error": error,
+        "worker": lease_owner,
+        "heartbeat_at": heartbeat_at,
+    }
+
+
+def _backlinks(rows: list[tuple]) -> list[dict]:
+    return [
+        {
+            "source": src,
+            "target": tgt,
+            "anchor": anchor or "",
+            "nofollow": bool(flags & REL_NOFOLLOW),
+        }
+        for src, tgt, anchor, flags in rows
+    ]
+
+
+def _backlinks_args(target_domain: str, job_id: int) -> tuple:
+    target = normalize_target(target_domain)
+    return (target, job_id, registrable_domain(target))
+
+
+def _graph_pages(rows: list[tuple]) -> list[dict]:
+    """Group _SELECT_JOB_GRAPH rows into LinkGraph page dicts."""
+    pages: list[dict] = []
+    page: dict | None = None
+    for url, domain, href, tgt_domain, anchor, flags in rows:
+        if page is None or page["url"] != url:
+            page = {"url": url, "domain": domain, "links": []}
+            pages.append(page)
+        if href is not None:
+            page["links"].append({
+                "href": href,
+                "domain": tgt_domain,
+                "anchor": anchor or "",
+                "is_nofollow": bool(flags & REL_NOFOLLOW),
+            })
+    return pages
+
+
+def _metrics_row(job_id: int, target_domain: str, metrics: dict) -> tuple:
+    # Backlinks live in the links table; get_report rebuilds them from there.
+    stored = {k: v for k, v in metrics.items() if k != "backlinks"}
+    return (
+        job_id,
+        target_domain,
+        metrics.get("referring_domains", 0),
+        metrics.get("total_backlinks", 0),
+        metrics.get("follow_pct", 0),
+        metrics.get("estimated_da", 0),
+        json.dumps(stored),
+    )
+
+
+def _insert_pages(conn: sqlite3.Connection, job_id: int, chunk: list[dict]) -> None:
+    """Insert one chunk of pages and their links; caller commits."""
+    conn.executemany(_INSERT_PAGE, [_page_row(job_id, p) for p in chunk])
+    # AUTOINCREMENT ids of one executemany inside our transaction are consecutive.
+    last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+    first_id = last_id - len(chunk) + 1
+    triples = [(first_id + i, p["domain"], p.get("links", [])) for i, p in enumerate(chunk)]
+    for sql, params in _link_statements(job_id, triples):
+        conn.executemany(sql, params)
+
+
+def store_pages(db_path: str, job_id: int, pages: list[dict]) -> None:
+    """Append pages (and their links) to a job; callable repeatedly while a crawl runs."""
+    conn = connect(db_path)
+    # Chunked transactions keep each write lock short so /report readers interleave.
+    for chunk in _chunks(pages, PAGE_BATCH_SIZE):
+        with conn:
+            _insert_pages(conn, job_id, chunk)
+
+
+def store_metrics(
+    db_path: str,
+    job_id: int,
+    target_domain: str,
+    metrics: dict,
+    status: str = "completed",
+) -> None:
+    """Write the job's metrics row and set its final status."""
+    conn = connect(db_path)
+    with conn:
+        conn.execute(_INSERT_METRICS, _metrics_row(job_id, target_domain, metrics))
+        conn.execute(_FINISH_JOB, (status, None, job_id))
+        if status == "completed":
+            conn.execute("DELETE FROM crawl_checkpoints WHERE job_id = ?", (job_id,))
 
 
 def store_crawl(
@@ -57,76 +660,135 @@ def store_crawl(
     pages: list[dict],
     metrics: dict,
 ) -> None:
-    init_schema(db_path)
-    conn = sqlite3.connect(db_path)
-    for p in pages:
-        conn.execute(
-            """INSERT INTO crawl_pages
-               (job_id, url, domain, title, meta_description,
-                internal_count, external_count, follow_count, nofollow_count, links_json)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-            (
-                job_id,
-                p["url"],
-                p["domain"],
-                p.get("title", ""),
-                p.get("meta_description", ""),
-                p.get("internal_count", 0),
-                p.get("external_count", 0),
-                p.get("follow_count", 0),
-                p.get("nofollow_count", 0),
-                json.dumps(p.get("links", [])),
-            ),
-        )
-    conn.execute(
-        """INSERT OR REPLACE INTO crawl_metrics
-           (job_id, target_domain, referring_domains, total_backlinks,
-            follow_pct, estimated_da, metrics_json, updated_at)
-           VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now'))""",
-        (
-            job_id,
-            target_domain,
-            metrics.get("referring_domains", 0),
-            metrics.get("total_backlinks", 0),
-            metrics.get("follow_pct", 0),
-            metrics.get("estimated_da", 0),
-            json.dumps(metrics),
-        ),
-    )
-    conn.execute(
-        "UPDATE crawl_jobs SET status = ? WHERE id = ?",
-        ("completed", job_id),
-    )
-    conn.commit()
-    conn.close()
+    store_pages(db_path, job_id, pages)
+    store_metrics(db_path, job_id, target_domain, metrics)
 
 
-def create_job(db_path: str, target_domain: str, seed_urls: list[str]) -> int:
-    init_schema(db_path)
-    conn = sqlite3.connect(db_path)
-    cur = conn.execute(
-        "INSERT INTO crawl_jobs (target_domain, seed_urls, status) VALUES (?, ?, ?)",
-        (target_domain, json.dumps(seed_urls), "pending"),
-    )
-    job_id = cur.lastrowid or 0
-    conn.commit()
-    conn.close()
-    return job_id
+def create_job(
+    db_path: str,
+    target_domain: str,
+    seed_urls: list[str],
+    max_pages: int | None = None,
+) -> int:
+    conn = connect(db_path)
+    with conn:
+        cur = conn.execute(_INSERT_JOB, (target_domain, json.dumps(seed_urls), max_pages))
+    return cur.lastrowid or 0
 
 
-def get_report(db_path: str, target_domain: str) -> dict | None:
-    init_schema(db_path)
-    conn = sqlite3.connect(db_path)
-    row = conn.execute(
-        """SELECT metrics_json, updated_at FROM crawl_metrics m
-           JOIN crawl_jobs j ON j.id = m.job_id
-           WHERE m.target_domain = ? AND j.status = 'completed'
-           ORDER BY m.updated_at DESC LIMIT 1""",
-        (target_domain,),
+def get_job(db_path: str, job_id: int) -> dict | None:
+    return _job(connect(db_path).execute(_SELECT_JOB, (job_id,)).fetchone())
+
+
+def list_jobs(db_path: str, status: str) -> list[int]:
+    rows = connect(db_path).execute(
+        "SELECT id FROM crawl_jobs WHERE status = ? ORDER BY id", (status,)
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def set_job_status(db_path: str, job_id: int, status: str, error: str | None = None) -> None:
+    conn = connect(db_path)
+    with conn:
+        conn.execute(_FINISH_JOB, (status, error, job_id))
+
+
+def load_checkpoint(db_path: str, job_id: int) -> dict | None:
+    row = connect(db_path).execute(
+        "SELECT state FROM crawl_checkpoints WHERE job_id = ?", (job_id,)
     ).fetchone()
-    conn.close()
+    return decode_state(row[0]) if row else None
+
+
+def rewind_job(db_path: str, job_id: int, pages_done: int) -> None:
+    """Drop pages stored after the job's last checkpoint, so a resume does not store them twice."""
+    conn = connect(db_path)
+    with conn:
+        row = conn.execute(_SELECT_REWIND_CUTOFF, (job_id, pages_done)).fetchone()
+        if row:
+            for sql in _REWIND_JOB:
+                conn.execute(sql, (job_id, row[0]))
+
+
+def job_archive(db_path: str, job_id: int) -> list[dict | None]:
+    """Archive location of each of the job's pages, in crawl order; None where there is none."""
+    rows = connect(db_path).execute(_SELECT_JOB_ARCHIVE, (job_id,)).fetchall()
+    return [
+        {"file": f, "offset": offset, "length": length} if f is not None else None
+        for f, offset, length in rows
+    ]
+
+
+def replace_job_pages(
+    db_path: str,
+    job_id: int,
+    target_domain: str,
+    pages: list[dict],
+    metrics: dict,
+    cache_pages: list[tuple[bytes, dict]] = (),
+) -> None:
+    """
+    Swap a job's pages, links and metrics for re-extracted ones in one
+    transaction. cache_pages, (content hash, page) pairs, also replace the
+    revalidation cache's page for that very body, so re-crawls reuse them.
+    The job's revision goes up, so sync_link_graph merges it again.
+    """
+    conn = connect(db_path)
+    with conn:
+        for sql in _DELETE_JOB_PAGES:
+            conn.execute(sql, (job_id,))
+        for chunk in _chunks(pages, PAGE_BATCH_SIZE):
+            _insert_pages(conn, job_id, chunk)
+        conn.execute(_UPDATE_METRICS, _metrics_row(job_id, target_domain, metrics))
+        conn.execute(_BUMP_JOB_REVISION, (job_id,))
+        conn.executemany(_REFRESH_HTTP_CACHE_PAGE, [
+            (encode_state(page), target_domain, page["url"], content_hash)
+            for content_hash, page in cache_pages
+        ])
+
+
+def get_report(db_path: str, target_domain: str) -> dict | None:
+    conn = connect(db_path)
+    row = conn.execute(_SELECT_REPORT, (target_domain,)).fetchone()
     if not row:
         return None
     out = json.loads(row[0])
     out["updated_at"] = row[1]
+    rows = conn.execute(_SELECT_BACKLINKS, _backlinks_args(target_domain, row[2])).fetchall()
+    out["backlinks"] = _backlinks(rows)
     return out
+
+
+def unmerged_jobs(db_path: str, graph) -> list[tuple[int, int]]:
+    """(job id, revision) of completed jobs graph has not merged at that revision, oldest first."""
+    return [
+        (job_id, revision) for job_id, revision in connect(db_path).execute(_SELECT_COMPLETED_JOBS)
+        if graph.jobs.get(job_id) != revision
+    ]
+
+
+def sync_link_graph(db_path: str, graph) -> int:
+    """
+    Merge completed jobs not yet in graph (a linkgraph.LinkGraph), oldest
+    first, and again those re-extracted since they were merged; returns how
+    many.
+    """
+    conn = connect(db_path)
+    jobs = unmerged_jobs(db_path, graph)
+    for job_id, revision in jobs:
+        rows = conn.execute(_SELECT_JOB_GRAPH, (job_id,)).fetchall()
+        graph.merge(_graph_pages(rows), job_id, revision)
+    return len(jobs)
+
+
+def get_backlinks_to_url(db_path: str, url: str, job_id: int | None = None) -> list[dict]:
+    """Who links to url (indexed lookup); optionally limited to one job."""
+    sql = """SELECT p.url, u.url, l.anchor, l.rel_flags FROM links l
+             JOIN urls u ON u.id = l.target_url_id
+             JOIN crawl_pages p ON p.id = l.source_page_id
+             WHERE l.target_url_id = (SELECT id FROM urls WHERE url = ?)"""
+    params: tuple = (url,)
+    if job_id is not None:
+        sql += " AND l.job_id = ?"
+        params += (job_id,)
+    return _backlinks(connect(db_path).execute(sql + " ORDER BY l.id", params).fetchall())
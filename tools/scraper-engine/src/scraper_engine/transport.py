@@ -0,0 +1,138 @@
+"""
+Shared HTTP client for crawls and robots.txt fetches.
+
+One AsyncClient per event loop (and limits): connections, TLS sessions and
+HTTP/2 multiplexing carry over between hosts' robots.txt and pages, and
+between crawl jobs in the same process. A tracing transport counts what
+was actually opened, so connection reuse is measurable: process-wide
+(transport_stats()) and per crawl (transport_counter()).
+"""
+
+import asyncio
+import logging
+import weakref
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+
+import httpx
+
+from .config import CrawlConfig
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TransportStats:
+    requests: int = 0
+    connections: int = 0  # TCP connects
+    tls_handshakes: int = 0
+    http2_connections: int = 0
+    http2_requests: int = 0
+
+    @property
+    def reused(self) -> int:
+        """Requests sent on an already-open connection."""
+        return max(0, self.requests - self.connections)
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "reused": self.reused}
+
+    def since(self, before: "TransportStats") -> "TransportStats":
+        return TransportStats(**{k: v - getattr(before, k) for k, v in asdict(self).items()})
+
+
+class _TracingTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that feeds httpcore trace events into TransportStats."""
+
+    def __init__(self, stats: TransportStats, **kwargs):
+        super().__init__(**kwargs)
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions = {**request.extensions, "trace": self._trace}
+        return await super().handle_async_request(request)
+
+    async def _trace(self, event: str, info: dict) -> None:
+        _count(self.stats, event)
+        for counter in _counters.get():
+            _count(counter, event)
+
+
+def _count(s: TransportStats, event: str) -> None:
+    if event == "connection.connect_tcp.complete":
+        s.connections += 1
+    elif event == "connection.start_tls.complete":
+        s.tls_handshakes += 1
+    elif event == "http2.send_connection_init.complete":
+        s.http2_connections += 1
+    elif event == "http11.send_request_headers.started":
+        s.requests += 1
+    elif event == "http2.send_request_headers.started":
+        s.requests += 1
+        s.http2_requests += 1
+
+
+_stats = TransportStats()  # process-wide, across all shared clients
+# The transport_counter()s the requesting task runs under, outermost first.
+_counters: ContextVar[tuple[TransportStats, ...]] = ContextVar("transport_counters", default=())
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[tuple, httpx.AsyncClient]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_client(cfg: CrawlConfig | None = None) -> httpx.AsyncClient:
+    """Shared client for the running event loop and cfg's HTTP/2 + pool settings."""
+    cfg = cfg or CrawlConfig()
+    key = (
+        cfg.http2, cfg.max_connections, cfg.max_keepalive_connections, cfg.keepalive_expiry_seconds
+    )
+    per_loop = _clients.setdefault(asyncio.get_running_loop(), {})
+    client = per_loop.get(key)
+    if client is None or client.is_closed:
+        limits = httpx.Limits(
+            max_connections=cfg.max_connections,
+            max_keepalive_connections=cfg.max_keepalive_connections,
+            keepalive_expiry=cfg.keepalive_expiry_seconds,
+        )
+        try:
+            transport = _TracingTransport(_stats, http2=cfg.http2, limits=limits)
+        except ImportError:
+            # httpx[http2] extra (h2) not installed
+            logger.warning("h2 not installed; crawling over HTTP/1.1")
+            transport = _TracingTransport(_stats, http2=False, limits=limits)
+        client = per_loop[key] = httpx.AsyncClient(
+            transport=transport,
+            headers={"User-Agent": cfg.user_agent},
+            follow_redirects=True,
+            timeout=cfg.timeout_seconds,
+        )
+        logger.info("http client: http2=%s max_connections=%d keepalive=%d",
+                    cfg.http2, cfg.max_connections, cfg.max_keepalive_connections)
+    return client
+
+
+def transport_stats() -> TransportStats:
+    return TransportStats(**asdict(_stats))
+
+
+@contextmanager
+def transport_counter() -> Iterator[TransportStats]:
+    """
+    Also count the requests made in this context, including tasks created in
+    it, into a fresh TransportStats; concurrent crawls each get their own.
+    """
+    stats = TransportStats()
+    token = _counters.set((*_counters.get(), stats))
+    try:
+        yield stats
+    finally:
+        _counters.reset(token)
+
+
+async def close_clients() -> None:
+    """Close the running loop's shared clients (API / worker shutdown)."""
+    per_loop = _clients.pop(asyncio.get_running_loop(), {})
+    for client in per_loop.values():
+        await client.aclose()
@@ -0,0 +1,114 @@
+"""
+Shared URL helpers: host normalization, crawl-key normalization and
+target / subdomain matching.
+
+join_url is urljoin with a fast path for absolute and root-relative hrefs.
+Extraction parses each link once and stores its normalized host ("domain")
+and crawl key ("normalized") on the link, so the crawler, graph and storage
+reuse them instead of parsing the href again.
+"""
+
+from functools import lru_cache
+from urllib.parse import SplitResult, urljoin, urlsplit
+
+from .psl import registrable_domain
+
+HOST_CACHE_SIZE = 65_536  # distinct netlocs memoized by normalize_host
+
+
+@lru_cache(maxsize=HOST_CACHE_SIZE)
+def normalize_host(netloc: str) -> str:
+    """Lower-cased host[:port] without a leading "www."."""
+    d = netloc.lower().strip()
+    if d.startswith("www."):
+        d = d[4:]
+    return d
+
+
+def url_domain(url: str) -> str:
+    """Normalized host of a URL ("" if it has none)."""
+    return normalize_host(urlsplit(url).netloc)
+
+
+def normalize_target(target: str) -> str:
+    """Normalized host of a target given as a URL or as a bare domain."""
+    if target.startswith(("http://", "https://")):
+        return url_domain(target)
+    return normalize_host(target)
+
+
+@lru_cache(maxsize=256)
+def _origin(base: str) -> str:
+    parts = urlsplit(base)
+    if parts.scheme not in ("http", "https") or not parts.netloc:
+        return ""
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def _plain_path(ref: str) -> bool:
+    """True if urljoin keeps this path[?query][#fragment] as is (no dot / empty segments)."""
+    if not ref.isprintable() or ref.endswith(("?", "#")) or "?#" in ref:
+        return False
+    path = ref.split("?", 1)[0].split("#", 1)[0]
+    return "/." not in path and "//" not in path
+
+
+def join_url(base: str, href: str) -> str:
+    """
+    urljoin(base, href), skipping the general algorithm for the common cases:
+    absolute http(s) hrefs and root-relative paths without dot segments.
+    """
+    if href.startswith(("https://", "http://")) and href.isprintable():
+        rest = href[href.index("//") + 2:]
+        ends = (rest.find("/"), rest.find("?"), rest.find("#"))
+        cut = min((i for i in ends if i >= 0), default=len(rest))
+        authority = rest[:cut]
+        if authority and "[" not in authority and "]" not in authority and _plain_path(rest[cut:]):
+            return href
+    elif href.startswith("/") and not href.startswith("//"):
+        origin = _origin(base)
+        if origin and _plain_path(href):
+            return origin + href
+    return urljoin(base, href)
+
+
+def crawl_key(parts: SplitResult) -> str:
+    """Dedupe form of a split absolute URL: no fragment, no trailing slash (except the root)."""
+    path = parts.path
+    if path and path != "/":
+        path = path.rstrip("/")
+    query = f"?{parts.query}" if parts.query else ""
+    return f"{parts.scheme}://{parts.netloc}{path}{query}"
+
+
+def normalize_url(url: str, base: str = "") -> str:
+    """crawl_key of url, resolved against base first if it is relative."""
+    url = url.strip()
+    if not url:
+        return url
+    if base and not url.startswith(("http://", "https://")):
+        url = urljoin(base, url)
+    return crawl_key(urlsplit(url))
+
+
+class DomainMatcher:
+    """Is a normalized host the target domain or one of its subdomains?"""
+
+    __slots__ = ("domain", "site", "_dot")
+
+    def __init__(self, target: str):
+        self.domain = normalize_target(target)
+        self.site = registrable_domain(self.domain)
+        self._dot = "." + self.domain
+
+    def __call__(self, host: str) -> bool:
+        return host == self.domain or host.endswith(self._dot)
+
+    def related(self, host: str) -> bool:
+        """
+        Crawl scope: also true when host is a parent of the target, up to its
+        registrable domain (blog.example.co.uk -> example.co.uk, never co.uk).
+        """
+        if host == self.domain or host.endswith(self._dot):
+            return True
+        return self.domain.endswith("." + host) and len(host) >= len(self.site)
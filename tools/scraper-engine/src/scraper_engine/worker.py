@@ -0,0 +1,216 @@
+"""
+Crawl job worker: claims queued jobs from crawl_jobs and runs them.
+
+Run standalone (python run_worker.py) to take crawl load off the API process;
+start as many worker processes, on as many machines sharing the DB, as needed.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+
+from . import async_storage
+from .archive import ResponseArchive, archive_file
+from .async_storage import LeaseLost
+from .config import CrawlConfig, WorkerConfig
+from .crawler import crawl
+from .executor import shutdown_executors
+from .robots import set_robots_store
+from .storage import get_db
+from .transport import close_clients
+
+logger = logging.getLogger(__name__)
+
+
+def job_config(max_pages: int | None) -> CrawlConfig:
+    return CrawlConfig(max_pages_per_domain=min(5000, max(1, max_pages or 500)))
+
+
+async def run_job(
+    db: str,
+    job_id: int,
+    seed_urls: list[str],
+    target_domain: str,
+    cfg: CrawlConfig,
+    resume: dict | None = None,
+    owner: str | None = None,
+) -> None:
+    """
+    Run (or continue) a stored crawl job. Pages, crawl state and metric counters
+    are checkpointed together every cfg.checkpoint_every_pages pages; a failure
+    keeps what was stored so far and marks the job failed with partial metrics.
+    With cfg.archive_dir, raw responses are appended to the job's .warc.gz there.
+    """
+    sink = async_storage.PageSink(db, job_id, target_domain, resume=resume, owner=owner)
+    archive = ResponseArchive(cfg.archive_dir, archive_file(job_id)) if cfg.archive_dir else None
+    try:
+        await crawl(seed_urls, target_domain, cfg, on_page=sink, checkpoint=sink.checkpoint,
+                    resume=resume, http_cache=async_storage.HttpCache(db, target_domain),
+                    archive=archive)
+        metrics = await sink.finish()
+        logger.info("crawl job %s done: %s pages, %s referring domains",
+                    job_id, metrics.get("pages_crawled"), metrics.get("referring_domains"))
+    except LeaseLost:
+        logger.warning("crawl job %s: lease lost, abandoning this run", job_id)
+    except Exception as e:
+        logger.exception("crawl job %s failed: %s", job_id, e)
+        try:
+            await sink.finish(status="failed", error=str(e) or type(e).__name__)
+        except LeaseLost:
+            pass
+        except Exception:
+            logger.exception("crawl job %s: could not persist partial results", job_id)
+    finally:
+        if archive is not None:
+            archive.close()
+
+
+class Worker:
+    """
+    Claims up to config.concurrency jobs at a time and heartbeats their
+    leases. stop() cancels running crawls and hands their jobs back to the
+    queue, so another worker resumes them from their last checkpoint.
+    """
+
+    def __init__(
+        self, db_path: str, config: WorkerConfig | None = None, worker_id: str | None = None
+    ):
+        self.db_path = db_path
+        self.config = config or WorkerConfig()
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self._jobs: dict[int, asyncio.Task] = {}
+        self._wake = asyncio.Event()
+        self._stopping = asyncio.Event()
+
+    def wake(self) -> None:
+        """Claim now instead of at the next poll (a job was just enqueued)."""
+        self._wake.set()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._wake.set()
+
+    async def run(self) -> None:
+        cfg = self.config
+        logger.info("worker %s: concurrency=%d max_running_jobs=%d lease=%.0fs",
+                    self.worker_id, cfg.concurrency, cfg.max_running_jobs, cfg.lease_seconds)
+        try:
+            while not self._stopping.is_set():
+                self._wake.clear()
+                while len(self._jobs) < cfg.concurrency:
+                    try:
+                        job = await async_storage.claim_job(
+                            self.db_path, self.worker_id, cfg.lease_seconds, cfg.max_running_jobs
+                        )
+                    except Exception as e:
+                        logger.warning("worker %s: claiming a job failed: %s", self.worker_id, e)
+                        break
+                    if job is None:
+                        break
+                    self._start(job)
+                wake = asyncio.ensure_future(self._wake.wait())
+                await asyncio.wait(
+                    {wake, *self._jobs.values()},
+                    timeout=cfg.poll_interval_seconds,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                wake.cancel()
+        finally:
+            for task in self._jobs.values():
+                task.cancel()
+            await asyncio.gather(*self._jobs.values(), return_exceptions=True)
+
+    def _start(self, job: dict) -> None:
+        job_id = job["job_id"]
+        task = asyncio.create_task(self._run_job(job))
+        self._jobs[job_id] = task
+        task.add_done_callback(lambda _: self._jobs.pop(job_id, None))
+
+    async def _run_job(self, job: dict) -> None:
+        job_id = job["job_id"]
+        state = await async_storage.load_checkpoint(self.db_path, job_id)
+        # Pages a previous attempt stored after its last checkpoint get crawled again.
+        await async_storage.rewind_job(self.db_path, job_id, state["pages_done"] if state else 0)
+        logger.info("worker %s: crawl job %s attempt %d, resuming at %d pages",
+                    self.worker_id, job_id, job["attempts"], state["pages_done"] if state else 0)
+        crawl_task = asyncio.create_task(run_job(
+            self.db_path, job_id, job["seed_urls"], job["target_domain"],
+            job_config(job["max_pages"]), resume=state, owner=self.worker_id,
+        ))
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, crawl_task))
+        try:
+            await crawl_task
+        except asyncio.CancelledError:
+            if not asyncio.current_task().cancelling():
+                return  # the heartbeat cancelled the crawl: lease lost
+            crawl_task.cancel()
+            await asyncio.gather(crawl_task, return_exceptions=True)
+            if self._stopping.is_set():
+                await async_storage.release_job(self.db_path, job_id, self.worker_id)
+                logger.info(
+                    "worker %s: crawl job %s handed back to the queue", self.worker_id, job_id
+                )
+            raise
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: int, crawl_task: asyncio.Task) -> None:
+        interval = self.config.lease_seconds / 3
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                alive = await async_storage.heartbeat_job(
+                    self.db_path, job_id, self.worker_id, self.config.lease_seconds
+                )
+            except Exception as e:
+                # Transient DB trouble: keep crawling; the lease covers a few missed beats.
+                logger.warning(
+                    "worker %s: heartbeat for job %s failed: %s", self.worker_id, job_id, e
+                )
+                continue
+            if not alive:
+                logger.warning("worker %s: lost lease on crawl job %s", self.worker_id, job_id)
+                crawl_task.cancel()
+                return
+
+
+async def _serve(db: str, config: WorkerConfig) -> None:
+    worker = Worker(db, config)
+    set_robots_store(async_storage.RobotsStore(db))
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+    try:
+        await worker.run()
+    finally:
+        shutdown_executors()
+        await close_clients()
+        await async_storage.close_all()
+
+
+def main() -> None:
+    defaults = WorkerConfig()
+    ap = argparse.ArgumentParser(description="Run queued crawl jobs from the scraper-engine DB.")
+    ap.add_argument("--db", default=None, help="SQLite DB path (default: SCRAPER_ENGINE_DB)")
+    ap.add_argument("--concurrency", type=int, default=defaults.concurrency,
+                    help="crawl jobs this worker runs at once")
+    ap.add_argument("--max-running-jobs", type=int, default=defaults.max_running_jobs,
+                    help="global cap on running jobs across all workers (0 = none)")
+    ap.add_argument("--lease-seconds", type=float, default=defaults.lease_seconds)
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    config = WorkerConfig(
+        concurrency=max(1, args.concurrency),
+        max_running_jobs=args.max_running_jobs,
+        lease_seconds=args.lease_seconds,
+        embedded=False,
+    )
+    asyncio.run(_serve(get_db(args.db), config))
+
+
+if __name__ == "__main__":
+    main()
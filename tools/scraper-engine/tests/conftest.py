@@ -0,0 +1,81 @@
+from collections.abc import Awaitable, Callable
+
+import httpx
+import pytest
+
+from scraper_engine import async_storage, crawler, storage
+from scraper_engine.config import CrawlConfig
+
+Response = httpx.Response | Awaitable[httpx.Response]
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A fresh SQLite DB (schema applied); pooled connections are closed afterwards."""
+    path = str(tmp_path / "test.db")
+    storage.init_schema(path)
+    yield path
+    storage.close_all()
+
+
+@pytest.fixture
+async def adb(db):
+    """The db fixture for async_storage; its connections are closed afterwards."""
+    yield db
+    await async_storage.close_all()
+
+
+class Site:
+    """
+    An in-memory site that crawl() fetches from instead of the network.
+
+    pages maps a path (with query) to its HTML, or to a callable (sync or
+    async) answering the httpx.Request itself; any other path is a 404.
+    requested lists the paths fetched, in order (full URLs for other hosts,
+    which get 404s too).
+    """
+
+    base = "http://site.test"
+
+    def __init__(self) -> None:
+        self.pages: dict[str, str | Callable[[httpx.Request], Response]] = {}
+        self.requested: list[str] = []
+
+    def url(self, path: str) -> str:
+        return self.base + path
+
+    @staticmethod
+    def config(**overrides) -> CrawlConfig:
+        """Crawl settings for the site: one worker, breadth-first, no robots, sitemaps or delays."""
+        settings = dict(
+            max_concurrent=1,
+            request_delay_seconds=0.0,
+            adaptive_rate=False,
+            respect_robots=False,
+            use_sitemaps=False,
+            frontier_order="fifo",
+            extract_mode="inline",
+        )
+        return CrawlConfig(**{**settings, **overrides})
+
+    def handler(self, request: httpx.Request) -> Response:
+        if request.url.host != "site.test":
+            self.requested.append(str(request.url))
+            return httpx.Response(404)
+        path = request.url.raw_path.decode()
+        self.requested.append(path)
+        page = self.pages.get(path)
+        if page is None:
+            return httpx.Response(404)
+        if callable(page):
+            return page(request)
+        return httpx.Response(200, html=page)
+
+
+@pytest.fixture
+def site(monkeypatch) -> Site:
+    s = Site()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(s.handler))
+    monkeypatch.setattr(crawler, "get_client", lambda cfg=None: client)
+    return s
+
@@ -0,0 +1,137 @@
+import math
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from scraper_engine import api, storage
+from scraper_engine.authority import Authority
+from scraper_engine.cache import TTLCache
+from scraper_engine.graph import MetricsAccumulator
+from scraper_engine.linkgraph import LinkGraph
+from scraper_engine.robots import set_robots_store
+
+
+def link(href: str) -> dict:
+    return {"href": href, "anchor": "", "rel": "", "is_internal": False, "is_nofollow": False}
+
+
+def completed_job(db: str, target: str, pages: list[dict]) -> int:
+    job_id = storage.create_job(db, target, [pages[0]["url"]])
+    acc = MetricsAccumulator(target)
+    for p in pages:
+        acc.add(p)
+    storage.store_crawl(db, job_id, target, pages, acc.result())
+    return job_id
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setenv("SCRAPER_ENGINE_DB", db)
+    monkeypatch.setenv("SCRAPER_ENGINE_EMBEDDED_WORKER", "0")
+    monkeypatch.setattr(api, "_link_graph", LinkGraph())
+    monkeypatch.setattr(api, "_authority", Authority())
+    monkeypatch.setattr(api, "_link_graph_synced", -math.inf)
+    monkeypatch.setattr(api, "_refresh_task", None)
+    monkeypatch.setattr(api, "_analyze_cache", TTLCache(60, 16))
+    completed_job(db, "target.example", [
+        {"url": "https://one.example/", "domain": "one.example",
+         "links": [link("https://target.example/"), link("https://two.example/")]},
+        {"url": "https://two.example/", "domain": "two.example",
+         "links": [link("https://target.example/a")]},
+    ])
+    with TestClient(api.app) as c:
+        yield c
+    set_robots_store(None)
+
+
+def test_report_uses_authority_score(client):
+    report = client.get("/report/target.example").json()
+    assert report["total_backlinks"] == 2
+    assert report["authority"]["site"] == "target.example"
+    assert report["estimated_da"] == report["authority"]["score"]
+
+
+def test_off_page_analyze_matches_report(client):
+    report = client.get("/report/target.example").json()
+    body = {"url": "https://target.example/", "max_staleness": 3600}
+    analyzed = client.post("/off-page-analyze", json=body).json()
+    assert analyzed["source"] == "stored"
+    assert analyzed["estimated_da"] == report["estimated_da"]
+    assert analyzed["authority"] == report["authority"]
+
+
+def test_off_page_analyze_caches_crawl(client, monkeypatch):
+    crawls = []
+
+    async def crawl_metrics(seed_urls: list[str], domain: str) -> dict:
+        crawls.append(domain)
+        metrics = {"referring_domains": 5, "pages_crawled": 9}
+        api._analyze_cache.put(domain, metrics)
+        return metrics
+
+    monkeypatch.setattr(api, "_crawl_metrics", crawl_metrics)
+    body = {"url": "https://www.target.example/", "max_staleness": 0}
+    assert client.post("/off-page-analyze", json=body).json()["source"] == "crawl"
+    analyzed = client.post("/off-page-analyze", json={"url": "https://target.example/"}).json()
+    assert (analyzed["source"], analyzed["referring_domains"]) == ("cache", 5)
+    assert crawls == ["target.example"]
+
+
+def test_link_graph_refresh_is_rate_limited(client, db, monkeypatch):
+    calls = []
+    refresh = api._refresh_link_graph
+    monkeypatch.setattr(api, "_refresh_link_graph", lambda *a: calls.append(1) or refresh(*a))
+    client.get("/report/target.example")
+    client.get("/report/target.example/aggregate")
+    assert len(calls) == 1
+    # A job finished since is merged at the next refresh.
+    completed_job(db, "target.example", [
+        {"url": "https://three.example/", "domain": "three.example",
+         "links": [link("https://target.example/")]},
+    ])
+    monkeypatch.setattr(api, "_link_graph_synced", -math.inf)
+    aggregate = client.get("/report/target.example/aggregate").json()
+    assert len(calls) == 2
+    assert aggregate["jobs"] == 2
+    assert aggregate["referring_domains"] == 3
+
+
+def test_stale_link_graph_refreshes_in_background(client, db, monkeypatch):
+    assert client.get("/report/target.example/aggregate").json()["jobs"] == 1
+    completed_job(db, "target.example", [
+        {"url": "https://three.example/", "domain": "three.example",
+         "links": [link("https://target.example/")]},
+    ])
+    started = threading.Event()
+    release = threading.Event()
+    refresh = api._refresh_link_graph
+
+    def slow_refresh(*a):
+        started.set()
+        release.wait(5)
+        return refresh(*a)
+
+    monkeypatch.setattr(api, "_refresh_link_graph", slow_refresh)
+    monkeypatch.setattr(api, "_link_graph_synced", time.monotonic() - 3600)
+    # The refresh is running; reports keep serving the previous graph.
+    assert client.get("/report/target.example/aggregate").json()["jobs"] == 1
+    assert started.wait(5)
+    assert client.get("/report/target.example/aggregate").json()["jobs"] == 1
+    release.set()
+    deadline = time.monotonic() + 5
+    while client.get("/report/target.example/aggregate").json()["jobs"] != 2:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_failed_refresh_still_serves_report(client, monkeypatch):
+    def broken(*a):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(api, "_refresh_link_graph", broken)
+    resp = client.get("/report/target.example")
+    assert resp.status_code == 200
+    assert resp.json()["total_backlinks"] == 2
+    assert "authority" not in resp.json()
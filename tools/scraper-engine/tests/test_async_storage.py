@@ -0,0 +1,145 @@
+import asyncio
+
+import pytest
+
+from scraper_engine import async_storage, storage
+from scraper_engine.crawler import crawl
+
+
+async def _create_jobs(db: str, n: int) -> list[int]:
+    seeds = [[f"https://example.com/{i}"] for i in range(n)]
+    ids = await asyncio.gather(*(async_storage.create_job(db, "example.com", s) for s in seeds))
+    await async_storage.close_all()
+    return ids
+
+
+def test_successive_event_loops(db, tmp_path):
+    # Contended locks bind to their loop; a second asyncio.run() must get its own.
+    first = asyncio.run(_create_jobs(db, 5))
+    other = str(tmp_path / "other.db")
+    assert asyncio.run(_create_jobs(other, 5)) == [1, 2, 3, 4, 5]
+    assert asyncio.run(_create_jobs(db, 3)) == [max(first) + i for i in (1, 2, 3)]
+
+
+async def test_job_roundtrip(db):
+    job_id = await async_storage.create_job(db, "example.com", ["https://example.com/"], 10)
+    job = await async_storage.get_job(db, job_id)
+    assert job["target_domain"] == "example.com"
+    assert job["status"] == "queued"
+    await async_storage.close_all()
+
+
+def chain(site, n: int) -> None:
+    """Pages /p/0 .. /p/{n-1}, each linking to the next."""
+    for i in range(n):
+        nxt = f'<a href="/p/{i + 1}">next</a>' if i + 1 < n else ""
+        site.pages[f"/p/{i}"] = f"<title>{i}</title>{nxt}"
+
+
+def stored(db: str, job_id: int) -> list[str]:
+    rows = storage.connect(db).execute(
+        "SELECT url FROM crawl_pages WHERE job_id = ? ORDER BY id", (job_id,)
+    ).fetchall()
+    return [u for (u,) in rows]
+
+
+async def test_sink_writes_pages_at_each_checkpoint(adb, site):
+    chain(site, 5)
+    job_id = await async_storage.create_job(adb, "site.test", [site.url("/p/0")])
+    sink = async_storage.PageSink(adb, job_id, "site.test")
+    pages = await crawl([site.url("/p/0")], "site.test",
+                        site.config(checkpoint_every_pages=2),
+                        on_page=sink, checkpoint=sink.checkpoint)
+    assert pages == []  # streamed into the sink, not kept
+    assert stored(adb, job_id) == [site.url(f"/p/{i}") for i in range(4)]
+    state = await async_storage.load_checkpoint(adb, job_id)
+    assert state["pages_done"] == 4
+    assert state["metrics"]["pages"] == 4
+
+    metrics = await sink.finish()
+    assert metrics["pages_crawled"] == 5
+    assert stored(adb, job_id) == [site.url(f"/p/{i}") for i in range(5)]
+    assert (await async_storage.get_job(adb, job_id))["status"] == "completed"
+    assert await async_storage.load_checkpoint(adb, job_id) is None
+    report = await async_storage.get_report(adb, "site.test")
+    assert report["pages_crawled"] == 5
+
+
+async def test_sink_keeps_pages_of_failed_checkpoint(adb):
+    job_id = await async_storage.create_job(adb, "target.example", [])
+    sink = async_storage.PageSink(adb, job_id, "target.example", owner="w1")
+    await sink({"url": "https://site.example/", "domain": "site.example", "links": []})
+    # Not leased to w1: the write is refused and the page stays buffered.
+    with pytest.raises(async_storage.LeaseLost):
+        await sink.checkpoint({"frontier": [], "seen": {}, "pages_done": 1})
+    assert stored(adb, job_id) == []
+    sink.owner = None
+    await sink.finish(status="failed", error="boom")
+    assert stored(adb, job_id) == ["https://site.example/"]
+    job = await async_storage.get_job(adb, job_id)
+    assert (job["status"], job["error"]) == ("failed", "boom")
+
+
+async def test_rewind_drops_pages_after_checkpoint(adb):
+    job_id = await async_storage.create_job(adb, "target.example", [])
+    pages = [{"url": f"https://site.example/{i}", "domain": "site.example",
+              "links": [{"href": "https://target.example/", "anchor": str(i)}]} for i in range(5)]
+    await async_storage.store_pages(adb, job_id, pages)
+    await async_storage.rewind_job(adb, job_id, 3)
+    assert stored(adb, job_id) == [p["url"] for p in pages[:3]]
+    anchors = storage.connect(adb).execute(
+        "SELECT anchor FROM links WHERE job_id = ? ORDER BY id", (job_id,)
+    ).fetchall()
+    assert anchors == [("0",), ("1",), ("2",)]
+    await async_storage.rewind_job(adb, job_id, 3)  # nothing past the cutoff
+    assert len(stored(adb, job_id)) == 3
+
+
+async def test_claim_leases_oldest_job_once(adb):
+    first = await async_storage.create_job(adb, "a.example", ["https://a.example/"], 10)
+    second = await async_storage.create_job(adb, "b.example", [])
+    job = await async_storage.claim_job(adb, "w1", 60)
+    assert job == {"job_id": first, "target_domain": "a.example",
+                   "seed_urls": ["https://a.example/"], "max_pages": 10, "attempts": 1}
+    # A global cap of one running job stops the second claim.
+    assert await async_storage.claim_job(adb, "w2", 60, max_running=1) is None
+    assert (await async_storage.claim_job(adb, "w2", 60))["job_id"] == second
+    assert await async_storage.claim_job(adb, "w3", 60) is None
+    assert await async_storage.heartbeat_job(adb, first, "w1", 60)
+    assert not await async_storage.heartbeat_job(adb, first, "w2", 60)
+
+
+async def test_expired_lease_is_claimed_again(adb):
+    job_id = await async_storage.create_job(adb, "a.example", [])
+    await async_storage.claim_job(adb, "w1", -1)  # lease already run out
+    job = await async_storage.claim_job(adb, "w2", 60)
+    assert (job["job_id"], job["attempts"]) == (job_id, 2)
+    # The first worker's writes are refused from now on.
+    with pytest.raises(async_storage.LeaseLost):
+        await async_storage._write_job(adb, job_id, [], status="completed", owner="w1")
+    assert not await async_storage.heartbeat_job(adb, job_id, "w1", 60)
+    assert (await async_storage.get_job(adb, job_id))["worker"] == "w2"
+
+
+async def test_job_fails_after_max_attempts(adb, monkeypatch):
+    monkeypatch.setattr(async_storage, "JOB_MAX_ATTEMPTS", 2)
+    job_id = await async_storage.create_job(adb, "a.example", [])
+    for owner in ("w1", "w2"):
+        assert (await async_storage.claim_job(adb, owner, -1))["job_id"] == job_id
+    assert await async_storage.claim_job(adb, "w3", 60) is None
+    job = await async_storage.get_job(adb, job_id)
+    assert job["status"] == "failed" and "2 attempts" in job["error"]
+
+    assert await async_storage.requeue_job(adb, job_id)
+    assert not await async_storage.requeue_job(adb, job_id)  # only failed jobs
+    assert (await async_storage.claim_job(adb, "w3", 60))["attempts"] == 1
+
+
+async def test_release_hands_job_back_without_using_an_attempt(adb):
+    job_id = await async_storage.create_job(adb, "a.example", [])
+    await async_storage.claim_job(adb, "w1", 60)
+    await async_storage.release_job(adb, job_id, "w2")  # not w2's to release
+    assert (await async_storage.get_job(adb, job_id))["status"] == "running"
+    await async_storage.release_job(adb, job_id, "w1")
+    job = await async_storage.get_job(adb, job_id)
+    assert (job["status"], job["attempts"], job["worker"]) == ("queued", 0, None)
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from scraper_engine.cache import SingleFlight, TTLCache
+
+
+def test_ttl_and_max_age():
+    cache = TTLCache(ttl_seconds=60, max_entries=4)
+    cache.put("fresh", 1)
+    cache.put("old", 2, age=50)
+    cache.put("stale", 3, age=60)  # already past the TTL: not stored
+    assert cache.get("fresh")[0] == 1
+    value, age = cache.get("old")
+    assert value == 2 and 50 <= age < 51
+    assert cache.get("old", max_age=30) is None  # too old for this caller, still cached
+    assert cache.get("old")[0] == 2
+    assert cache.get("stale") is None and len(cache) == 2
+
+
+def test_lru_eviction():
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert (cache.get("a"), cache.get("b")) == ((1, pytest.approx(0, abs=1)), None)
+    disabled = TTLCache(ttl_seconds=60, max_entries=0)
+    disabled.put("a", 1)
+    assert disabled.get("a") is None
+
+
+async def test_single_flight_shares_one_call():
+    flight = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return "done"
+
+    results = await asyncio.gather(*(flight.do("k", work) for _ in range(3)))
+    assert results == [("done", False), ("done", True), ("done", True)]
+    assert calls == 1 and not flight.in_flight("k")
+    assert await flight.do("k", work) == ("done", False)  # results are not kept
+    assert calls == 2
+
+
+async def test_single_flight_survives_a_cancelled_caller():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def work():
+        await release.wait()
+        return 42
+
+    first = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(flight.do("k", work))
+    await asyncio.sleep(0)
+    first.cancel()  # client went away
+    release.set()
+    assert await second == (42, True)
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_single_flight_raises_to_every_caller():
+    flight = SingleFlight()
+
+    async def fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("crawl failed")
+
+    results = await asyncio.gather(flight.do("k", fail), flight.do("k", fail),
+                                   return_exceptions=True)
+    assert [str(r) for r in results] == ["crawl failed"] * 2
+    assert not flight.in_flight("k")
@@ -0,0 +1,44 @@
+import time
+
+from scraper_engine.canonical import UrlCanonicalizer
+
+HOST = "https://example.com"
+
+
+def test_tracking_params_dropped_and_sorted():
+    canon = UrlCanonicalizer()
+    assert canon.canonical(f"{HOST}/a?utm_source=x&b=2&a=1&gclid=z") == f"{HOST}/a?a=1&b=2"
+    assert canon.canonical(f"{HOST}/a?PHPSESSID=abc") == f"{HOST}/a"
+    assert canon.canonical(f"{HOST}/a;jsessionid=123") == f"{HOST}/a"
+    assert canon.canonical(f"{HOST}/a;v=2") == f"{HOST}/a;v=2"
+    assert canon.canonical(f"{HOST}/a") == f"{HOST}/a"
+
+
+def test_param_learned_from_near_duplicates():
+    canon = UrlCanonicalizer(learn_after=2)
+    for n in range(3):
+        canon.observe(f"{HOST}/list?from=home{n}", 0xABCDEF)
+    assert canon.learned == {"example.com": {"from"}}
+    assert canon.canonical(f"{HOST}/list?from=x&page=2") == f"{HOST}/list?page=2"
+    assert canon.canonical("https://other.com/list?from=x") == "https://other.com/list?from=x"
+
+
+def test_param_that_changes_text_kept():
+    canon = UrlCanonicalizer(learn_after=2)
+    canon.observe(f"{HOST}/list?page=1", 0)
+    canon.observe(f"{HOST}/list?page=2", (1 << 64) - 1)  # different text: page matters
+    for n in range(3, 6):
+        canon.observe(f"{HOST}/list?page={n}", (1 << 64) - 1)
+    assert "page" not in canon.learned.get("example.com", set())
+
+
+def test_traps():
+    canon = UrlCanonicalizer(max_url_length=100, max_path_segments=4, max_segment_repeats=2)
+    year = time.gmtime().tm_year
+    assert canon.trap(f"{HOST}/" + "x" * 100) == "long URL"
+    assert canon.trap(f"{HOST}/a/b/c/d/e") == "deep path"
+    assert canon.trap(f"{HOST}/a/x/x/x") == "repeated path segment"
+    assert canon.trap(f"{HOST}/events/{year + 20}/01") == "calendar"
+    assert canon.trap(f"{HOST}/events?year={year + 20}") == "calendar"
+    assert canon.trap(f"{HOST}/events/{year}/01") is None
+    assert canon.trap(f"{HOST}/a/x/x") is None
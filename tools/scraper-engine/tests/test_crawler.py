@@ -0,0 +1,161 @@
+import asyncio
+
+import httpx
+import pytest
+
+from scraper_engine.crawler import crawl
+
+
+def hub(n: int, extra: str = "") -> str:
+    return "".join(f'<a href="/p/{i}">{i}</a>' for i in range(n)) + extra
+
+
+async def test_workers_fetch_concurrently(site):
+    active = peak = 0
+
+    async def slow(request: httpx.Request) -> httpx.Response:
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        return httpx.Response(200, html="<p>leaf</p>")
+
+    site.pages = {"/": hub(12), **{f"/p/{i}": slow for i in range(12)}}
+    pages = await crawl([site.url("/")], "site.test", site.config(max_concurrent=4))
+    assert len(pages) == 13
+    assert 1 < peak <= 4
+
+
+async def test_page_budget(site):
+    site.pages = {"/": hub(20), **{f"/p/{i}": "<p>leaf</p>" for i in range(20)}}
+    pages = await crawl([site.url("/")], "site.test", site.config(max_pages_per_domain=5))
+    assert len(pages) == 5
+    assert len({p["url"] for p in pages}) == 5
+
+
+async def test_scope_and_sink(site):
+    site.pages = {
+        "/": hub(2, '<a href="https://elsewhere.test/x">out</a><a href="/p/0#frag">again</a>'),
+        "/p/0": '<a href="http://blog.site.test/">sub</a>',
+        "/p/1": "<p>leaf</p>",
+    }
+    stored = []
+
+    async def sink(page: dict) -> None:
+        stored.append(page["url"])
+
+    pages = await crawl([site.url("/")], "site.test", site.config(), on_page=sink)
+    assert pages == []
+    assert stored == [site.url("/"), site.url("/p/0"), site.url("/p/1")]
+    # Subdomains are in scope, elsewhere.test is not; /p/0#frag is /p/0.
+    assert sorted(site.requested) == ["/", "/p/0", "/p/1", "http://blog.site.test/"]
+
+
+async def test_resume_from_checkpoint(site):
+    site.pages = {f"/p/{i}": f'<a href="/p/{i + 1}">next</a>' for i in range(6)}
+    states, stored = [], []
+
+    async def checkpoint(state: dict) -> None:
+        states.append(state)
+
+    async def sink(page: dict) -> None:
+        if page["url"].endswith("/p/3"):
+            raise RuntimeError("disk full")
+        stored.append(page["url"])
+
+    cfg = site.config(checkpoint_every_pages=2, max_pages_per_domain=5)
+    with pytest.raises(RuntimeError, match="disk full"):
+        await crawl([site.url("/p/0")], "site.test", cfg, on_page=sink, checkpoint=checkpoint)
+    assert stored == [site.url(f"/p/{i}") for i in range(3)]
+    state = states[-1]
+    assert state["pages_done"] == 2 and state["frontier"] == [[site.url("/p/2"), 2]]
+
+    # /p/2 came after the checkpoint, so it is crawled again; the budget counts on from 2.
+    site.requested.clear()
+    states.clear()
+    pages = []
+
+    async def resumed(page: dict) -> None:
+        pages.append(page)
+
+    await crawl([site.url("/p/0")], "site.test", cfg, on_page=resumed, checkpoint=checkpoint,
+                resume=state)
+    assert [p["url"] for p in pages] == [site.url(f"/p/{i}") for i in (2, 3, 4)]
+    assert site.requested == ["/p/2", "/p/3", "/p/4"]
+    # Depth carries on from the checkpoint instead of restarting at 0.
+    assert states[0]["frontier"] == [[site.url("/p/4"), 4]]
+
+
+async def test_body_cap_and_content_type_gate(site):
+    chunks_read = []
+
+    async def big_body(request: httpx.Request) -> httpx.Response:
+        async def chunks():
+            yield b'<a href="/early">early</a>' + b" " * 1000
+            for i in range(100):
+                chunks_read.append(i)
+                yield b"<p>" + b"x" * 1000 + b"</p>"
+            yield b'<a href="/late">late</a>'
+
+        return httpx.Response(200, headers={"content-type": "text/html"}, content=chunks())
+
+    def pdf(request: httpx.Request) -> httpx.Response:
+        async def never():
+            raise AssertionError("body of a skipped content type was read")
+            yield b""
+
+        return httpx.Response(200, headers={"content-type": "application/pdf"}, content=never())
+
+    site.pages = {
+        "/": hub(0, '<a href="/big">big</a><a href="/doc.pdf">pdf</a><a href="/plain">t</a>'),
+        "/big": big_body,
+        "/doc.pdf": pdf,
+        "/plain": lambda request: httpx.Response(
+            200, headers={"content-type": "TEXT/HTML; charset=utf-8"}, content=b"<p>ok</p>"
+        ),
+        "/early": "<p>early</p>",
+    }
+    pages = await crawl([site.url("/")], "site.test", site.config(max_body_bytes=4096))
+    assert [p["url"] for p in pages] == [site.url(u) for u in ("/", "/big", "/plain", "/early")]
+    # Only the prefix was downloaded and parsed: /late is beyond it.
+    assert len(chunks_read) < 10
+    assert "/late" not in site.requested
+
+
+async def test_compact_frontier_and_seen_set(site):
+    site.pages = {"/": hub(30, '<a href="/">home</a>'),
+                  **{f"/p/{i}": hub(30) for i in range(30)}}
+    cfg = site.config(seen_backend="fingerprint", frontier_memory_limit=5)
+    pages = await crawl([site.url("/")], "site.test", cfg)
+    assert len(pages) == 31
+    assert sorted(site.requested) == sorted(["/", *(f"/p/{i}" for i in range(30))])
+
+
+async def test_retry_after_overload(site):
+    statuses = [503, 429, 200]
+
+    def flaky(request: httpx.Request) -> httpx.Response:
+        status = statuses.pop(0)
+        if status != 200:
+            return httpx.Response(status, headers={"retry-after": "0"})
+        return httpx.Response(200, html="<title>ok</title>")
+
+    site.pages = {"/": hub(0, '<a href="/flaky">f</a><a href="/down">d</a>'), "/flaky": flaky,
+                  "/down": lambda request: httpx.Response(503)}
+    cfg = site.config(max_retries=2, retry_backoff_seconds=0.01, adaptive_rate=True)
+    pages = await crawl([site.url("/")], "site.test", cfg)
+    assert [p["title"] for p in pages if p["url"].endswith("/flaky")] == ["ok"]
+    assert statuses == []
+    # /down is given up after the first try and max_retries more.
+    assert site.requested.count("/down") == 3
+
+
+async def test_priority_order_spends_budget_on_content(site):
+    listing = "".join(f'<a href="/page/{i}">{i}</a>' for i in range(2, 6))
+    site.pages = {"/": listing + '<a href="/about">a</a><a href="/contact">c</a>',
+                  **{f"/page/{i}": listing for i in range(2, 6)},
+                  "/about": "<p>about</p>", "/contact": "<p>contact</p>"}
+    pages = await crawl([site.url("/")], "site.test",
+                        site.config(frontier_order="priority", max_pages_per_domain=3))
+    assert [p["url"] for p in pages] == [site.url(u) for u in ("/", "/about", "/contact")]
@@ -0,0 +1,34 @@
+import pytest
+
+from scraper_engine.executor import ExtractionExecutor, _extract_job
+
+HTML = "<title>Café</title><a href='/next'>next</a>"
+
+
+@pytest.mark.parametrize("encoding", [None, "utf-8", "bogus", "x-unknown-charset"])
+def test_unknown_charset_decoded_as_utf8(encoding):
+    page, _, _ = _extract_job(HTML.encode(), encoding, "https://example.com/", "", "bs4", 0.0)
+    assert page["title"] == "Café"
+    assert page["links"][0]["href"] == "https://example.com/next"
+
+
+def test_declared_charset_used():
+    content = HTML.encode("latin-1")
+    page, _, _ = _extract_job(content, "latin1", "https://example.com/", "", "fast", 0.0)
+    assert page["title"] == "Café"
+
+
+@pytest.mark.parametrize("mode", ["inline", "thread"])
+async def test_executor_modes(mode):
+    executor = ExtractionExecutor(mode, workers=1)
+    try:
+        page, timing = await executor.extract(HTML.encode(), "bogus", "https://example.com/", "")
+    finally:
+        executor.shutdown()
+    assert page["title"] == "Café"
+    assert timing.parse_ms >= 0 and timing.queue_wait_ms >= 0
+
+
+def test_unknown_mode():
+    with pytest.raises(ValueError):
+        ExtractionExecutor("gpu")
@@ -0,0 +1,69 @@
+import pytest
+
+from scraper_engine.extractor import extract
+from scraper_engine.fast_extractor import extract_fast
+
+PAGE_URL = "https://example.com/dir/page.html"
+TARGET = "example.com"
+
+# Markup the streaming engine has to read exactly like the BeautifulSoup one.
+QUIRKS = {
+    # entities split text nodes; comments split them again
+    "entities": "<title> Tom &amp; Jerry </title><h1>Cats &amp; <b>Mice</b> <!-- x --> too</h1>",
+    # first meta description wins even if empty; og:description is the fallback
+    "empty-meta": '<meta name="description" content="">'
+                  '<meta property="og:description" content="og">',
+    "og-only": '<meta property="og:description" content=" og only ">',
+    # multi-valued rel, relative / odd hrefs, skipped schemes
+    "hrefs": '<link rel="alternate canonical" href="/canon/"><a href="/x" rel="NoFollow UGC">x</a>'
+             '<a href="#top">t</a><a href="javascript:void(0)">j</a><a href="mailto:a@b">m</a>'
+             '<a href=" ../up ">up</a><a href="//cdn.example.net/a">cdn</a><a>no href</a>',
+    "rels": '<a href="/n" rel="nofollow">n</a><a href="/u" rel="ugc">u</a>'
+            '<a href="/s" rel="sponsored noopener">s</a><a href="/m" rel="UGC  NOFOLLOW">m</a>'
+            '<a href="/e" rel="">e</a><a href="/x" rel=external>x</a>',
+    "entity-hrefs": '<a href="/q?a=1&amp;b=2">amp</a><a href="/p&#47;q">slash</a>'
+                    '<a href="&#x2F;hex?x=&quot;y&quot;">hex</a><a href="/caf&eacute;">named</a>'
+                    '<a href="/sp%20ace?q=a b">space</a><link rel=canonical href="/c?a=1&amp;b=2">',
+    "base-href": '<head><base href="https://cdn.example.org/base/"></head>'
+                 '<a href="rel">rel</a><a href="/abs">abs</a>',
+    # nested / unclosed anchors and headings, script & style inside anchors
+    "nesting": '<a href="/o">outer <a href="/i">inner</a> tail</a><h1>a<h1>b</h1>c</h1>'
+               "<a href=/s>t<script>var x = '<a>';</script>ext<style>.a{}</style></a>"
+               "<a href=/open>open",
+    # title with markup, title outside head, svg title
+    "title-markup": "<title>a<b>b</b></title><svg><title>svg</title></svg>",
+    "late-title": "<body><title>late title</title><a href='https://blog.example.com/p'>sub</a>"
+                  "<a href='https://notexample.com/'>ext</a>",
+    # broken / truncated documents
+    "truncated": "<html><head><title>trunc",
+    "unclosed-table": "<a href=/a>one</a><p><a href=/b>two<table><tr><td><a href=/c>three"
+                      "</td></tr></table>",
+    "stray-tags": "</p></div><a href='/a'>a</b></a></html><p>after<a href=/b>b",
+    "bad-attrs": '<a href="/a" href="/b">dup</a><a href=/c rel=nofollow rel=ugc>c</a>'
+                 "<a href='/d\"quote'>d</a><a href=\"/e\n\tf\">ws</a>",
+    "nul-and-cdata": "<p>a\x00b</p><![CDATA[ raw ]]><a href=/z>z\x00</a>",
+    # page chrome: links and headings count, text does not
+    "chrome": "<header><h1>Site</h1><nav><a href=/n>nav link</a> menu</nav></header>"
+              "<main><p>main text here</p><aside>related <a href=/r>r</a></aside></main>"
+              "<footer>footer <footer>nested</footer> text</footer><p>after chrome</p>",
+    "chrome-unclosed": "<nav>menu <a href=/n>n</a><p>never closed",
+}
+
+
+@pytest.mark.parametrize("html", QUIRKS.values(), ids=QUIRKS.keys())
+def test_engines_agree(html):
+    assert extract_fast(html, PAGE_URL, TARGET) == extract(html, PAGE_URL, TARGET)
+
+
+def test_rel_flags():
+    page = extract_fast(QUIRKS["rels"], PAGE_URL, TARGET)
+    nofollow = {link.href.rsplit("/", 1)[1]: link.is_nofollow for link in page.links}
+    assert nofollow == {"n": True, "u": False, "s": False, "m": True, "e": False, "x": False}
+    assert page.nofollow_count == 2
+
+
+def test_entity_encoded_hrefs():
+    page = extract_fast(QUIRKS["entity-hrefs"], PAGE_URL, TARGET)
+    hrefs = [link.href for link in page.links]
+    assert hrefs[:2] == ["https://example.com/q?a=1&b=2", "https://example.com/p/q"]
+    assert page.canonical == "https://example.com/c?a=1&b=2"
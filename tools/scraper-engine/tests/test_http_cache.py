@@ -0,0 +1,39 @@
+import httpx
+
+from scraper_engine.async_storage import HttpCache
+from scraper_engine.crawler import crawl
+
+
+async def test_recrawl_revalidates(adb, site):
+    conditional = []
+
+    def home(request: httpx.Request) -> httpx.Response:
+        conditional.append(request.headers.get("if-none-match"))
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers={"etag": '"v1"'})
+        links = '<a href="/same">same</a><a href="/changed">c</a><a href="/private">p</a>'
+        return httpx.Response(200, html="<title>Home</title>" + links, headers={"etag": '"v1"'})
+
+    version = "one"
+    site.pages = {
+        "/": home,
+        "/same": "<title>Same</title>",
+        "/changed": lambda request: httpx.Response(200, html=f"<title>{version}</title>"),
+        "/private": lambda request: httpx.Response(
+            200, html="<title>P</title>", headers={"cache-control": "no-store"}
+        ),
+    }
+    cache = HttpCache(adb, "site.test")
+    first = await crawl([site.url("/")], "site.test", site.config(), http_cache=cache)
+    version = "two"
+    second = await crawl([site.url("/")], "site.test", site.config(), http_cache=cache)
+
+    assert conditional == [None, '"v1"']
+    titles = {p["url"].rsplit("/", 1)[1]: p["title"] for p in second}
+    assert titles == {"": "Home", "same": "Same", "changed": "two", "private": "P"}
+    # The 304 and the unchanged body reuse the stored pages as they were.
+    by_url = {p["url"]: p for p in first}
+    for p in second[:2]:
+        assert p["links"] == by_url[p["url"]]["links"] and p["parse_ms"] == 0.0
+    assert (await cache.get(site.url("/changed"))).page["title"] == "two"
+    assert await cache.get(site.url("/private")) is None
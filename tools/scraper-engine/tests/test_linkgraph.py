@@ -0,0 +1,96 @@
+from scraper_engine import storage
+from scraper_engine.linkgraph import LinkGraph
+
+
+def page(url: str, *links: str, nofollow: tuple[str, ...] = ()) -> dict:
+    return {
+        "url": url,
+        "links": [{"href": h, "anchor": h, "is_nofollow": h in nofollow} for h in links],
+    }
+
+
+def test_source_keyed_like_link_targets():
+    g = LinkGraph()
+    g.add_page(page("https://a.example/about/", "https://b.example/x"))
+    g.add_page(page("https://b.example/x", "https://a.example/about"))
+    g.add_page(page("https://a.example/about#team", "https://b.example/y"))
+    assert len(g.urls) == 3  # a.example/about, b.example/x, b.example/y
+    assert g.pages == 2
+    # the last crawl of /about replaced the first one's edges
+    assert g.edges == 2
+    assert [b["source"] for b in g.backlinks("a.example")] == ["https://b.example/x"]
+    assert [(b["source"], b["target"]) for b in g.backlinks("b.example")] == [
+        ("https://a.example/about", "https://b.example/y")
+    ]
+
+
+def test_metrics_and_referring_sites():
+    g = LinkGraph()
+    g.merge([
+        page("https://blog.one.example/p", "https://target.example/", "https://target.example/a",
+             nofollow=("https://target.example/a",)),
+        page("https://two.example/q", "https://target.example/"),
+        page("https://target.example/", "https://target.example/a"),  # internal, not a backlink
+        page("https://shop.target.example/", "https://target.example/"),  # same site
+    ], job_id=1)
+    m = g.metrics("target.example")
+    assert m["total_backlinks"] == 3
+    assert m["referring_domains"] == 2
+    assert m["follow_count"] == 2 and m["nofollow_count"] == 1
+    assert g.referring_sites("target.example") == [("one.example", 2, 1), ("two.example", 1, 1)]
+    assert g.jobs == {1: 0}
+
+
+def test_recrawl_retires_old_edges_and_compacts():
+    g = LinkGraph()
+    g.add_page(page("https://one.example/p", "https://target.example/"))
+    g.add_page(page("https://one.example/p", "https://other.example/"))
+    assert g.metrics("target.example")["total_backlinks"] == 0
+    assert g.metrics("other.example")["total_backlinks"] == 1
+    assert g.dead == 1
+    g.compact()
+    assert g.dead == 0 and len(g.src) == 1
+    assert g.backlinks("other.example")[0]["source"] == "https://one.example/p"
+
+
+def test_sync_from_storage(db):
+    job_id = storage.create_job(db, "target.example", ["https://one.example/"])
+    pages = [
+        dict(page("https://one.example/dir/", "https://target.example/"), domain="one.example"),
+        dict(page("https://two.example/", "https://one.example/dir"), domain="two.example"),
+    ]
+    storage.store_crawl(db, job_id, "target.example", pages, {"referring_domains": 1})
+    g = LinkGraph()
+    assert storage.sync_link_graph(db, g) == 1
+    assert storage.sync_link_graph(db, g) == 0
+    assert g.pages == 2
+    # the stored source /dir/ and the link to /dir are one node
+    assert len(g.urls) == 3
+
+
+def test_merged_again_in_its_place():
+    g = LinkGraph()
+    g.merge([page("https://one.example/a", "https://target.example/old"),
+             page("https://one.example/b", "https://target.example/b1")], job_id=1)
+    g.merge([page("https://one.example/a", "https://target.example/newer")], job_id=2)
+    n = g.merge([page("https://one.example/a", "https://target.example/reextracted"),
+                 page("https://one.example/b", "https://target.example/b2")], job_id=1, revision=1)
+    assert n == 1  # /a belongs to the later job 2
+    assert g.jobs == {1: 1, 2: 0}
+    targets = {bl["target"] for bl in g.backlinks("target.example")}
+    assert targets == {"https://target.example/newer", "https://target.example/b2"}
+
+
+def test_sync_merges_replaced_job_again(db):
+    job_id = storage.create_job(db, "target.example", ["https://one.example/"])
+    before = dict(page("https://one.example/", "https://target.example/a"), domain="one.example")
+    storage.store_crawl(db, job_id, "target.example", [before], {"referring_domains": 1})
+    g = LinkGraph()
+    assert storage.sync_link_graph(db, g) == 1
+    after = dict(page("https://one.example/", "https://target.example/b"), domain="one.example")
+    storage.replace_job_pages(db, job_id, "target.example", [after], {"referring_domains": 1})
+    assert storage.sync_link_graph(db, g) == 1
+    assert storage.sync_link_graph(db, g) == 0
+    assert [bl["target"] for bl in g.backlinks("target.example")] == [
+        "https://target.example/b"
+    ]
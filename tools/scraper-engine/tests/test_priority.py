@@ -0,0 +1,39 @@
+from scraper_engine.priority import CrawlPriority, UrlHeap, directory
+
+BASE = "https://site.example"
+
+
+def drain(heap: UrlHeap) -> list[str]:
+    return [heap.pop_next()[0].removeprefix(BASE) for _ in range(len(heap))]
+
+
+def test_directory():
+    assert directory(BASE + "/blog/post?x=1") == BASE + "/blog"
+    assert directory(BASE + "/about?x=/y/z") == BASE
+    assert directory(BASE) == BASE
+
+
+def test_patterns_depth_and_links():
+    heap = UrlHeap(CrawlPriority(directory_quota=0), {})
+    heap.push(BASE + "/blog/page/2", depth=1)  # pagination
+    heap.push(BASE + "/deep", depth=2)
+    heap.push(BASE + "/tag/x", depth=1)  # tag archive
+    heap.push(BASE + "/about", depth=1)
+    heap.push(BASE + "/search?q=a&sort=b", depth=1)
+    heap.push(BASE + "/linked", depth=2)
+    for _ in range(3):
+        heap.boost(heap.entries[BASE + "/linked"], BASE + "/linked")  # 2 - log2(4): 0
+    heap.push_front(BASE + "/retry", depth=5)
+    assert list(heap) and len(heap) == 7
+    assert drain(heap) == ["/retry", "/linked", "/about", "/deep", "/tag/x", "/blog/page/2",
+                           "/search?q=a&sort=b"]
+    assert heap.entries == {}
+
+
+def test_directory_quota():
+    heap = UrlHeap(CrawlPriority(directory_quota=2, quota_penalty=10), {})
+    for i in range(4):
+        heap.push(f"{BASE}/a/{i}")
+    heap.push(BASE + "/b/0", depth=1)
+    # After two pages of /a the rest of it waits behind the deeper /b page.
+    assert drain(heap) == ["/a/0", "/a/1", "/b/0", "/a/2", "/a/3"]
@@ -0,0 +1,39 @@
+import pytest
+
+from scraper_engine.graph import MetricsAccumulator
+from scraper_engine.psl import registrable_domain
+
+
+@pytest.mark.parametrize("host, site", [
+    ("shop.example.co.uk", "example.co.uk"),
+    ("example.co.uk", "example.co.uk"),
+    ("co.uk", "co.uk"),  # itself a public suffix
+    ("a.b.example.com:8080", "example.com"),
+    ("me.github.io", "me.github.io"),  # private section
+    ("x.me.blogspot.com", "me.blogspot.com"),
+    ("a.b.foo.ck", "b.foo.ck"),  # *.ck
+    ("a.www.ck", "www.ck"),  # !www.ck
+    ("x.city.kawasaki.jp", "city.kawasaki.jp"),
+    ("a.b.c.kawasaki.jp", "b.c.kawasaki.jp"),
+    ("a.example.公司.cn", "example.公司.cn"),
+    ("a.example.xn--55qx5d.cn", "example.xn--55qx5d.cn"),  # punycode of the same rule
+    ("a.example.unlistedtld", "example.unlistedtld"),
+    ("192.168.0.1", "192.168.0.1"),
+    ("[::1]:8080", "[::1]"),
+    ("localhost", "localhost"),
+    ("example.com.", "example.com"),
+])
+def test_registrable_domain(host, site):
+    assert registrable_domain(host) == site
+
+
+def test_referring_domains_count_sites():
+    acc = MetricsAccumulator("target.example")
+    link = {"href": "https://target.example/", "anchor": ""}
+    for src in ("https://a.blog.example.co.uk/", "https://b.example.co.uk/",
+                "https://one.github.io/", "https://two.github.io/", "https://www.target.example/"):
+        acc.add({"url": src, "links": [link]})
+    # Two subdomains of one site count once; github.io users are separate sites;
+    # the target's own pages are not referrers.
+    assert sorted(acc.referring) == ["example.co.uk", "one.github.io", "two.github.io"]
+    assert acc.result()["total_backlinks"] == 4
@@ -0,0 +1,63 @@
+import httpx
+
+from scraper_engine import reextract, storage
+from scraper_engine.archive import ArchiveReader, ResponseArchive, archive_file
+from scraper_engine.crawler import crawl
+from scraper_engine.linkgraph import LinkGraph
+
+
+async def test_archive_round_trip(tmp_path):
+    response = httpx.Response(
+        200,
+        headers={"content-type": "text/html; charset=iso-8859-1", "content-encoding": "gzip"},
+        content=b"",
+        request=httpx.Request("GET", "https://example.com/p?q=1"),
+    )
+    archive = ResponseArchive(str(tmp_path), archive_file(7))
+    first = await archive.write(response, b"<p>caf\xe9</p>")
+    second = await archive.write(response, b"<p>cut", truncated=True)
+    archive.close()
+    assert first["offset"] == 0 and second["offset"] == first["length"]
+
+    reader = ArchiveReader(str(tmp_path))
+    record = reader.read(second)
+    assert (record.url, record.status, record.body, record.truncated) == (
+        "https://example.com/p?q=1", 200, b"<p>cut", True
+    )
+    record = reader.read(first)
+    assert record.body == b"<p>caf\xe9</p>" and not record.truncated
+    assert record.encoding == "iso-8859-1"
+    # Stored decoded, so the encoding header is dropped.
+    assert not any(k.lower() == "content-encoding" for k, _ in record.headers)
+    reader.close()
+
+
+async def test_reextract_job(db, site, tmp_path):
+    site.pages = {
+        "/": '<title>Home</title><a href="/a">a</a> <a href="https://ext.example/">x</a>',
+        "/a": '<h1>A</h1><a href="/">home</a>',
+    }
+    job_id = storage.create_job(db, "site.test", [site.url("/")])
+    archive = ResponseArchive(str(tmp_path), archive_file(job_id))
+    pages = await crawl([site.url("/")], "site.test", site.config(), archive=archive)
+    archive.close()
+    storage.store_crawl(db, job_id, "site.test", pages, {"referring_domains": 0})
+    graph = LinkGraph()
+    storage.sync_link_graph(db, graph)
+
+    reextract.open_archive(str(tmp_path))
+    metrics = reextract.reextract_job(db, job_id, map, engine="fast")
+    assert metrics["pages_crawled"] == 2
+    assert storage.get_job(db, job_id)["status"] == "completed"
+    assert [loc["offset"] for loc in storage.job_archive(db, job_id)] == [
+        p["archive"]["offset"] for p in pages
+    ]
+    # The link graph picks the re-extracted job up again.
+    assert storage.sync_link_graph(db, graph) == 1
+
+
+async def test_unarchived_job_skipped(db):
+    job_id = storage.create_job(db, "site.test", ["http://site.test/"])
+    page = {"url": "http://site.test/", "domain": "site.test", "links": []}
+    storage.store_crawl(db, job_id, "site.test", [page], {"referring_domains": 0})
+    assert reextract.reextract_job(db, job_id, map) is None
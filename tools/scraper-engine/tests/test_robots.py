@@ -0,0 +1,101 @@
+import httpx
+import pytest
+
+from scraper_engine import robots
+from scraper_engine.robots import RobotsCache, RobotsRules, fetch_rules
+
+UA = "TestBot/1.0"
+ORIGIN = "https://example.com"
+
+
+@pytest.fixture(autouse=True)
+def no_retry_delay(monkeypatch):
+    monkeypatch.setattr(robots, "ROBOTS_RETRY_DELAY", 0.0)
+
+
+def client_for(*responses: httpx.Response) -> tuple[httpx.AsyncClient, list[str]]:
+    """A client answering robots.txt requests with responses in turn (the last one repeats)."""
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        return responses[min(len(requested), len(responses)) - 1]
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler)), requested
+
+
+async def test_rules_parsed_and_max_age():
+    body = "User-agent: *\nDisallow: /private/\nCrawl-delay: 2\n"
+    client, requested = client_for(
+        httpx.Response(200, text=body, headers={"cache-control": "max-age=60"})
+    )
+    rules = await fetch_rules(ORIGIN, UA, client)
+    assert requested == [f"{ORIGIN}/robots.txt"]
+    assert rules.allowed(f"{ORIGIN}/page", UA)
+    assert not rules.allowed(f"{ORIGIN}/private/x", UA)
+    assert rules.delay(UA) == 2
+    assert 59 <= rules.expires_at - rules.fetched_at <= 60
+
+
+async def test_4xx_allows_everything():
+    client, requested = client_for(httpx.Response(404))
+    rules = await fetch_rules(ORIGIN, UA, client)
+    assert len(requested) == 1
+    assert not rules.disallow_all
+    assert rules.allowed(f"{ORIGIN}/anything", UA)
+    assert rules.expires_at - rules.fetched_at == robots.ROBOTS_TTL
+
+
+async def test_unreachable_retried_before_disallowing():
+    client, requested = client_for(httpx.Response(503), httpx.Response(200, text="User-agent: *\n"))
+    rules = await fetch_rules(ORIGIN, UA, client)
+    assert len(requested) == 2
+    assert rules.status == 200
+    assert rules.allowed(f"{ORIGIN}/page", UA)
+
+
+async def test_still_unreachable_after_retries():
+    client, requested = client_for(httpx.Response(500))
+    rules = await fetch_rules(ORIGIN, UA, client)
+    assert len(requested) == robots.ROBOTS_RETRIES + 1
+    assert rules.disallow_all
+    assert rules.expires_at - rules.fetched_at == robots.ROBOTS_ERROR_TTL
+    assert not rules.allowed(f"{ORIGIN}/page", UA)
+    # CrawlConfig.robots_unreachable="allow"
+    assert rules.allowed(f"{ORIGIN}/page", UA, unreachable=True)
+
+
+async def test_network_error_is_unreachable():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("refused", request=request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    rules = await fetch_rules(ORIGIN, UA, client)
+    assert rules.status == 0 and rules.disallow_all
+
+
+async def test_cache_fetches_once_per_origin():
+    client, requested = client_for(httpx.Response(200, text="User-agent: *\nDisallow: /x\n"))
+    cache = RobotsCache()
+    first = await cache.get(ORIGIN, UA, client)
+    assert cache.peek(ORIGIN) is first
+    assert await cache.get(ORIGIN, UA, client) is first
+    assert len(requested) == 1 and cache.fetches == 1
+
+
+async def test_cache_keeps_stale_rules_when_unreachable():
+    client, _ = client_for(httpx.Response(503))
+    cache = RobotsCache()
+    cache._put(ORIGIN, RobotsRules(200, "User-agent: *\nDisallow: /x\n", 0.0, 1.0))
+    rules = await cache.get(ORIGIN, UA, client)
+    assert rules.body is not None and rules.fresh()
+    assert not rules.allowed(f"{ORIGIN}/x", UA)
+    assert rules.allowed(f"{ORIGIN}/y", UA)
+
+
+def test_cache_evicts_least_recently_used():
+    cache = RobotsCache(max_entries=2)
+    for origin in ("https://a.test", "https://b.test", "https://c.test"):
+        cache._put(origin, RobotsRules(404, None, 0.0, float("inf")))
+    assert cache.peek("https://a.test") is None
+    assert cache.peek("https://c.test") is not None
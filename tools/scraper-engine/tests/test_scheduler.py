@@ -0,0 +1,134 @@
+import asyncio
+import math
+import time
+from urllib.robotparser import RobotFileParser
+
+import pytest
+
+from scraper_engine.scheduler import AdaptiveRate, HostScheduler, host_key, robots_delay
+
+
+async def test_hosts_in_parallel_each_at_its_delay():
+    queue = HostScheduler(default_delay=0.1)
+    for url in ("https://a.test/1", "https://a.test/2", "https://b.test/1"):
+        queue.put(url)
+    t0 = time.monotonic()
+    got = [await queue.get(), await queue.get()]
+    assert sorted(got) == ["https://a.test/1", "https://b.test/1"]
+    assert time.monotonic() - t0 < 0.05  # b does not wait for a
+    assert await queue.get() == "https://a.test/2"
+    assert time.monotonic() - t0 >= 0.09  # a's second request waits its delay
+
+
+async def test_join_after_task_done():
+    queue = HostScheduler(default_delay=0.0)
+    queue.put("https://a.test/1")
+    url = await queue.get()
+    joined = asyncio.create_task(queue.join())
+    await asyncio.sleep(0)
+    assert not joined.done()
+    queue.release(host_key(url))
+    queue.task_done()
+    await asyncio.wait_for(joined, 1)
+    with pytest.raises(ValueError):
+        queue.task_done()
+
+
+def test_set_delay_floor_and_cap():
+    queue = HostScheduler(default_delay=1.0, max_delay=10.0)
+    queue.set_delay("a.test", 0.2)
+    queue.set_delay("b.test", 60)
+    queue.set_delay("c.test", None)
+    assert [queue.delay_for(h) for h in ("a.test", "b.test", "c.test")] == [1.0, 10.0, 1.0]
+
+
+def test_robots_delay():
+    rp = RobotFileParser()
+    rp.parse(["User-agent: *", "Crawl-delay: 2", "Request-rate: 1/5"])
+    assert robots_delay(rp, "bot") == 5
+    rp = RobotFileParser()
+    rp.parse(["User-agent: *", "Disallow: /x"])
+    assert robots_delay(rp, "bot") is None
+    assert robots_delay(None, "bot") is None
+    assert host_key("https://Example.COM:8443/a") == "example.com:8443"
+
+
+async def test_frontier_spills_past_memory_limit():
+    queue = HostScheduler(default_delay=0.0, memory_limit=3)
+    urls = [f"https://a.test/{i}" for i in range(10)]
+    for url in urls:
+        queue.put(url)
+    queue.put("https://b.test/1")
+    assert (queue.qsize(), queue.spilled()) == (11, 8)
+    assert sorted(queue.pending()) == sorted((u, 0) for u in [*urls, "https://b.test/1"])
+    got = []
+    for _ in range(11):
+        url = await asyncio.wait_for(queue.get(), 1)
+        got.append(url)
+        queue.release(host_key(url))
+        queue.task_done()
+    # Spilled URLs come back in the order they were queued.
+    assert [u for u in got if "a.test" in u] == urls
+    assert queue.spilled() == 0
+    queue.close()
+
+
+def test_aimd_window():
+    rate = AdaptiveRate(initial_delay=1.0, min_delay=0.01, max_window=8)
+    assert (rate.limit("a"), rate.interval("a")) == (1, 1.0)
+    for _ in range(4):
+        rate.on_response("a", 0.1)
+    assert rate.limit("a") == 5  # slow start: one more per response
+    assert rate.interval("a") == pytest.approx(0.1 / 5)
+    rate.on_overload("a")
+    assert rate.state("a").window == 2.5
+    rate.on_overload("a")  # within one response time of the last cut: ignored
+    assert rate.state("a").window == 2.5
+    rate.on_response("a", 0.1)
+    assert rate.state("a").window == pytest.approx(2.5 + 1 / 2.5)  # congestion avoidance
+    for _ in range(100):
+        rate.on_response("a", 0.1)
+    assert rate.limit("a") == 8
+
+
+def test_aimd_cuts_on_slow_responses():
+    rate = AdaptiveRate(min_delay=0.0, latency_factor=3.0)
+    rate.on_response("a", 0.1)
+    rate.on_response("a", 0.1)
+    assert rate.state("a").window == 3
+    for _ in range(20):
+        rate.on_response("a", 1.0)
+        rate.state("a").cut_at = -math.inf  # pretend a response time has passed
+    assert rate.state("a").window == AdaptiveRate.MIN_WINDOW
+    assert rate.interval("a") > rate.state("a").srtt  # slower than one request at a time
+
+
+def test_backoff_and_retry_after():
+    queue = HostScheduler(default_delay=0.0, retry_backoff=1.0, max_backoff=5.0,
+                          rate=AdaptiveRate(min_delay=0.0))
+    assert queue.backoff("a.test", retry_after=2.0) == 2.0
+    assert queue.backoff("a.test", retry_after=60.0) == 5.0  # capped
+    assert 2.0 <= queue.backoff("a.test") <= 4.0  # third failure: 1s doubled twice, jittered
+    queue.record("a.test", 0.1)
+    assert 0.5 <= queue.backoff("a.test") <= 1.0  # a response resets the count
+
+
+async def test_acquire_takes_the_hosts_turn():
+    queue = HostScheduler(default_delay=0.05, rate=AdaptiveRate(initial_delay=0.05))
+    t0 = time.monotonic()
+    await queue.acquire("a.test")
+    assert time.monotonic() - t0 < 0.03
+    queue.put("https://a.test/1")
+    # The frontier's request waits for the delay after the acquired one, and its
+    # release (the host's limit is one request in flight before any response).
+    got = asyncio.create_task(queue.get())
+    await asyncio.sleep(0.08)
+    assert not got.done()
+    queue.release("a.test")
+    assert await asyncio.wait_for(got, 1) == "https://a.test/1"
+    second = asyncio.create_task(queue.acquire("a.test"))
+    await asyncio.sleep(0.08)
+    assert not second.done()
+    queue.release("a.test")
+    await asyncio.wait_for(second, 1)
+    assert time.monotonic() - t0 >= 0.1
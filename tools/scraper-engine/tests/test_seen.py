@@ -0,0 +1,31 @@
+import pytest
+
+from scraper_engine.seen import ExactSeen, FingerprintSeen, make_seen
+
+URLS = [f"https://site.example/p/{i}" for i in range(5000)]
+
+
+def test_fingerprint_set_grows():
+    seen = make_seen("fingerprint")
+    assert all(seen.add(u) for u in URLS)
+    assert not any(seen.add(u) for u in URLS[::7])
+    assert len(seen) == len(URLS) and URLS[-1] in seen
+    assert "https://site.example/other" not in seen
+    assert seen.nbytes() <= 8 * len(URLS) / FingerprintSeen.MAX_LOAD * 2
+
+
+def test_checkpoint_state_round_trips():
+    seen = make_seen("fingerprint")
+    seen.update(URLS[:100])
+    again = FingerprintSeen()
+    again.restore(seen.state())
+    assert len(again) == 100 and all(u in again for u in URLS[:100])
+    # An exact checkpoint resumes into either backend; not the other way round.
+    exact = make_seen("exact")
+    exact.update(URLS[:10])
+    again.restore(exact.state())
+    assert len(again) == 100
+    with pytest.raises(ValueError, match="fingerprint"):
+        ExactSeen().restore(seen.state())
+    with pytest.raises(ValueError):
+        make_seen("bloom")
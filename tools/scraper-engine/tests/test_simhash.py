@@ -0,0 +1,102 @@
+import random
+
+from scraper_engine.crawler import crawl
+from scraper_engine.extractor import extract
+from scraper_engine.fast_extractor import extract_fast
+from scraper_engine.simhash import NearDuplicateIndex, distance, simhash
+
+VOCAB = [f"w{i}" for i in range(5000)]
+NAV = " ".join(f'<a href="/section/{i}">Section {i} news and more</a>' for i in range(30))
+
+
+def template(title: str, main: str) -> str:
+    """A page of the shared site template: big nav and footer around main."""
+    return (f"<html><head><title>{title}</title></head><body>"
+            f"<header><nav>{NAV}</nav></header><main>{main}</main>"
+            f"<footer>Copyright Example Corp. All rights reserved. Contact us any time "
+            f"about anything at all, we love hearing from readers.</footer></body></html>")
+
+
+def listing(n: int) -> str:
+    rng = random.Random(n)
+    items = "".join(f'<li><a href="/p/{t}">Page {t}</a></li>' for t in
+                    (rng.randrange(10_000) for _ in range(40)))
+    return template(f"Listing {n}", f"<h1>Listing {n}</h1><ul>{items}</ul>")
+
+
+def article(seed: int, words: int = 200) -> list[str]:
+    rng = random.Random(seed)
+    return [rng.choice(VOCAB) for _ in range(words)]
+
+
+def test_template_sharing_pages_not_flagged():
+    index = NearDuplicateIndex(3)
+    for n in range(100):
+        page = extract(listing(n), f"https://example.com/list/{n}", "example.com")
+        assert page.word_count >= 50
+        assert index.add(page.simhash, page.url) is None, f"listing {n} flagged"
+
+
+def test_near_identical_pages_flagged():
+    words = article(1, 1000)
+    edited = list(words)
+    edited[500] = "session0123"
+    assert distance(simhash(words), simhash(edited)) <= 3
+    index = NearDuplicateIndex(3)
+    assert index.add(simhash(words), "a") is None
+    assert index.add(simhash(edited), "b") == "a"
+
+
+def test_unrelated_pages_far_apart():
+    assert distance(simhash(article(1)), simhash(article(2))) > 16
+
+
+def test_word_order_counts():
+    words = article(3)
+    assert distance(simhash(words), simhash(sorted(words))) > 3
+    assert simhash([]) == 0
+    assert simhash(["one", "two"]) != 0
+
+
+def test_page_chrome_left_out_of_text():
+    words = article(4, 80)
+    main = "<p>" + " ".join(words) + "</p>"
+    bare = f"<html><head><title>T</title></head><body><main>{main}</main></body></html>"
+    for extractor in (extract, extract_fast):
+        full = extractor(template("T", main), "https://example.com/a", "example.com")
+        plain = extractor(bare, "https://example.com/a", "example.com")
+        assert (full.word_count, full.simhash) == (plain.word_count, plain.simhash)
+        assert full.simhash == simhash(["t", *words])
+        # Its links still count.
+        assert len(full.links) == 30
+
+
+def test_index_blocks():
+    index = NearDuplicateIndex(3)
+    fp = random.Random(5).getrandbits(64)
+    assert index.add(fp, "a") is None
+    assert index.find(fp ^ 0b111) == "a"
+    assert index.find(fp ^ (1 << 63 | 1 << 40 | 1 << 20 | 1)) is None
+    assert len(index) == 1
+
+
+async def test_links_of_skipped_pages_followed(site):
+    text = " ".join(article(6))
+    site.pages = {
+        "/": '<a href="/a">a</a> <a href="/b">b</a>',
+        "/a": f"<p>{text}</p>",
+        "/b": f'<p>{text} copy</p><a href="/c">only linked from b</a>',
+        "/c": "<p>" + " ".join(article(7)) + "</p>",
+    }
+    pages = await crawl([site.url("/")], "site.test", site.config(near_duplicate_bits=3))
+    assert [p["url"] for p in pages] == [site.url(p) for p in ("/", "/a", "/c")]
+    assert site.requested == ["/", "/a", "/b", "/c"]
+
+
+async def test_near_duplicate_chain_stops_at_budget(site):
+    text = " ".join(article(6))
+    site.pages = {f"/p/{i}": f'<p>{text}</p><a href="/p/{i + 1}">next</a>' for i in range(50)}
+    cfg = site.config(near_duplicate_bits=3, max_pages_per_domain=5)
+    pages = await crawl([site.url("/p/0")], "site.test", cfg)
+    assert [p["url"] for p in pages] == [site.url("/p/0")]
+    assert site.requested == [f"/p/{i}" for i in range(5)]
@@ -0,0 +1,113 @@
+import gzip
+import time
+from datetime import UTC, datetime
+
+import httpx
+import pytest
+
+from scraper_engine.crawler import crawl
+from scraper_engine.robots import RobotsRules, get_robots_cache
+from scraper_engine.sitemaps import SitemapParser, discover, parse_lastmod
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+ORIGIN = "https://example.com"
+
+
+def urlset(*locs: str) -> str:
+    urls = "".join(f"<url><loc>{loc}</loc><lastmod>2024-05-01</lastmod></url>" for loc in locs)
+    return f'<?xml version="1.0"?><urlset {NS}>{urls}</urlset>'
+
+
+def index(*locs: str) -> str:
+    return f"<sitemapindex {NS}>" + "".join(
+        f"<sitemap><loc>{loc}</loc></sitemap>" for loc in locs
+    ) + "</sitemapindex>"
+
+
+def test_parse_lastmod():
+    day_end = datetime(2024, 5, 2, tzinfo=UTC).timestamp()
+    assert parse_lastmod("2024-05-01") == day_end
+    assert parse_lastmod("2024-05-01T12:00:00+02:00") == datetime(
+        2024, 5, 1, 10, tzinfo=UTC).timestamp()
+    assert parse_lastmod("yesterday") is None and parse_lastmod(None) is None
+
+
+def test_parser_is_incremental():
+    data = urlset(f"{ORIGIN}/a", f"{ORIGIN}/b").encode()
+    parser = SitemapParser()
+    entries = []
+    for i in range(len(data)):
+        entries += parser.feed(data[i:i + 1])
+    entries += parser.close()
+    assert [(e.kind, e.loc) for e in entries] == [("url", f"{ORIGIN}/a"), ("url", f"{ORIGIN}/b")]
+    assert entries[0].lastmod == parse_lastmod("2024-05-01")
+
+
+async def test_discover_follows_indexes():
+    files = {
+        "/maps/index.xml": index(f"{ORIGIN}/maps/a.xml.gz", f"{ORIGIN}/maps/nested.xml",
+                                 f"{ORIGIN}/maps/a.xml.gz"),
+        "/maps/a.xml.gz": gzip.compress(urlset(f"{ORIGIN}/1", f"{ORIGIN}/2").encode()),
+        "/maps/nested.xml": index(f"{ORIGIN}/maps/big.xml", f"{ORIGIN}/maps/broken.xml"),
+        "/maps/big.xml": urlset(*(f"{ORIGIN}/big/{i}" for i in range(1000))),
+        "/maps/broken.xml": urlset(f"{ORIGIN}/3").removesuffix("</urlset>") + "<url><loc>",
+    }
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.path)
+        body = files.get(request.url.path)
+        return httpx.Response(404) if body is None else httpx.Response(200, content=body)
+
+    now = time.time()
+    rules = RobotsRules(200, f"Sitemap: {ORIGIN}/maps/index.xml\n", now, now + 60)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+        entries = [e.loc async for e in discover(client, ORIGIN, rules, "bot", max_bytes=4096)]
+        fallback = [e async for e in discover(client, ORIGIN, None, "bot")]
+    big = [u for u in entries if "/big/" in u]
+    assert 0 < len(big) < 100  # cut off at max_bytes
+    assert [u for u in entries if "/big/" not in u] == [f"{ORIGIN}/{i}" for i in (1, 2, 3)]
+    assert requested.count("/maps/a.xml.gz") == 1
+    assert fallback == [] and requested[-1] == "/sitemap.xml"
+
+
+@pytest.fixture
+def fresh_robots():
+    get_robots_cache().clear()
+    yield
+    get_robots_cache().clear()
+
+
+async def test_crawl_seeds_from_sitemap(site, fresh_robots):
+    site.pages = {
+        "/": "<p>home</p>",
+        "/sitemap.xml": lambda request: httpx.Response(200, content=urlset(
+            site.url("/orphan"), "https://elsewhere.test/x", site.url("/")
+        )),
+        "/orphan": "<p>only in the sitemap</p>",
+    }
+    pages = await crawl([site.url("/")], "site.test", site.config(use_sitemaps=True))
+    assert sorted(p["url"] for p in pages) == [site.url("/"), site.url("/orphan")]
+    assert "https://elsewhere.test/x" not in site.requested
+
+
+async def test_sitemap_requests_keep_the_host_delay(site, fresh_robots):
+    times: dict[str, float] = {}
+
+    def serve(body: str):
+        def handler(request: httpx.Request) -> httpx.Response:
+            times[request.url.path] = time.monotonic()
+            return httpx.Response(200, content=body)
+        return handler
+
+    site.pages = {
+        "/": serve("<p>home</p>"),
+        "/sitemap.xml": serve(index(site.url("/a.xml"), site.url("/b.xml"))),
+        "/a.xml": serve(urlset(site.url("/"))),
+        "/b.xml": serve(urlset(site.url("/"))),
+    }
+    await crawl([site.url("/")], "site.test",
+                site.config(use_sitemaps=True, request_delay_seconds=0.05))
+    assert len(times) == 4
+    stamps = sorted(times.values())
+    assert min(b - a for a, b in zip(stamps, stamps[1:])) >= 0.045
@@ -0,0 +1,120 @@
+import sqlite3
+import threading
+
+from scraper_engine import storage
+
+
+def page(n: int, *links: str) -> dict:
+    return {
+        "url": f"https://site.example/p/{n}",
+        "domain": "site.example",
+        "title": f"Page {n}",
+        "links": [{"href": h, "anchor": f"to {h}"} for h in links],
+    }
+
+
+def test_pooled_wal_connection_per_thread(db):
+    conn = storage.connect(db)
+    assert storage.connect(db) is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    other = []
+    t = threading.Thread(target=lambda: other.append(storage.connect(db)))
+    t.start()
+    t.join()
+    assert other[0] is not conn
+
+
+def test_close_all_reopens(db):
+    conn = storage.connect(db)
+    storage.close_all()
+    again = storage.connect(db)
+    assert again is not conn
+    assert again.execute("SELECT 1").fetchone() == (1,)
+
+
+def test_store_pages_in_batches(db, monkeypatch):
+    monkeypatch.setattr(storage, "PAGE_BATCH_SIZE", 3)
+    job_id = storage.create_job(db, "target.example", ["https://site.example/"], max_pages=10)
+    pages = [page(n, "https://target.example/", f"https://site.example/p/{n + 1}")
+             for n in range(7)]
+    storage.store_crawl(db, job_id, "target.example", pages, {"referring_domains": 1})
+    conn = storage.connect(db)
+    stored = conn.execute(
+        "SELECT url FROM crawl_pages WHERE job_id = ? ORDER BY id", (job_id,)
+    ).fetchall()
+    assert [u for (u,) in stored] == [p["url"] for p in pages]
+    links = conn.execute("SELECT COUNT(*) FROM links WHERE job_id = ?", (job_id,)).fetchone()
+    assert links == (14,)
+    job = storage.get_job(db, job_id)
+    assert (job["status"], job["max_pages"]) == ("completed", 10)
+    assert storage.list_jobs(db, "completed") == [job_id]
+
+
+def test_migrations_idempotent(tmp_path):
+    path = str(tmp_path / "m.db")
+    conn = sqlite3.connect(path)
+    storage.migrate(conn)
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    assert version == storage._MIGRATIONS[-1][0]
+    storage.migrate(conn)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == version
+    conn.close()
+
+
+def test_links_table_and_backlinks(db):
+    job_id = storage.create_job(db, "target.example", ["https://site.example/"])
+    source = page(1)
+    source["links"] = [
+        {"href": "https://target.example/a", "anchor": "a", "rel": "nofollow ugc"},
+        {"href": "https://www.target.example/b", "anchor": "b", "rel": "sponsored"},
+        {"href": "https://site.example/p/2", "anchor": "self", "is_internal": True},
+    ]
+    own = {"url": "https://target.example/x", "domain": "target.example",
+           "links": [{"href": "https://target.example/a", "anchor": "own site"}]}
+    storage.store_crawl(db, job_id, "target.example", [source, own], {"referring_domains": 1})
+
+    rows = storage.connect(db).execute(
+        "SELECT anchor, rel_flags FROM links WHERE job_id = ? ORDER BY id", (job_id,)
+    ).fetchall()
+    assert rows == [
+        ("a", storage.REL_NOFOLLOW | storage.REL_UGC),
+        ("b", storage.REL_SPONSORED),
+        ("self", storage.REL_INTERNAL),
+        ("own site", 0),
+    ]
+    # Links from target.example itself are not backlinks; www. counts as the target.
+    report = storage.get_report(db, "target.example")
+    assert sorted(report["backlinks"], key=lambda bl: bl["anchor"]) == [
+        {"source": "https://site.example/p/1", "target": "https://target.example/a",
+         "anchor": "a", "nofollow": True},
+        {"source": "https://site.example/p/1", "target": "https://www.target.example/b",
+         "anchor": "b", "nofollow": False},
+    ]
+    to_a = storage.get_backlinks_to_url(db, "https://target.example/a")
+    assert [bl["source"] for bl in to_a] == ["https://site.example/p/1", "https://target.example/x"]
+    assert storage.get_backlinks_to_url(db, "https://target.example/a", job_id + 1) == []
+
+
+def test_v2_migration_moves_links_json(tmp_path):
+    path = str(tmp_path / "v1.db")
+    conn = sqlite3.connect(path)
+    storage._run_script(conn, storage._SCHEMA_V1)
+    conn.execute("PRAGMA user_version = 1")
+    conn.execute("INSERT INTO crawl_jobs (target_domain, seed_urls) VALUES ('t.example', '[]')")
+    conn.execute(
+        "INSERT INTO crawl_pages (job_id, url, domain, links_json) VALUES (1, ?, ?, ?)",
+        ("https://s.example/", "s.example",
+         '[{"href": "https://t.example/", "anchor": "t", "is_nofollow": true}]'),
+    )
+    conn.execute(
+        "INSERT INTO crawl_metrics (job_id, target_domain, metrics_json) VALUES (1, ?, ?)",
+        ("t.example", '{"referring_domains": 1, "backlinks": [{"source": "x"}]}'),
+    )
+    conn.commit()
+    storage.migrate(conn)
+    assert conn.execute(
+        "SELECT u.url, l.anchor, l.rel_flags FROM links l JOIN urls u ON u.id = l.target_url_id"
+    ).fetchall() == [("https://t.example/", "t", storage.REL_NOFOLLOW)]
+    metrics = conn.execute("SELECT metrics_json FROM crawl_metrics").fetchone()[0]
+    assert "backlinks" not in metrics
+    conn.close()
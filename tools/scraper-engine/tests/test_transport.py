@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from scraper_engine.config import CrawlConfig
+from scraper_engine.crawler import crawl
+from scraper_engine.transport import (
+    _counters,
+    close_clients,
+    transport_counter,
+    transport_stats,
+)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    pages = 5
+
+    def do_GET(self):  # noqa: N802
+        n = int(self.path.rsplit("/", 1)[-1] or 0)
+        links = f'<a href="/p/{n + 1}">next</a>' if n + 1 < self.pages else ""
+        body = f"<title>{n}</title>{links}".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servers():
+    """Two local HTTP sites of Handler.pages chained pages each."""
+    running = [ThreadingHTTPServer(("127.0.0.1", 0), Handler) for _ in range(2)]
+    for server in running:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield [f"http://127.0.0.1:{s.server_address[1]}" for s in running]
+    for server in running:
+        server.shutdown()
+        server.server_close()
+
+
+async def test_concurrent_crawls_count_their_own_requests(servers, caplog):
+    cfg = CrawlConfig(max_concurrent=1, request_delay_seconds=0.0, adaptive_rate=False,
+                      respect_robots=False, use_sitemaps=False, extract_mode="inline")
+    before = transport_stats()
+
+    async def one(base: str) -> tuple[int, int]:
+        with transport_counter() as net:
+            pages = await crawl([base + "/p/0"], base, cfg)
+        return len(pages), net.requests
+
+    caplog.set_level(logging.INFO, logger="scraper_engine.crawler")
+    try:
+        results = await asyncio.gather(*(one(base) for base in servers))
+    finally:
+        await close_clients()
+    assert results == [(Handler.pages, Handler.pages)] * 2
+    assert transport_stats().since(before).requests == 2 * Handler.pages
+    logged = [r.getMessage() for r in caplog.records if r.getMessage().startswith("Transport:")]
+    assert logged == [f"Transport: {Handler.pages} requests over 1 new connections "
+                      f"({Handler.pages - 1} reused, 0 TLS handshakes, 0 HTTP/2)"] * 2
+
+
+def test_counters_nest():
+    with transport_counter() as outer:
+        with transport_counter() as inner:
+            assert _counters.get() == (outer, inner)
+        assert _counters.get() == (outer,)
+    assert _counters.get() == ()
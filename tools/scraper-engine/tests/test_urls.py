@@ -0,0 +1,44 @@
+from urllib.parse import urljoin
+
+import pytest
+
+from scraper_engine.fast_extractor import extract_fast
+from scraper_engine.urls import DomainMatcher, join_url, normalize_host, normalize_url
+
+BASE = "https://example.com/dir/page.html?q=1"
+
+
+@pytest.mark.parametrize("href", [
+    "https://other.example/a?b=c#d", "http://x.example", "/root", "/r?x=1#f", "rel/a",
+    "../up", "/a/./b", "/a/../b", "//cdn.example/x", "/a//b", "?only=query", "#frag",
+    "/x?", "/x#", "https://[::1]:8080/v6", "https://a.example/sp ace", "/tab\there",
+    "HTTPS://Upper.example/", "https://a.example/../x",
+])
+def test_join_url_matches_urljoin(href):
+    assert join_url(BASE, href) == urljoin(BASE, href)
+
+
+def test_normalize_url():
+    assert normalize_url("  /a/b/#frag ", BASE) == "https://example.com/a/b"
+    assert normalize_url("https://example.com/") == "https://example.com/"
+    assert normalize_url("https://example.com/x/?q=1#f") == "https://example.com/x?q=1"
+    assert normalize_url("") == ""
+    assert normalize_host(" WWW.Example.COM:8080") == "example.com:8080"
+
+
+def test_links_carry_host_and_crawl_key():
+    page = extract_fast('<a href="/Docs/#x">d</a><a href="https://www.Other.example/">o</a>',
+                        BASE, "example.com")
+    docs, other = page.links
+    assert (docs.domain, docs.normalized) == ("example.com", "https://example.com/Docs")
+    assert other.domain == "other.example"
+
+
+def test_domain_matcher():
+    match = DomainMatcher("https://www.blog.example.co.uk/")
+    assert (match.domain, match.site) == ("blog.example.co.uk", "example.co.uk")
+    assert match("blog.example.co.uk") and match("a.blog.example.co.uk")
+    assert not match("xblog.example.co.uk") and not match("example.co.uk")
+    # Crawl scope also takes in parents of the target, up to its registrable domain.
+    assert match.related("example.co.uk") and not match.related("co.uk")
+    assert not match.related("other.co.uk")
@@ -0,0 +1,52 @@
+import asyncio
+
+import httpx
+
+from scraper_engine import async_storage, worker
+from scraper_engine.config import WorkerConfig
+
+
+async def wait_for_status(db: str, job_id: int, status: str) -> dict:
+    for _ in range(200):
+        job = await async_storage.get_job(db, job_id)
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job {job_id} is {job['status']}, not {status}")
+
+
+def start(db: str, monkeypatch, site) -> worker.Worker:
+    monkeypatch.setattr(worker, "job_config", lambda max_pages: site.config())
+    cfg = WorkerConfig(concurrency=1, lease_seconds=30, poll_interval_seconds=0.01, embedded=False)
+    return worker.Worker(db, cfg, worker_id="w1")
+
+
+async def test_worker_runs_queued_job(adb, site, monkeypatch):
+    site.pages = {"/": '<a href="/a">a</a>', "/a": "<p>a</p>"}
+    job_id = await async_storage.create_job(adb, "site.test", [site.url("/")])
+    w = start(adb, monkeypatch, site)
+    run = asyncio.create_task(w.run())
+    job = await wait_for_status(adb, job_id, "completed")
+    w.stop()
+    await run
+    assert (job["worker"], job["attempts"]) == (None, 1)
+    assert (await async_storage.get_report(adb, "site.test"))["pages_crawled"] == 2
+
+
+async def test_stopped_worker_hands_job_back(adb, site, monkeypatch):
+    started = asyncio.Event()
+
+    async def hang(request: httpx.Request) -> httpx.Response:
+        started.set()
+        await asyncio.sleep(10)
+        return httpx.Response(200, html="")
+
+    site.pages = {"/": hang}
+    job_id = await async_storage.create_job(adb, "site.test", [site.url("/")])
+    w = start(adb, monkeypatch, site)
+    run = asyncio.create_task(w.run())
+    await asyncio.wait_for(started.wait(), 2)
+    w.stop()
+    await asyncio.wait_for(run, 2)
+    job = await async_storage.get_job(adb, job_id)
+    assert (job["status"], job["attempts"], job["worker"]) == ("queued", 0, None)